@@ -0,0 +1,286 @@
+"""Local stand-in for barttorvik, kenpom (via web.archive.org) and sports-reference.
+
+Pages are served from the benchmarks.fixtures HTML for every URL pattern the scrapers
+use, so fetchers and their retry logic can be load tested without network access.
+The original URL is kept in the path, http://127.0.0.1:8765/{host}/{path}?{query},
+and redirect_requests() rewrites requests made through the requests library to it.
+The shared http_client still paces by the original host, pass it a config without
+min_interval_seconds to load test at full speed:
+
+    http_client.configure(http_client.HttpClientConfig(min_interval_seconds={}))
+    with FixtureServer(FaultConfig(latency_seconds=0.05, error_rate=0.1)) as server:
+        with redirect_requests(server.url):
+            bball_ref.download_basketball_reference_stats_data(2024)
+        print(server.stats)
+
+Faults are injected per request in order: throttling (429 with Retry-After once a
+host exceeds its request rate), random 5xx errors, then latency.
+"""
+
+import collections
+import contextlib
+import dataclasses
+import functools
+import http.server
+import logging
+import random
+import re
+import threading
+import time
+import urllib.parse
+from typing import Callable
+
+import pydantic
+import requests
+import typer
+
+import benchmarks.fixtures as fixtures
+import uro_cbb.bball_ref as bball_ref
+import uro_cbb.kenpom as kenpom
+
+
+class FaultConfig(pydantic.BaseModel):
+    latency_seconds: float = 0.0
+    # Uniform extra latency in [0, latency_jitter_seconds)
+    latency_jitter_seconds: float = 0.0
+    error_rate: float = 0.0
+    error_statuses: list[int] = [500, 502, 503, 504]
+    # Requests per second allowed per host before answering 429, None to disable
+    rate_limit_per_second: float | None = None
+    retry_after_seconds: int = 1
+    seed: int = fixtures.SEED
+
+
+@dataclasses.dataclass(frozen=True)
+class Route:
+    name: str
+    pattern: re.Pattern
+    render: Callable[[re.Match], str]
+
+
+def _fixture(name: str) -> Callable[[re.Match], str]:
+    html = functools.cache(lambda: fixtures.read_html_fixture(name))
+    return lambda match: html()
+
+
+ROUTES = [
+    Route(
+        "barttorvik",
+        re.compile(r"barttorvik\.com/(?:ncaaw/)?trank\.php"),
+        _fixture("barttorvik.html"),
+    ),
+    Route(
+        "kenpom",
+        re.compile(r"web\.archive\.org/web/\d+/(?:https?://)?kenpom\.com/?"),
+        _fixture("kenpom.html"),
+    ),
+    Route(
+        "bball_ref_advanced_stats",
+        re.compile(
+            r"(?:web\.archive\.org/web/\d+/https?://)?www\.sports-reference\.com"
+            r"/cbb/seasons/(?:men/)?\d{4}-advanced-school-stats\.html"
+        ),
+        _fixture("bball_ref_advanced_stats.html"),
+    ),
+    Route(
+        "bball_ref_stats",
+        re.compile(
+            r"www\.sports-reference\.com/cbb/seasons/(?:men|women)/\d{4}"
+            r"-(?:school|opponent)-stats\.html"
+        ),
+        _fixture("bball_ref_stats.html"),
+    ),
+    Route(
+        "bball_ref_postseason",
+        re.compile(
+            r"www\.sports-reference\.com/cbb/postseason/(?:women/)?\d{4}-ncaa\.html"
+        ),
+        _fixture("postseason.html"),
+    ),
+    Route(
+        "bball_ref_box_score",
+        re.compile(r"www\.sports-reference\.com/cbb/boxscores/[^/]+\.html"),
+        _fixture("box_score.html"),
+    ),
+    Route(
+        "bball_ref_schedule",
+        re.compile(
+            r"www\.sports-reference\.com/cbb/schools/(?P<slug>[^/]+)/(?:men|women)"
+            r"/(?P<year>\d{4})-schedule\.html"
+        ),
+        lambda match: fixtures.schedule_html(match["slug"], int(match["year"])),
+    ),
+]
+
+
+def match_route(url_path: str) -> tuple[Route, re.Match] | None:
+    """url_path is {host}/{path} without scheme or query."""
+    for route in ROUTES:
+        if match := route.pattern.fullmatch(url_path):
+            return route, match
+    return None
+
+
+def fixture_url(url: str, server_url: str) -> str:
+    url = urllib.parse.urlsplit(url)
+    query = f"?{url.query}" if url.query else ""
+    return f"{server_url}/{url.netloc}{url.path}{query}"
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        status, headers, body = self.server.respond(url.path.lstrip("/"))
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, faults: FaultConfig):
+        super().__init__(address, _RequestHandler)
+        self.faults = faults
+        self.stats = collections.Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(faults.seed)
+        self._host_requests = collections.defaultdict(collections.deque)
+
+    def _throttled(self, host: str) -> bool:
+        if self.faults.rate_limit_per_second is None:
+            return False
+        now = time.monotonic()
+        recent = self._host_requests[host]
+        while recent and recent[0] <= now - 1:
+            recent.popleft()
+        if len(recent) >= self.faults.rate_limit_per_second:
+            return True
+        recent.append(now)
+        return False
+
+    def _count(self, *keys: str):
+        with self._lock:
+            self.stats.update(keys)
+
+    def respond(self, url_path: str) -> tuple[int, dict, bytes]:
+        host = url_path.split("/", 1)[0]
+        with self._lock:
+            throttled = self._throttled(host)
+            failed = self._random.random() < self.faults.error_rate
+            error_status = self._random.choice(self.faults.error_statuses)
+            latency = self.faults.latency_seconds + (
+                self._random.random() * self.faults.latency_jitter_seconds
+            )
+        if throttled:
+            self._count("429")
+            retry_after = str(self.faults.retry_after_seconds)
+            return 429, {"Retry-After": retry_after}, b"Too Many Requests"
+        if failed:
+            self._count(str(error_status))
+            return error_status, {}, b"Injected failure"
+        time.sleep(latency)
+        if (routed := match_route(url_path)) is None:
+            self._count("404")
+            return 404, {}, b"No fixture for this URL"
+        route, match = routed
+        self._count("200", route.name)
+        body = route.render(match).encode()
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, body
+
+
+class FixtureServer:
+    """Runs the stand-in server on a background thread, port 0 picks a free port."""
+
+    def __init__(
+        self,
+        faults: FaultConfig = FaultConfig(),
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self._server = _Server((host, port), faults)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> collections.Counter:
+        """Responses by status code and successful responses by route name."""
+        return self._server.stats
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@contextlib.contextmanager
+def redirect_requests(server_url: str):
+    """Sends every request made with the requests library (requests.get, sessions and
+    their retry adapters alike) to the fixture server instead of the internet."""
+    original_send = requests.adapters.HTTPAdapter.send
+
+    def send(adapter, request, *args, **kwargs):
+        if not request.url.startswith(server_url):
+            request.url = fixture_url(request.url, server_url)
+        return original_send(adapter, request, *args, **kwargs)
+
+    requests.adapters.HTTPAdapter.send = send
+    try:
+        yield
+    finally:
+        requests.adapters.HTTPAdapter.send = original_send
+
+
+def unrouted_archive_urls() -> list[str]:
+    """Archive URLs the scrapers use that no route serves, should be empty."""
+    urls = list(kenpom.KENPOM_ARCHIVE_URLS.values()) + [
+        url for url in bball_ref.ADVANCED_STATS_ARCHIVE_URLS.values() if url
+    ]
+    return [
+        url
+        for url in urls
+        if match_route(fixture_url(url, "").lstrip("/").split("?")[0]) is None
+    ]
+
+
+def main(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    latency_seconds: float = 0.0,
+    latency_jitter_seconds: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit_per_second: float | None = None,
+    retry_after_seconds: int = 1,
+):
+    logging.basicConfig(level=logging.INFO)
+    assert not (missing := unrouted_archive_urls()), f"Unrouted URLs: {missing}"
+    faults = FaultConfig(
+        latency_seconds=latency_seconds,
+        latency_jitter_seconds=latency_jitter_seconds,
+        error_rate=error_rate,
+        rate_limit_per_second=rate_limit_per_second,
+        retry_after_seconds=retry_after_seconds,
+    )
+    server = _Server((host, port), faults)
+    logging.info(f"Serving fixtures on http://{host}:{port}, faults: {faults}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,335 @@
+"""Synthetic, seeded inputs for the benchmarks.
+
+The HTML fixtures mirror the markup the scrapers parse (barttorvik trank, kenpom
+ratings, sports-reference school stats and box scores) and are checked in under
+benchmarks/fixtures/; `python -m benchmarks.fixtures` regenerates them. Season parquet
+files and the bracket probability matrix are cheap to build, so they are generated
+into a temporary directory at run time instead.
+
+The HTML is synthetic markup written alongside the parsers, not recorded pages. It
+times parsing at realistic sizes but can't catch drift in the real sites' layouts,
+that needs a download against the live sites (or pages recorded from them).
+"""
+
+import datetime
+import html
+import pathlib
+
+import numpy as np
+import polars as pl
+
+import uro_cbb.barttorvik as barttorvik
+import uro_cbb.bball_ref as bball_ref
+import uro_cbb.kenpom as kenpom
+
+FIXTURE_DIR = pathlib.Path(__file__).parent.absolute() / "fixtures"
+N_TEAMS = 364
+N_TOURNAMENT_TEAMS = 64
+FIRST_TEAM_ID = 1101
+SEED = 2025
+
+
+def school_names(n_teams: int = N_TEAMS) -> list[str]:
+    return [f"School {i:03d}" for i in range(n_teams)]
+
+
+def school_slug(i: int) -> str:
+    return f"school-{i:03d}"
+
+
+def _cell(value, rng: np.random.Generator | None = None) -> str:
+    """barttorvik cells hold the value followed by the national rank."""
+    rank = f'<br/><span class="lowrow">{rng.integers(1, N_TEAMS)}</span>' if rng else ""
+    return f"<td>{value}{rank}</td>"
+
+
+BARTTORVIK_HEADERS = [
+    "Rk", "Team", "Conf", "G", "Rec", "AdjOE", "AdjDE", "Barthag", "EFG%", "EFGD%",
+    "TOR", "TORD", "ORB", "DRB", "FTR", "FTRD", "2P%", "2P%D", "3P%", "3P%D", "3PR",
+    "3PRD", "2PR", "Adj T.", "WAB",
+]  # fmt: skip
+
+
+def barttorvik_html(rng: np.random.Generator) -> str:
+    assert [h.lower() for h in BARTTORVIK_HEADERS] == list(barttorvik.TABLE_SCHEMA)
+    header = "".join(f"<th>{h}</th>" for h in BARTTORVIK_HEADERS)
+    rows = []
+    for rank, school in enumerate(school_names(), start=1):
+        if rank % 25 == 1:
+            rows.append(f'<tr class="extraheader">{header}</tr>')
+        wins = int(rng.integers(5, 30))
+        stats = "".join(_cell(f"{x:.1f}", rng) for x in rng.normal(50, 15, size=19))
+        rows.append(
+            f"<tr><td>{rank}</td>"
+            f'<td><a href="team.php?team={html.escape(school)}">{school}</a></td>'
+            f'<td><a href="conf.php">C{rank % 32}</a></td>'
+            f"<td>{wins + 5}</td><td>{wins}-5</td>{stats}"
+            f"{_cell(f'{rng.normal(2, 4):.1f}', rng)}</tr>"
+        )
+    return (
+        "<html><body><table><thead><tr><th colspan=25>T-Rank</th></tr>"
+        f"<tr>{header}</tr></thead><tbody>{''.join(rows)}</tbody></table>"
+        "</body></html>"
+    )
+
+
+# Every rating but the first spans its value and rank cells
+KENPOM_HEADERS = [
+    "Rk", "Team", "Conf", "W-L", "AdjEM", "AdjO", "AdjD", "AdjT", "Luck", "AdjEM",
+    "OppO", "OppD", "AdjEM",
+]  # fmt: skip
+
+
+def kenpom_html(rng: np.random.Generator) -> str:
+    header = "".join(
+        f'<th colspan="{1 if i < 5 else 2}">{h}</th>'
+        for i, h in enumerate(KENPOM_HEADERS)
+    )
+    rows = []
+    for rank, school in enumerate(school_names(), start=1):
+        if rank % 40 == 1:
+            rows.append(f'<tr class="thead">{header}</tr>')
+        values = rng.normal(100, 10, size=len(kenpom.kenpom_row_schema) - 1)
+        cells = [f"<td>{values[0]:+.2f}</td>"] + [
+            f'<td>{value:.1f}</td><td class="td-left"><span class="seed-gray">'
+            f"{rng.integers(1, N_TEAMS)}</span></td>"
+            for value in values[1:]
+        ]
+        rows.append(
+            f'<tr><td class="hard_left">{rank}</td>'
+            f'<td class="next_left"><a href="team.php?team={school}">{school}</a></td>'
+            f'<td class="conf"><a href="conf.php">C{rank % 32}</a></td>'
+            f"<td class=\"wl\">20-10</td>{''.join(cells)}</tr>"
+        )
+    return (
+        '<html><body><table id="ratings-table"><thead><tr class="thead1">'
+        '<th colspan="13"></th><th colspan="6">Strength of Schedule</th>'
+        f'<th colspan="2">NCSOS</th></tr><tr class="thead2">{header}</tr></thead>'
+        f"<tbody>{''.join(rows)}</tbody></table></body></html>"
+    )
+
+
+# data-stat names of the sports-reference school stats table, in STATS_SCHEMA order
+STATS_DATA_STATS = [
+    "school_name", "g", "wins", "losses", "win_loss_pct", "srs", "sos", "DUMMY",
+    "wins_conf", "losses_conf", "DUMMY", "wins_home", "losses_home", "DUMMY",
+    "wins_visitor", "losses_visitor", "DUMMY", "pts", "opp_pts", "DUMMY", "mp", "fg",
+    "fga", "fg_pct", "fg3", "fg3a", "fg3_pct", "ft", "fta", "ft_pct", "orb", "trb",
+    "ast", "stl", "blk", "tov", "pf",
+]  # fmt: skip
+ADVANCED_STATS_DATA_STATS = STATS_DATA_STATS[:20] + [
+    "pace", "off_rtg", "fta_per_fga_pct", "fg3a_per_fga_pct", "ts_pct", "trb_pct",
+    "ast_pct", "stl_pct", "blk_pct", "efg_pct", "tov_pct", "orb_pct", "ft_rate",
+]  # fmt: skip
+
+
+def bball_ref_stats_html(
+    rng: np.random.Generator,
+    schema: dict = bball_ref.STATS_SCHEMA,
+    data_stats: list[str] = STATS_DATA_STATS,
+) -> str:
+    assert len(schema) == len(data_stats)
+    labels = ["" if label.startswith("_BLANK") else label for label in schema]
+    header = '<th data-stat="ranker">Rk</th>' + "".join(
+        f'<th data-stat="{stat}">{label}</th>'
+        for stat, label in zip(data_stats, labels)
+    )
+    rows = []
+    for rank, school in enumerate(school_names(), start=1):
+        if rank % 20 == 1:
+            rows.append(f'<tr class="thead">{header}</tr>')
+        cells = []
+        for stat, (column, dtype) in zip(data_stats[1:], list(schema.items())[1:]):
+            if column.startswith("_BLANK"):
+                value = ""
+            elif dtype == pl.Float32:
+                value = f"{rng.random():.3f}"
+            else:
+                value = str(rng.integers(0, 2000))
+            cells.append(f'<td class="right" data-stat="{stat}">{value}</td>')
+        rows.append(
+            f'<tr><th scope="row" class="right" data-stat="ranker">{rank}</th>'
+            f'<td class="left" data-stat="school_name">'
+            f'<a href="/cbb/schools/{school_slug(rank - 1)}/men/2025.html">{school}</a>'
+            "</td>"
+            f"{''.join(cells)}</tr>"
+        )
+    return (
+        '<html><body><table id="basic_school_stats"><thead>'
+        '<tr class="over_header"><th colspan="8"></th><th colspan="3">Conf.</th>'
+        '<th colspan="3">Home</th><th colspan="3">Away</th><th colspan="3">Points'
+        f'</th><th colspan="{len(schema) - 20}">Totals</th></tr>'
+        f"<tr>{header}</tr></thead><tbody>{''.join(rows)}</tbody></table>"
+        "</body></html>"
+    )
+
+
+def _box_score_table(
+    rng: np.random.Generator, table_id: str, columns: dict, n_players: int = 12
+) -> str:
+    stat_columns = list(columns)[1:]
+    stat_header = "".join(f"<th>{column}</th>" for column in stat_columns)
+
+    def cells(is_totals: bool = False) -> str:
+        values = []
+        for column in stat_columns:
+            if column == "MP":
+                values.append("200" if is_totals else str(rng.integers(0, 40)))
+            elif columns[column] == pl.Float32:
+                values.append(f"{rng.random():.3f}")
+            else:
+                values.append(str(rng.integers(0, 80 if is_totals else 15)))
+        return "".join(f"<td>{value}</td>" for value in values)
+
+    rows = []
+    for i in range(n_players):
+        if i == 5:
+            rows.append(f'<tr class="thead"><th>Reserves</th>{stat_header}</tr>')
+        rows.append(
+            f'<tr><th><a href="/players/p{i}.html">Player {i}</a></th>{cells()}</tr>'
+        )
+    return (
+        f'<div id="all_{table_id}"><table id="{table_id}"><thead>'
+        f'<tr class="over_header"><th colspan="{len(columns)}">Box</th></tr>'
+        f"<tr><th>Starters</th>{stat_header}</tr></thead><tbody>{''.join(rows)}</tbody>"
+        f"<tfoot><tr><th>School Totals</th>{cells(True)}</tr></tfoot></table></div>"
+    )
+
+
+def box_score_html(rng: np.random.Generator) -> str:
+    tables = [
+        _box_score_table(rng, f"box-{team}-game-{kind}", schema)
+        for team in ["school-001", "school-002"]
+        for kind, schema in [
+            ("basic", bball_ref.BOX_SCORE_SCHEMA),
+            ("advanced", bball_ref.ADVANCED_BOX_SCORE_SCHEMA),
+        ]
+    ]
+    return f"<html><body>{''.join(tables)}</body></html>"
+
+
+def postseason_html(rng: np.random.Generator) -> str:
+    """64 team bracket page, every game links its box score from the scores."""
+    teams = list(rng.choice(school_names(), N_TOURNAMENT_TEAMS, replace=False))
+    rounds = []
+    while len(teams) > 1:
+        games, winners = [], []
+        for team1, team2 in zip(teams[::2], teams[1::2]):
+            score1, score2 = rng.choice(np.arange(50, 100), 2, replace=False)
+            box_score = f"/cbb/boxscores/2024-03-21-{len(games)}-{len(teams)}.html"
+            games.append(
+                f'<div><div class="winner"><span>1</span><a href="/cbb/schools/x">'
+                f'{team1}</a><a href="{box_score}">{score1}</a></div>'
+                f'<div><span>16</span><a href="/cbb/schools/x">{team2}</a>'
+                f'<a href="{box_score}">{score2}</a></div></div>'
+            )
+            winners.append(team1 if score1 > score2 else team2)
+        rounds.append(f'<div class="round">{"".join(games)}</div>')
+        teams = winners
+    return f'<html><body><div id="brackets">{"".join(rounds)}</div></body></html>'
+
+
+def schedule_html(slug: str, year: int, n_rounds: int = 15) -> str:
+    """Round robin style schedule of a school_slug team, consistent across teams: on
+    day 2k team i hosts team i + k and visits team i - k."""
+    i = int(slug.rsplit("-", 1)[1])
+    rows = []
+    start = datetime.date(year - 1, 11, 4)
+    for k in range(1, n_rounds + 1):
+        date = (start + datetime.timedelta(days=2 * k)).strftime("%a, %b %d, %Y")
+        for opponent, location in [((i + k) % N_TEAMS, ""), ((i - k) % N_TEAMS, "@")]:
+            home, away = (i, opponent) if location == "" else (opponent, i)
+            pair_rng = np.random.default_rng([SEED, year, home, away])
+            home_pts, away_pts = pair_rng.choice(np.arange(50, 100), 2, replace=False)
+            pts, opp_pts = (
+                (home_pts, away_pts) if location == "" else (away_pts, home_pts)
+            )
+            rows.append(
+                f'<tr><th data-stat="g">{len(rows) + 1}</th>'
+                f'<td data-stat="date_game">{date}</td>'
+                f'<td data-stat="game_type">REG</td>'
+                f'<td data-stat="game_location">{location}</td>'
+                f'<td data-stat="opp_name"><a href="/cbb/schools/{school_slug(opponent)}'
+                f'/men/{year}.html">School {opponent:03d}</a></td>'
+                f'<td data-stat="pts">{pts}</td><td data-stat="opp_pts">{opp_pts}</td>'
+                "</tr>"
+            )
+    return (
+        '<html><body><table id="schedule"><thead><tr><th data-stat="g">G</th></tr>'
+        f"</thead><tbody>{''.join(rows)}</tbody></table></body></html>"
+    )
+
+
+HTML_FIXTURES = {
+    "barttorvik.html": barttorvik_html,
+    "kenpom.html": kenpom_html,
+    "bball_ref_stats.html": bball_ref_stats_html,
+    "bball_ref_advanced_stats.html": lambda rng: bball_ref_stats_html(
+        rng, bball_ref.ADVANCED_STATS_SCHEMA, ADVANCED_STATS_DATA_STATS
+    ),
+    "postseason.html": postseason_html,
+    "box_score.html": box_score_html,
+}
+
+
+def write_html_fixtures(fixture_dir: pathlib.Path = FIXTURE_DIR):
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    for name, make_html in HTML_FIXTURES.items():
+        (fixture_dir / name).write_text(make_html(np.random.default_rng(SEED)))
+
+
+def read_html_fixture(name: str) -> str:
+    return (FIXTURE_DIR / name).read_text()
+
+
+def write_season_data(data_dir: pathlib.Path, year: int):
+    """A data/ tree with every input preprocess_data.preprocess_data(year) reads,
+    built by parsing the HTML fixtures like the download scripts do."""
+    rng = np.random.default_rng(SEED + year)
+    names = school_names()
+    team_ids = np.arange(FIRST_TEAM_ID, FIRST_TEAM_ID + N_TEAMS)
+    kaggle_dir = data_dir / "kaggle_2025/raw"
+    kaggle_dir.mkdir(parents=True, exist_ok=True)
+    pl.DataFrame({"TeamID": team_ids, "TeamName": names}).write_csv(
+        kaggle_dir / "MTeams.csv"
+    )
+    pl.DataFrame(
+        {"Team": [name.lower() for name in names], "TeamID": team_ids}
+    ).write_csv(kaggle_dir / "MTeamSpellings.csv")
+
+    tournament_teams = rng.choice(names, N_TOURNAMENT_TEAMS, replace=False)
+    scores = rng.integers(50, 100, size=(N_TOURNAMENT_TEAMS - 1, 2))
+    parquet_frames = {
+        f"bball_ref/raw/tournament_games/tournament_games_{year}.parquet": pl.DataFrame(
+            {
+                "Team1": tournament_teams[: N_TOURNAMENT_TEAMS - 1],
+                "Team2": tournament_teams[1:],
+                "Score1": scores[:, 0],
+                "Score2": scores[:, 1],
+                "Box Score Link": None,
+            },
+            schema_overrides={"Score1": pl.Int16, "Score2": pl.Int16},
+        ),
+        f"barttorvik/raw/mens/barttorvik_{year}.parquet": barttorvik.parse_barttorvik_html(
+            read_html_fixture("barttorvik.html")
+        ),
+        f"bball_ref/raw/basic_stats/basic_stats_{year}.parquet": bball_ref.parse_basketball_reference_stats_html(
+            read_html_fixture("bball_ref_stats.html")
+        ),
+        f"kenpom/raw/kenpom_{year}.parquet": kenpom.parse_kenpom_html(
+            read_html_fixture("kenpom.html")
+        ),
+    }
+    for path, df in parquet_frames.items():
+        (data_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        df.write_parquet(data_dir / path)
+
+
+def bracket_win_probs(n_teams: int = N_TOURNAMENT_TEAMS) -> np.ndarray:
+    """Consistent (p[i, j] = 1 - p[j, i]) matrix from random team strengths."""
+    strength = np.random.default_rng(SEED).normal(0, 1, n_teams)
+    return 1 / (1 + np.exp(-(strength[:, None] - strength[None, :])))
+
+
+if __name__ == "__main__":
+    write_html_fixtures()
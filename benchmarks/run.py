@@ -0,0 +1,237 @@
+"""Offline benchmark suite.
+
+Times HTML parse throughput, per-year preprocessing, submission scoring and bracket
+evaluation on the synthetic inputs of benchmarks.fixtures, records the results as JSON
+and compares them with a baseline run. The HTML fixtures are not recorded pages, so
+the parse benchmarks measure speed only, see benchmarks.fixtures:
+
+    python -m benchmarks.run --save-baseline   # on the reference commit
+    python -m benchmarks.run                   # fails if any median regresses > 25%
+"""
+
+import datetime
+import logging
+import pathlib
+import platform
+import statistics
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pydantic
+import statsmodels.api as sm
+import statsmodels.formula.api as smf
+import typer
+
+import benchmarks.fixtures as fixtures
+import kaggle_2025.preprocess_data as preprocess_data
+import kaggle_2025.submission as submission
+import uro_cbb.barttorvik as barttorvik
+import uro_cbb.bball_ref as bball_ref
+import uro_cbb.bracket as bracket
+import uro_cbb.kenpom as kenpom
+
+BENCHMARK_DIR = pathlib.Path(__file__).parent.absolute()
+RESULTS_DIR = BENCHMARK_DIR / "results"
+BASELINE_PATH = RESULTS_DIR / "baseline.json"
+BENCHMARK_YEAR = 2024
+
+
+class BenchmarkResult(pydantic.BaseModel):
+    median_seconds: float
+    min_seconds: float
+    repeats: int
+    # Rows (teams, players, pairs, ...) handled per call, for throughput
+    rows: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.median_seconds
+
+
+class BenchmarkRun(pydantic.BaseModel):
+    created_at: datetime.datetime
+    python: str
+    polars: str
+    results: dict[str, BenchmarkResult]
+
+
+def _time(function: Callable[[], int], repeats: int) -> BenchmarkResult:
+    rows = function()  # warm up caches and imports
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return BenchmarkResult(
+        median_seconds=statistics.median(timings),
+        min_seconds=min(timings),
+        repeats=repeats,
+        rows=rows,
+    )
+
+
+def _parse_benchmarks() -> dict[str, Callable[[], int]]:
+    barttorvik_html = fixtures.read_html_fixture("barttorvik.html")
+    kenpom_html = fixtures.read_html_fixture("kenpom.html")
+    stats_html = fixtures.read_html_fixture("bball_ref_stats.html")
+    box_score_html = fixtures.read_html_fixture("box_score.html")
+
+    def parse_box_score() -> int:
+        box_score = bball_ref.parse_box_score_html(box_score_html)
+        return len(box_score.basic_box_score1) + len(box_score.basic_box_score2)
+
+    return {
+        "parse_barttorvik": lambda: len(
+            barttorvik.parse_barttorvik_html(barttorvik_html)
+        ),
+        "parse_kenpom": lambda: len(kenpom.parse_kenpom_html(kenpom_html)),
+        "parse_bball_ref_stats": lambda: len(
+            bball_ref.parse_basketball_reference_stats_html(stats_html)
+        ),
+        "parse_box_score": parse_box_score,
+    }
+
+
+def _submission_benchmark() -> Callable[[], int]:
+    """Scores every pair of N_TEAMS teams with a GLM like the production models."""
+    rng = np.random.default_rng(fixtures.SEED)
+    team_df = pl.DataFrame(
+        {
+            "Season": np.full(fixtures.N_TEAMS, BENCHMARK_YEAR, dtype=np.int32),
+            "TeamID": np.arange(
+                fixtures.FIRST_TEAM_ID, fixtures.FIRST_TEAM_ID + fixtures.N_TEAMS
+            ),
+            "adjoe": rng.normal(105, 8, fixtures.N_TEAMS),
+            "adjde": rng.normal(105, 8, fixtures.N_TEAMS),
+        }
+    )
+    training_df = pd.DataFrame(
+        {
+            "adjoe": rng.normal(105, 8, 500),
+            "adjde": rng.normal(105, 8, 500),
+            "adjoe_2": rng.normal(105, 8, 500),
+            "adjde_2": rng.normal(105, 8, 500),
+        }
+    )
+    margin = (
+        training_df.adjoe
+        - training_df.adjde
+        - training_df.adjoe_2
+        + training_df.adjde_2
+    )
+    training_df["Result"] = (rng.random(500) < 1 / (1 + np.exp(-margin / 10))).astype(
+        int
+    )
+    model = smf.glm(
+        "Result ~ adjoe + adjde + adjoe_2 + adjde_2",
+        data=training_df,
+        family=sm.families.Binomial(),
+    ).fit()
+
+    def score_pairs() -> int:
+        n_pairs = 0
+        for pairs_df in submission._pair_blocks(
+            team_df["TeamID"].to_numpy(), [BENCHMARK_YEAR], block_size=20_000
+        ):
+            n_pairs += len(submission._score_pairs(model, team_df, pairs_df))
+        return n_pairs
+
+    return score_pairs
+
+
+def _bracket_benchmarks() -> dict[str, Callable[[], int]]:
+    win_probs = fixtures.bracket_win_probs()
+    teams = [bracket.Team(i, f"Team {i}") for i in range(len(win_probs))]
+
+    def win_prob(team1: bracket.Team, team2: bracket.Team) -> float:
+        return win_probs[team1._id, team2._id]
+
+    def hyper_game() -> int:
+        games = [
+            bracket.Game(teams[i], teams[i + 1], win_prob)
+            for i in range(0, len(teams), 2)
+        ]
+        while len(games) > 1:
+            games = [
+                bracket.HyperGame(games[i], games[i + 1], win_prob)
+                for i in range(0, len(games), 2)
+            ]
+        games[0].all_win_probs
+        return len(teams)
+
+    def live_bracket() -> int:
+        live = bracket.LiveBracket(list(range(len(win_probs))), win_probs)
+        for team_id in range(0, len(win_probs), 2):
+            live.record_result(0, team_id)
+        return len(win_probs)
+
+    return {"bracket_hyper_game": hyper_game, "bracket_live": live_bracket}
+
+
+def run_benchmarks(repeats: int = 5) -> BenchmarkRun:
+    benchmarks = _parse_benchmarks() | _bracket_benchmarks()
+    benchmarks["submission_scoring"] = _submission_benchmark()
+    with tempfile.TemporaryDirectory() as data_dir:
+        data_dir = pathlib.Path(data_dir)
+        fixtures.write_season_data(data_dir, BENCHMARK_YEAR)
+        benchmarks["preprocess_year"] = lambda: len(
+            preprocess_data.preprocess_data(BENCHMARK_YEAR, data_dir)
+        )
+        results = {}
+        for name, function in benchmarks.items():
+            results[name] = _time(function, repeats)
+            logging.info(
+                f"{name}: {results[name].median_seconds * 1000:.2f} ms median, "
+                f"{results[name].rows_per_second:,.0f} rows/s"
+            )
+    return BenchmarkRun(
+        created_at=datetime.datetime.now(),
+        python=platform.python_version(),
+        polars=pl.__version__,
+        results=results,
+    )
+
+
+def regressions(
+    run: BenchmarkRun, baseline: BenchmarkRun, threshold: float
+) -> dict[str, float]:
+    """Benchmarks whose median got slower than threshold times the baseline, with
+    their slowdown ratio."""
+    ratios = {
+        name: result.median_seconds / baseline.results[name].median_seconds
+        for name, result in run.results.items()
+        if name in baseline.results
+    }
+    return {name: ratio for name, ratio in ratios.items() if ratio > threshold}
+
+
+def main(
+    repeats: int = 5,
+    threshold: float = 1.25,
+    baseline_path: pathlib.Path = BASELINE_PATH,
+    save_baseline: bool = False,
+):
+    logging.basicConfig(level=logging.INFO)
+    run = run_benchmarks(repeats)
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    (RESULTS_DIR / "latest.json").write_text(run.model_dump_json(indent=2))
+    if save_baseline:
+        baseline_path.write_text(run.model_dump_json(indent=2))
+        return
+    if not baseline_path.exists():
+        logging.warning(f"No baseline at {baseline_path}, run with --save-baseline")
+        return
+    baseline = BenchmarkRun.model_validate_json(baseline_path.read_text())
+    if slower := regressions(run, baseline, threshold):
+        for name, ratio in slower.items():
+            logging.error(f"{name} is {ratio:.2f}x slower than the baseline")
+        raise typer.Exit(code=1)
+    logging.info(f"No regressions over {threshold:.2f}x the baseline")
+
+
+if __name__ == "__main__":
+    typer.run(main)
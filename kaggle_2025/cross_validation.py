@@ -0,0 +1,184 @@
+"""Leave-one-season-out cross validation of GLM formulas over preprocessed tournament data."""
+
+import concurrent.futures
+import logging
+import multiprocessing
+import multiprocessing.shared_memory as shared_memory
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import statsmodels.api as sm
+import statsmodels.formula.api as smf
+
+import kaggle_2025.preprocess_data as preprocess_data
+import uro_cbb.model_utils as model_utils
+
+SEASONS = [year for year in range(2015, 2025) if year != 2020]
+WOMENS_SEASONS = [year for year in range(2016, 2025) if year != 2020]
+
+# Set in each worker process by _attach_shared_frame
+_SHARED_MEMORY = None
+_SHARED_FRAME = None
+
+
+def build_training_frame(seasons: list[int], is_womens: bool = False) -> pl.DataFrame:
+    """Stacks the preprocessed tournament games of every season with a Season column.
+    Only seasons whose inputs changed since they were last stored are rebuilt."""
+    return pl.concat(
+        [
+            preprocess_data.load_preprocessed_data(year, is_womens).with_columns(
+                Season=pl.lit(year)
+            )
+            for year in seasons
+        ],
+        how="diagonal",
+    )
+
+
+def _team_feature_cols(df: pl.DataFrame) -> tuple[list[str], list[str]]:
+    numeric_cols = {
+        column for column, dtype in df.schema.items() if dtype.is_numeric()
+    }
+    team2_cols = [
+        column
+        for column in df.columns
+        if column.endswith("_2") and {column, column[:-2]} <= numeric_cols
+    ]
+    return [column[:-2] for column in team2_cols], team2_cols
+
+
+def _to_feature_matrix(df: pl.DataFrame) -> tuple[np.ndarray, list[str]]:
+    """Numeric columns only, as one float64 matrix with nulls as NaN."""
+    numeric_df = df.select(
+        pl.col(column).cast(pl.Float64).fill_null(np.nan)
+        for column, dtype in df.schema.items()
+        if dtype.is_numeric()
+    )
+    return numeric_df.to_numpy(order="c"), numeric_df.columns
+
+
+def _attach_shared_frame(name: str, shape: tuple[int, int], columns: list[str]):
+    global _SHARED_MEMORY, _SHARED_FRAME
+    _SHARED_MEMORY = shared_memory.SharedMemory(name=name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=_SHARED_MEMORY.buf)
+    matrix.flags.writeable = False
+    _SHARED_FRAME = pd.DataFrame(matrix, columns=columns, copy=False)
+
+
+def _fit_and_evaluate(formula: str, held_out_season: int, cap: float) -> dict:
+    season = _SHARED_FRAME["Season"]
+    train_df = _SHARED_FRAME[season != held_out_season]
+    test_df = _SHARED_FRAME[
+        (season == held_out_season) & (_SHARED_FRAME["is_mirrored"] == 0)
+    ]
+    try:
+        results = smf.glm(
+            formula,
+            data=train_df,
+            family=sm.families.Binomial(link=sm.families.links.Logit()),
+        ).fit()
+    except Exception as error:
+        # Patsy errors don't unpickle, which would break the pool for every other fit
+        raise RuntimeError(f"{type(error).__name__}: {error}") from None
+    eval_df = pl.DataFrame(
+        {
+            "Result": test_df["Result"].to_numpy(),
+            "pred": results.predict(test_df).to_numpy(),
+        }
+    ).filter(pl.col("pred").is_not_nan())
+    model_results = model_utils.evaluate_model(eval_df, cap=cap)
+    return {
+        "formula": formula,
+        "season": held_out_season,
+        "n_games": len(eval_df),
+        **model_results.model_dump(),
+    }
+
+
+def run_cross_validation(
+    training_df: pl.DataFrame,
+    formulas: list[str],
+    seasons: list[int] | None = None,
+    max_workers: int | None = None,
+    cap: float = 0.999,
+) -> pl.DataFrame:
+    """Fits every formula once per held out season across a process pool.
+
+    training_df needs Season and Result columns, e.g. from build_training_frame. It is
+    mirrored once, copied into shared memory and read by every worker without pickling.
+    Returns one row per (formula, season) that fit, failed fits are logged. Raises an
+    ExceptionGroup of the failures if none fit.
+    """
+    if seasons is None:
+        seasons = training_df["Season"].unique().sort().to_list()
+    team1_cols, team2_cols = _team_feature_cols(training_df)
+    mirrored_df = preprocess_data.mirror_matchups(
+        training_df, team1_cols, team2_cols
+    ).with_columns(
+        is_mirrored=(pl.int_range(pl.len()) >= len(training_df)).cast(pl.Int8),
+    )
+    matrix, columns = _to_feature_matrix(mirrored_df)
+
+    shm = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+    try:
+        np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+        del matrix
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            # polars' thread pool does not survive fork
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach_shared_frame,
+            initargs=(shm.name, (len(mirrored_df), len(columns)), columns),
+        ) as executor:
+            futures = {
+                executor.submit(_fit_and_evaluate, formula, season, cap): (
+                    formula,
+                    season,
+                )
+                for formula in formulas
+                for season in seasons
+            }
+            rows = []
+            errors = []
+            for future in concurrent.futures.as_completed(futures):
+                formula, season = futures[future]
+                try:
+                    rows.append(future.result())
+                except Exception as error:
+                    logging.exception(f"Failed to fit {formula!r} holding out {season}")
+                    error.add_note(f"Fitting {formula!r} holding out {season}")
+                    errors.append(error)
+    finally:
+        shm.close()
+        shm.unlink()
+    if errors and not rows:
+        raise ExceptionGroup("Every cross validation fit failed", errors)
+    return pl.DataFrame(rows).sort("formula", "season")
+
+
+def leaderboard(cv_results_df: pl.DataFrame) -> pl.DataFrame:
+    """Averages the per season results of run_cross_validation for each formula."""
+    metric_cols = list(model_utils.ModelResults.model_fields)
+    return (
+        cv_results_df.group_by("formula")
+        .agg(
+            pl.len().alias("n_seasons"),
+            *[pl.col(column).mean() for column in metric_cols],
+            pl.col("log_loss_mean").std().alias("log_loss_std"),
+        )
+        .sort("log_loss_mean")
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    training_df = build_training_frame(SEASONS)
+    cv_results_df = run_cross_validation(
+        training_df,
+        [
+            "Result ~ adjoe + adjoe_2 + adjde + adjde_2",
+            "Result ~ adjoe + adjoe_2 + adjde + adjde_2 + AdjO + AdjO_2 + AdjD + AdjD_2",
+        ],
+    )
+    print(leaderboard(cv_results_df))
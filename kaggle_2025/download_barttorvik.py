@@ -1,35 +1,54 @@
+import dataclasses
 import logging
+import os
 import pathlib
-import random
-import time
+
+import polars as pl
 
 import uro_cbb.barttorvik as barttorvik
+import uro_cbb.instrumentation as instrumentation
+import uro_cbb.page_pipeline as page_pipeline
+
+
+def write_barttorvik_data(data: pl.DataFrame, year: int, is_womens: bool = False):
+    out_dir = pathlib.Path(
+        f"./data/barttorvik/raw/{'womens' if is_womens else 'mens'}/"
+    )
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with instrumentation.span(
+        "write", dataset="barttorvik", gender="W" if is_womens else "M"
+    ):
+        data.write_parquet(out_dir / f"barttorvik_{year}.parquet")
+        data.write_csv(out_dir / f"barttorvik_{year}.csv")
 
 
 def download_barttorvik_data(year: int):
     logging.info(f"Downloading Mens Barttorvik Data for {year}")
-    data = barttorvik.download_barttorvik_data(year)
-    out_dir = pathlib.Path("./data/barttorvik/raw/mens/")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    data.write_parquet(out_dir / f"barttorvik_{year}.parquet")
-    data.write_csv(out_dir / f"barttorvik_{year}.csv")
+    write_barttorvik_data(barttorvik.download_barttorvik_data(year), year)
 
 
 def download_womens_barttorvik_data(year: int):
     logging.info(f"Downloading Womens Barttorvik Data for {year}")
-    data = barttorvik.download_womens_barttorvik_data(year)
-    out_dir = pathlib.Path("./data/barttorvik/raw/womens/")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    data.write_parquet(out_dir / f"barttorvik_{year}.parquet")
-    data.write_csv(out_dir / f"barttorvik_{year}.csv")
+    write_barttorvik_data(
+        barttorvik.download_womens_barttorvik_data(year), year, is_womens=True
+    )
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    for year in range(2025, 2024, -1):
-        if year == 2020:
+    years = [year for year in range(2025, 2024, -1) if year != 2020]
+    jobs = [
+        dataclasses.replace(
+            barttorvik.page_job(year, url), key=(year, url == barttorvik.WOMENS_URL)
+        )
+        for year in years
+        for url in (barttorvik.MENS_URL, barttorvik.WOMENS_URL)
+    ]
+    cache = page_pipeline.PageCache(pathlib.Path("./data/page_cache"))
+    for job, data in page_pipeline.fetch_and_parse(jobs, cache, os.cpu_count()):
+        year, is_womens = job.key
+        if isinstance(data, Exception):
+            logging.error(f"Failed to download Barttorvik {year} {job.url}: {data}")
             continue
-        download_barttorvik_data(year)
-        time.sleep(random.randint(2, 4))
-        download_womens_barttorvik_data(year)
-        time.sleep(random.randint(2, 4))
+        logging.info(f"Writing {'Womens' if is_womens else 'Mens'} Barttorvik {year}")
+        write_barttorvik_data(data, year, is_womens)
@@ -1,19 +1,27 @@
 import logging
+import os
 import pathlib
-import random
-import time
 
 import polars as pl
 
 import uro_cbb.bball_ref as bball_ref
+import uro_cbb.instrumentation as instrumentation
+import uro_cbb.page_pipeline as page_pipeline
+
+PAGE_CACHE = page_pipeline.PageCache(pathlib.Path("./data/page_cache"))
 
 
 def download_box_score_and_totals(row: pl.DataFrame):
     link = row.select(pl.col("Box Score Link")).item()
-    box_score = bball_ref.download_box_score(link)
+    return box_score_and_totals(row, bball_ref.download_box_score(link))
+
+
+def box_score_and_totals(row: pl.DataFrame, box_score: bball_ref.PostSeasonBoxScore):
+    link = row.select(pl.col("Box Score Link")).item()
     team_total = (
         row.select(
             pl.col("Team1").alias("Team"),
+            pl.col("Team2").alias("Opponent"),
             pl.col("Score1").alias("PTS"),
             pl.col("Score2").alias("OPP_PTS"),
             pl.col("Box Score Link").alias("link"),
@@ -21,6 +29,7 @@ def download_box_score_and_totals(row: pl.DataFrame):
         .vstack(
             row.select(
                 pl.col("Team2").alias("Team"),
+                pl.col("Team1").alias("Opponent"),
                 pl.col("Score2").alias("PTS"),
                 pl.col("Score1").alias("OPP_PTS"),
                 pl.col("Box Score Link").alias("link"),
@@ -34,10 +43,42 @@ def download_box_score_and_totals(row: pl.DataFrame):
             how="inner",
         )
     )
-    return box_score, team_total
+    # Same game from each team's side but with the other team's box score totals
+    opponent_total = team_total.select(
+        "Team", "Opponent", "PTS", "OPP_PTS", "link"
+    ).join(
+        team_total.select(
+            pl.col("Team").alias("Opponent"),
+            pl.exclude("Team", "Opponent", "PTS", "OPP_PTS", "link"),
+        ),
+        on="Opponent",
+        how="inner",
+    )
+    return box_score, team_total, opponent_total
 
 
-def download_tournament_game_and_totals(year: int, is_womens: bool = False):
+def _sum_tournament_totals(totals: list[pl.DataFrame]) -> pl.DataFrame:
+    return (
+        pl.concat(totals)
+        .select(
+            pl.exclude(
+                ["link", "Opponent", "Player", "GmSc", "FG%", "2P%", "3P%", "FT%"]
+            ),
+        )
+        .with_columns(
+            pl.lit(1).alias("G"),
+            (pl.col("PTS") > pl.col("OPP_PTS")).cast(pl.Int16).alias("W"),
+            (pl.col("PTS") < pl.col("OPP_PTS")).cast(pl.Int16).alias("L"),
+        )
+        .group_by(["Team"])
+        .agg(pl.all().sum())
+        .sort("G")
+    )
+
+
+def download_tournament_game_and_totals(
+    year: int, is_womens: bool = False, max_workers: int | None = 0
+):
     logging.info(f"Downloading tournament games for {year}")
     if is_womens:
         tournament_games_df = bball_ref.download_womens_basic_tournament_games(year)
@@ -48,46 +89,61 @@ def download_tournament_game_and_totals(year: int, is_womens: bool = False):
         out_dir = pathlib.Path("./data/bball_ref/raw/tournament_games/")
         out_dir.mkdir(parents=True, exist_ok=True)
     logging.info(f"Writing tournament games for {year}")
-    tournament_games_df.write_parquet(
-        out_dir / f"tournament_games_{year}.parquet",
-    )
-    tournament_games_df.write_csv(
-        out_dir / f"tournament_games_{year}.csv",
-    )
+    with instrumentation.span("write", dataset="tournament_games"):
+        tournament_games_df.write_parquet(
+            out_dir / f"tournament_games_{year}.parquet",
+        )
+        tournament_games_df.write_csv(
+            out_dir / f"tournament_games_{year}.csv",
+        )
 
-    box_scores = []
-    team_totals = []
-    # For each game download the box score and extract the totals
+    # For each game download the box score and extract the totals, box scores are
+    # parsed (on max_workers processes when given) while the next ones download
     logging.info(f"Downloading box scores for {year} tournament games")
-    for i in range(len(tournament_games_df)):
-        row = tournament_games_df[i]
-        box_score, team_total = download_box_score_and_totals(row)
-        box_scores.append(box_score)
+    jobs = [
+        bball_ref.box_score_page_job(link, key=i)
+        for i, link in enumerate(tournament_games_df["Box Score Link"])
+    ]
+    box_scores = {}
+    for job, box_score in page_pipeline.fetch_and_parse(
+        jobs, cache=PAGE_CACHE, max_workers=max_workers
+    ):
+        if isinstance(box_score, Exception):
+            logging.warning(f"Skipping box score {job.url}: {box_score}")
+            continue
+        box_scores[job.key] = box_score
+    team_totals = []
+    opponent_totals = []
+    for i in box_scores:
+        _, team_total, opponent_total = box_score_and_totals(
+            tournament_games_df[i], box_scores[i]
+        )
         team_totals.append(team_total)
-        time.sleep(random.randint(2, 5))
+        opponent_totals.append(opponent_total)
 
-    team_totals_df = (
-        pl.concat(team_totals)
-        .select(
-            pl.exclude(["link", "Player", "GmSc", "FG%", "2P%", "3P%", "FT%"]),
-        )
-        .with_columns(pl.lit(1).alias("G"))
-        .group_by(["Team"])
-        .agg(pl.all().sum())
-        .sort("G")
-    )
+    team_totals_df = _sum_tournament_totals(team_totals)
+    opponent_totals_df = _sum_tournament_totals(opponent_totals)
     if is_womens:
         out_dir = pathlib.Path("./data/bball_ref/raw/womens/tournament_totals/")
     else:
         out_dir = pathlib.Path("./data/bball_ref/raw/tournament_totals/")
     out_dir.mkdir(parents=True, exist_ok=True)
     logging.info(f"Writing team totals for {year}")
-    team_totals_df.write_parquet(
-        out_dir / f"tournament_team_total_stats_{year}.parquet",
-    )
-    team_totals_df.write_csv(
-        out_dir / f"tournament_team_total_stats_{year}.csv",
-    )
+    with instrumentation.span("write", dataset="tournament_team_total_stats"):
+        team_totals_df.write_parquet(
+            out_dir / f"tournament_team_total_stats_{year}.parquet",
+        )
+        team_totals_df.write_csv(
+            out_dir / f"tournament_team_total_stats_{year}.csv",
+        )
+    logging.info(f"Writing opponent totals for {year}")
+    with instrumentation.span("write", dataset="tournament_opponent_total_stats"):
+        opponent_totals_df.write_parquet(
+            out_dir / f"tournament_opponent_total_stats_{year}.parquet",
+        )
+        opponent_totals_df.write_csv(
+            out_dir / f"tournament_opponent_total_stats_{year}.csv",
+        )
     return team_totals_df
 
 
@@ -101,12 +157,13 @@ def download_advanced_stats(year: int):
     )
     out_dir = pathlib.Path("./data/bball_ref/raw/advanced_stats/")
     out_dir.mkdir(parents=True, exist_ok=True)
-    advanced_stats_df.write_parquet(
-        out_dir / f"advanced_stats_{year}.parquet",
-    )
-    advanced_stats_df.write_csv(
-        out_dir / f"advanced_stats_{year}.csv",
-    )
+    with instrumentation.span("write", dataset="advanced_stats"):
+        advanced_stats_df.write_parquet(
+            out_dir / f"advanced_stats_{year}.parquet",
+        )
+        advanced_stats_df.write_csv(
+            out_dir / f"advanced_stats_{year}.csv",
+        )
     return advanced_stats_df
 
 
@@ -116,37 +173,59 @@ def download_basic_stats(year: int):
 
     out_dir = pathlib.Path("./data/bball_ref/raw/basic_stats/")
     out_dir.mkdir(parents=True, exist_ok=True)
-    basic_stats_df.write_parquet(
-        out_dir / f"basic_stats_{year}.parquet",
-    )
-    basic_stats_df.write_csv(
-        out_dir / f"basic_stats_{year}.csv",
-    )
+    with instrumentation.span("write", dataset="basic_stats"):
+        basic_stats_df.write_parquet(
+            out_dir / f"basic_stats_{year}.parquet",
+        )
+        basic_stats_df.write_csv(
+            out_dir / f"basic_stats_{year}.csv",
+        )
     return basic_stats_df
 
 
 def download_basic_opponent_stats(year: int):
     logging.info(f"Downloading basic opponent stats for {year}")
-    basic_stats_df = bball_ref.download_basketball_reference_stats_data(year)
-    basic_stats_df = bball_ref.remove_tournament_games(
-        basic_stats_df,
+    basic_stats_df = bball_ref.download_basketball_reference_opponent_stats_data(year)
+    basic_stats_df = bball_ref.remove_post_season_games(
         pl.read_parquet(
             pathlib.Path(
-                f"./data/bball_ref/raw/tournament_games/tournament_games_{year}.parquet"
+                f"./data/bball_ref/raw/tournament_totals/tournament_opponent_total_stats_{year}.parquet"
             )
         ),
+        basic_stats_df,
     )
     out_dir = pathlib.Path("./data/bball_ref/raw/basic_opponent_stats/")
     out_dir.mkdir(parents=True, exist_ok=True)
-    basic_stats_df.write_parquet(
-        out_dir / f"basic_opponent_stats_{year}.parquet",
-    )
-    basic_stats_df.write_csv(
-        out_dir / f"basic_opponent_stats_{year}.csv",
-    )
+    with instrumentation.span("write", dataset="basic_opponent_stats"):
+        basic_stats_df.write_parquet(
+            out_dir / f"basic_opponent_stats_{year}.parquet",
+        )
+        basic_stats_df.write_csv(
+            out_dir / f"basic_opponent_stats_{year}.csv",
+        )
     return basic_stats_df
 
 
+def download_season_game_logs(
+    year: int, is_womens: bool = False, max_workers: int | None = 0
+):
+    logging.info(f"Downloading season game logs for {year}")
+    games_df, teams_df = bball_ref.download_season_game_log(
+        year, is_womens=is_womens, cache=PAGE_CACHE, max_workers=max_workers
+    )
+    if is_womens:
+        out_dir = pathlib.Path("./data/bball_ref/raw/womens/game_logs/")
+    else:
+        out_dir = pathlib.Path("./data/bball_ref/raw/game_logs/")
+    out_dir = out_dir / f"season={year}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    logging.info(f"Writing {len(games_df)} games for {year}")
+    with instrumentation.span("write", dataset="game_logs"):
+        games_df.write_parquet(out_dir / "games.parquet", compression="zstd")
+        teams_df.write_parquet(out_dir / "teams.parquet", compression="zstd")
+    return games_df, teams_df
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
 
@@ -155,9 +234,9 @@ if __name__ == "__main__":
     for year in range(2024, 2014, -1):
         if year == 2020:
             continue
-        download_tournament_game_and_totals(year, is_womens=True)
-        # Rudimentary rate limiting
-        time.sleep(random.randint(5, 10))
+        download_tournament_game_and_totals(
+            year, is_womens=True, max_workers=os.cpu_count()
+        )
 
     # Download advanced stats
     for year in range(2025, 2014, -1):
@@ -165,8 +244,6 @@ if __name__ == "__main__":
         if year == 2020 or year == 2017:
             continue
         download_advanced_stats(year)
-        # Rudimentary rate limiting
-        time.sleep(random.randint(1, 3))
 
     # Download basic stats
     module_dir = pathlib.Path(__file__).parent
@@ -185,11 +262,10 @@ if __name__ == "__main__":
         )
         out_dir = module_dir.parent / "data/bball_ref/raw/basic_stats/"
         out_dir.mkdir(parents=True, exist_ok=True)
-        future_info_removed_df.write_parquet(
-            out_dir / f"basic_stats_{year}.parquet",
-        )
-        future_info_removed_df.write_csv(
-            out_dir / f"basic_stats_{year}.csv",
-        )
-        # Rudimentary rate limiting
-        time.sleep(random.randint(5, 10))
+        with instrumentation.span("write", dataset="basic_stats"):
+            future_info_removed_df.write_parquet(
+                out_dir / f"basic_stats_{year}.parquet",
+            )
+            future_info_removed_df.write_csv(
+                out_dir / f"basic_stats_{year}.csv",
+            )
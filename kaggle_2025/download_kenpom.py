@@ -1,17 +1,23 @@
+import logging
+import os
 import pathlib
-import random
-import time
 
+import uro_cbb.instrumentation as instrumentation
 import uro_cbb.kenpom as kenpom
+import uro_cbb.page_pipeline as page_pipeline
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     module_dir = pathlib.Path(__file__).parent.absolute()
-    for year in range(2025, 2024, -1):
-        if year == 2020:
+    out_dir = module_dir.parent / "data/kenpom/raw"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [kenpom.page_job(year) for year in range(2025, 2024, -1) if year != 2020]
+    cache = page_pipeline.PageCache(module_dir.parent / "data/page_cache")
+    for job, kp_df in page_pipeline.fetch_and_parse(jobs, cache, os.cpu_count()):
+        year = job.key
+        if isinstance(kp_df, Exception):
+            logging.error(f"Failed to download KenPom {year}: {kp_df}")
             continue
-        kp_df = kenpom.download_kenpom_data(year)
-        out_dir = module_dir.parent / "data/kenpom/raw"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        kp_df.write_csv(out_dir / f"kenpom_{year}.csv")
-        kp_df.write_parquet(out_dir / f"kenpom_{year}.parquet")
-        time.sleep(random.randint(2, 5))
+        with instrumentation.span("write", dataset="kenpom"):
+            kp_df.write_csv(out_dir / f"kenpom_{year}.csv")
+            kp_df.write_parquet(out_dir / f"kenpom_{year}.parquet")
@@ -1,6 +1,8 @@
 import json
 import pathlib
 
+import uro_cbb.instrumentation as instrumentation
+
 # Module-level variable to store the mapping data
 SPELLINGS_KAGGLE_ID_MAP = None
 ID_KAGGLE_NAME_MAP = None
@@ -15,6 +17,7 @@ def _load_spellings_map():
         module_dir = pathlib.Path(__file__).parent.absolute()
         with open(module_dir / "spellings_kaggle_id_map.json", "r") as f:
             SPELLINGS_KAGGLE_ID_MAP = json.load(f)
+        instrumentation.count("name_map_loads", name_map="spellings_kaggle_id_map")
 
 
 def _load_id_map():
@@ -24,6 +27,7 @@ def _load_id_map():
         module_dir = pathlib.Path(__file__).parent.absolute()
         with open(module_dir / "id_kaggle_name_map.json", "r") as f:
             ID_KAGGLE_NAME_MAP = json.load(f)
+        instrumentation.count("name_map_loads", name_map="id_kaggle_name_map")
 
 
 def _load_womens_spellings_map():
@@ -33,6 +37,9 @@ def _load_womens_spellings_map():
         module_dir = pathlib.Path(__file__).parent.absolute()
         with open(module_dir / "womens_spellings_kaggle_id_map.json", "r") as f:
             WOMENS_SPELLINGS_KAGGLE_ID_MAP = json.load(f)
+        instrumentation.count(
+            "name_map_loads", name_map="womens_spellings_kaggle_id_map"
+        )
 
 
 def _load_womens_id_map():
@@ -42,6 +49,7 @@ def _load_womens_id_map():
         module_dir = pathlib.Path(__file__).parent.absolute()
         with open(module_dir / "womens_id_kaggle_name_map.json", "r") as f:
             WOMENS_ID_KAGGLE_NAME_MAP = json.load(f)
+        instrumentation.count("name_map_loads", name_map="womens_id_kaggle_name_map")
 
 
 def name_to_kaggle_name(team_name: str) -> str:
@@ -1,8 +1,53 @@
+import hashlib
 import logging
+import os
 import pathlib
 import re
 
 import polars as pl
+import typer
+
+import uro_cbb.instrumentation as instrumentation
+
+DATA_DIR = pathlib.Path(__file__).parent.parent.absolute() / "data"
+# Bump when preprocess_data or preprocess_womens_data change what they output, so
+# every stored season is rebuilt
+PREPROCESS_VERSION = 1
+FINGERPRINT_METADATA_KEY = "uro_cbb_input_fingerprint"
+
+# (path, size, mtime_ns) to sha256, so shared inputs like the spellings are hashed
+# once per process rather than once per season
+_FILE_DIGESTS: dict[tuple[pathlib.Path, int, int], str] = {}
+
+
+def mens_input_paths(
+    year: int, data_dir: pathlib.Path = DATA_DIR
+) -> dict[str, pathlib.Path]:
+    paths = {
+        "spellings": data_dir / "kaggle_2025/raw/MTeamSpellings.csv",
+        "teams": data_dir / "kaggle_2025/raw/MTeams.csv",
+        "tournament_games": data_dir
+        / f"bball_ref/raw/tournament_games/tournament_games_{year}.parquet",
+        "barttorvik": data_dir / f"barttorvik/raw/mens/barttorvik_{year}.parquet",
+        "basic_stats": data_dir
+        / f"bball_ref/raw/basic_stats/basic_stats_{year}.parquet",
+    }
+    # No kenpom archive for 2017
+    if year != 2017:
+        paths["kenpom"] = data_dir / f"kenpom/raw/kenpom_{year}.parquet"
+    return paths
+
+
+def womens_input_paths(
+    year: int, data_dir: pathlib.Path = DATA_DIR
+) -> dict[str, pathlib.Path]:
+    return {
+        "spellings": data_dir / "kaggle_2025/raw/WTeamSpellings.csv",
+        "teams": data_dir / "kaggle_2025/raw/WTeams.csv",
+        "tournament_games": data_dir
+        / f"bball_ref/raw/womens/tournament_games/tournament_games_{year}.parquet",
+        "barttorvik": data_dir / f"barttorvik/raw/womens/barttorvik_{year}.parquet",
+    }
 
 
 def _merge_with_kaggle_names(
@@ -13,30 +58,34 @@ def _merge_with_kaggle_names(
         pl.col("TeamID").alias("__KAGGLE_TEAM_ID"),
         pl.col("TeamName").alias("__KAGGLE_TEAM_NAME"),
     ).select(pl.exclude("Team", "TeamID", "TeamName"))
-    processed_df = (
-        df.with_columns(
-            pl.col(team_col).str.to_lowercase().alias(f"{team_col}_lower"),
-        )
-        .join(
-            kaggle_names_df,
-            left_on=f"{team_col}_lower",
-            right_on="__KAGGLE_TEAM_SPELLING_VARIATION",
-            how="inner",
-        )
-        .with_columns(
-            pl.col("__KAGGLE_TEAM_NAME").alias(team_col),
-            pl.col("__KAGGLE_TEAM_ID").alias(f"{team_col}_id"),
-        )
-        .select(
-            pl.exclude(
-                [
-                    f"{team_col}_lower",
-                    "__KAGGLE_TEAM_SPELLING_VARIATION",
-                    "__KAGGLE_TEAM_ID",
-                    "__KAGGLE_TEAM_NAME",
-                ]
+    with instrumentation.span("join", step="kaggle_names", column=team_col):
+        processed_df = (
+            df.with_columns(
+                pl.col(team_col).str.to_lowercase().alias(f"{team_col}_lower"),
+            )
+            .join(
+                kaggle_names_df,
+                left_on=f"{team_col}_lower",
+                right_on="__KAGGLE_TEAM_SPELLING_VARIATION",
+                how="inner",
+            )
+            .with_columns(
+                pl.col("__KAGGLE_TEAM_NAME").alias(team_col),
+                pl.col("__KAGGLE_TEAM_ID").alias(f"{team_col}_id"),
+            )
+            .select(
+                pl.exclude(
+                    [
+                        f"{team_col}_lower",
+                        "__KAGGLE_TEAM_SPELLING_VARIATION",
+                        "__KAGGLE_TEAM_ID",
+                        "__KAGGLE_TEAM_NAME",
+                    ]
+                )
             )
         )
+    instrumentation.count(
+        "rows_dropped", df.shape[0] - processed_df.shape[0], column=team_col
     )
     if processed_df.shape[0] != df.shape[0]:
         df_names = set(df.select(pl.col(team_col)).to_series())
@@ -50,24 +99,19 @@ def _merge_with_kaggle_names(
     return processed_df
 
 
-def preprocess_data(year: int):
+def preprocess_data(year: int, data_dir: pathlib.Path = DATA_DIR):
     logging.info(f"Preprocessing data for {year}")
-    module_dir = pathlib.Path(__file__).parent.absolute()
+    paths = mens_input_paths(year, data_dir)
     kaggle_names_df = pl.read_csv(
-        module_dir.parent / "data/kaggle_2025/raw/MTeamSpellings.csv",
+        paths["spellings"],
         schema={"Team": pl.Utf8, "TeamID": pl.Int16},
     ).join(
-        pl.read_csv(module_dir.parent / "data/kaggle_2025/raw/MTeams.csv").select(
-            pl.col("TeamID"), pl.col("TeamName")
-        ),
+        pl.read_csv(paths["teams"]).select(pl.col("TeamID"), pl.col("TeamName")),
         on="TeamID",
     )
 
     games_df = (
-        pl.read_parquet(
-            module_dir.parent
-            / f"data/bball_ref/raw/tournament_games/tournament_games_{year}.parquet"
-        )
+        pl.read_parquet(paths["tournament_games"])
         .with_columns(
             (pl.col("Score1") > pl.col("Score2")).cast(pl.Int8).alias("Result"),
         )
@@ -76,9 +120,7 @@ def preprocess_data(year: int):
     )
 
     barttorvik_df = (
-        pl.read_parquet(
-            module_dir.parent / f"data/barttorvik/raw/mens/barttorvik_{year}.parquet"
-        )
+        pl.read_parquet(paths["barttorvik"])
         .with_columns(pl.col("team").str.to_lowercase().alias("team"))
         .pipe(_merge_with_kaggle_names, kaggle_names_df, "team")
         # .select(pl.exclude("team"))
@@ -91,10 +133,7 @@ def preprocess_data(year: int):
     # )
 
     basic_stats_df = (
-        pl.read_parquet(
-            module_dir.parent
-            / f"data/bball_ref/raw/basic_stats/basic_stats_{year}.parquet"
-        )
+        pl.read_parquet(paths["basic_stats"])
         .with_columns(pl.col("School").str.to_lowercase().alias("School"))
         .pipe(_merge_with_kaggle_names, kaggle_names_df, "School")
     )
@@ -130,11 +169,9 @@ def preprocess_data(year: int):
         )
     )
     assert len(processed_df) == len(games_df), "Merge dropped rows"
-    if year != 2017:
+    if "kenpom" in paths:
         kenpom_df = (
-            pl.read_parquet(
-                module_dir.parent / f"data/kenpom/raw/kenpom_{year}.parquet"
-            )
+            pl.read_parquet(paths["kenpom"])
             .with_columns(pl.col("Team").str.to_lowercase().alias("Team"))
             .pipe(_merge_with_kaggle_names, kaggle_names_df, "Team")
         )
@@ -154,6 +191,34 @@ def preprocess_data(year: int):
     return processed_df
 
 
+def mirror_matchups(
+    df: pl.DataFrame | pl.LazyFrame,
+    team1_cols: list[str],
+    team2_cols: list[str],
+    result_col: str = "Result",
+) -> pl.DataFrame | pl.LazyFrame:
+    """Appends every matchup with team 1 and team 2 swapped and the result flipped.
+
+    The mirrored half is a column-wise rename of the original so no feature data is
+    copied before the concat. Works on a LazyFrame too, in which case the union is
+    only materialized on collect.
+    """
+    assert len(team1_cols) == len(team2_cols), "Team column lists must line up"
+    swap = dict(zip(team1_cols, team2_cols)) | dict(zip(team2_cols, team1_cols))
+    schema = df.collect_schema()
+    mirrored_df = df.select(
+        [
+            (
+                (1 - pl.col(column)).cast(schema[column]).alias(column)
+                if column == result_col
+                else pl.col(swap.get(column, column)).alias(column)
+            )
+            for column in schema.names()
+        ]
+    )
+    return pl.concat([df, mirrored_df], how="vertical_relaxed")
+
+
 def _clean_womens_team_name(team_name: str) -> str:
     # Remove seed information, checkmarks, and other non-team name content
     # Pattern looks for things like "10 seed, ✅" or "(H) 115 Northern Iowa"
@@ -163,22 +228,18 @@ def _clean_womens_team_name(team_name: str) -> str:
     return cleaned.strip()
 
 
-def preprocess_womens_data(year: int):
+def preprocess_womens_data(year: int, data_dir: pathlib.Path = DATA_DIR):
     logging.info(f"Preprocessing data for {year}")
-    module_dir = pathlib.Path(__file__).parent.absolute()
+    paths = womens_input_paths(year, data_dir)
     kaggle_names_df = pl.read_csv(
-        module_dir.parent / "data/kaggle_2025/raw/WTeamSpellings.csv",
+        paths["spellings"],
         schema={"Team": pl.Utf8, "TeamID": pl.Int16},
     ).join(
-        pl.read_csv(module_dir.parent / "data/kaggle_2025/raw/WTeams.csv").select(
-            pl.col("TeamID"), pl.col("TeamName")
-        ),
+        pl.read_csv(paths["teams"]).select(pl.col("TeamID"), pl.col("TeamName")),
         on="TeamID",
     )
     barttorvik_df = (
-        pl.read_parquet(
-            module_dir.parent / f"data/barttorvik/raw/womens/barttorvik_{year}.parquet"
-        )
+        pl.read_parquet(paths["barttorvik"])
         .with_columns(
             pl.col("team")
             .map_elements(_clean_womens_team_name, return_dtype=str)
@@ -189,10 +250,7 @@ def preprocess_womens_data(year: int):
         # .select(pl.exclude("team"))
     )
     games_df = (
-        pl.read_parquet(
-            module_dir.parent
-            / f"data/bball_ref/raw/womens/tournament_games/tournament_games_{year}.parquet"
-        )
+        pl.read_parquet(paths["tournament_games"])
         .with_columns(
             (pl.col("Score1") > pl.col("Score2")).cast(pl.Int8).alias("Result"),
         )
@@ -215,9 +273,82 @@ def preprocess_womens_data(year: int):
     return processed_df
 
 
-if __name__ == "__main__":
+def _file_digest(path: pathlib.Path) -> str:
+    stat = path.stat()
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _FILE_DIGESTS:
+        with open(path, "rb") as f:
+            _FILE_DIGESTS[key] = hashlib.file_digest(f, "sha256").hexdigest()
+    return _FILE_DIGESTS[key]
+
+
+def input_fingerprint(paths: dict[str, pathlib.Path]) -> str:
+    """Hash of PREPROCESS_VERSION and the contents of every input file."""
+    digest = hashlib.sha256(f"v{PREPROCESS_VERSION}".encode())
+    for name, path in sorted(paths.items()):
+        digest.update(f"{name}={_file_digest(path)}".encode())
+    return digest.hexdigest()
+
+
+def preprocessed_path(
+    year: int, is_womens: bool = False, data_dir: pathlib.Path = DATA_DIR
+) -> pathlib.Path:
+    gender = "womens" if is_womens else "mens"
+    return data_dir / f"kaggle_2025/processed/{gender}/preprocessed_{year}.parquet"
+
+
+def _stored_fingerprint(output_path: pathlib.Path) -> str | None:
+    """None when there is no stored season or it is truncated or corrupt."""
+    if not output_path.exists():
+        return None
+    try:
+        return pl.read_parquet_metadata(output_path).get(FINGERPRINT_METADATA_KEY)
+    except Exception as error:
+        logging.warning(f"Rebuilding unreadable {output_path}: {error}")
+        return None
+
+
+def load_preprocessed_data(
+    year: int, is_womens: bool = False, data_dir: pathlib.Path = DATA_DIR
+) -> pl.DataFrame:
+    """preprocess_data (or preprocess_womens_data) output for year, stored with the
+    fingerprint of its inputs and only rebuilt when that fingerprint changes."""
+    input_paths = (womens_input_paths if is_womens else mens_input_paths)(
+        year, data_dir
+    )
+    fingerprint = input_fingerprint(input_paths)
+    output_path = preprocessed_path(year, is_womens, data_dir)
+    gender = "W" if is_womens else "M"
+    if _stored_fingerprint(output_path) == fingerprint:
+        try:
+            processed_df = pl.read_parquet(output_path)
+        except Exception as error:
+            logging.warning(f"Rebuilding unreadable {output_path}: {error}")
+        else:
+            instrumentation.count("cache_hits", cache="preprocessed", gender=gender)
+            return processed_df
+    instrumentation.count("cache_misses", cache="preprocessed", gender=gender)
+
+    preprocess = preprocess_womens_data if is_womens else preprocess_data
+    with instrumentation.span("preprocess", year=year, gender=gender):
+        processed_df = preprocess(year, data_dir)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Written aside and renamed so a stored season always matches its fingerprint
+    tmp_path = output_path.with_suffix(f".{os.getpid()}.tmp")
+    processed_df.write_parquet(
+        tmp_path, metadata={FINGERPRINT_METADATA_KEY: fingerprint}
+    )
+    tmp_path.replace(output_path)
+    return processed_df
+
+
+def main(years: list[int], womens: bool = False):
+    """Brings the stored preprocessed seasons up to date with their inputs."""
     logging.basicConfig(level=logging.INFO)
-    # Load tournament games
-    # df = preprocess_data(2024)
-    df = preprocess_womens_data(2024)
-    print(df)
+    for year in years:
+        df = load_preprocessed_data(year, womens)
+        logging.info(f"{year}: {len(df)} games")
+
+
+if __name__ == "__main__":
+    typer.run(main)
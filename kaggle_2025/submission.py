@@ -1,53 +1,198 @@
+import logging
 import pathlib
 import pickle
+import re
+import shutil
+from typing import Iterator
 
+import numpy as np
 import polars as pl
 import typer
 
+import kaggle_2025.validate_submission as validate_submission
+import kaggle_2025.xgboost_model as xgboost_model
+import uro_cbb.calibration as calibration
+import uro_cbb.instrumentation as instrumentation
+import uro_cbb.pairwise as pairwise
+
 module_dir = pathlib.Path(__file__).parent.absolute()
 
+ID_EXPR = pl.format("{}_{}_{}", "Season", "TeamID", "TeamID_2").alias("ID")
 
-def _create_matchup_preds_df(
-    model_results,
-    team_df,
-    kaggle_teams,
+
+def _predict(model_results, matchups_df: pl.DataFrame) -> np.ndarray:
+    if isinstance(model_results, xgboost_model.XGBoostModel):
+        return model_results.predict(matchups_df)
+    return model_results.predict(matchups_df.to_pandas()).values
+
+
+def _feature_cols(model_results, team_df: pl.DataFrame) -> list[str] | None:
+    """team_df columns the model reads for either team, None if it can't tell."""
+    if isinstance(model_results, xgboost_model.XGBoostModel):
+        names = model_results.feature_cols
+    elif hasattr(model_results, "model"):
+        # statsmodels results, exog names are formula terms like np.log(adjoe_2)
+        names = model_results.model.exog_names
+    else:
+        return None
+    return [
+        column
+        for column in team_df.columns
+        if any(re.search(rf"\b{re.escape(column)}(_2)?\b", name) for name in names)
+    ]
+
+
+def _with_season(team_df: pl.DataFrame, seasons: list[int]) -> pl.DataFrame:
+    if "Season" not in team_df.columns:
+        assert len(seasons) == 1, "Data needs a Season column for several seasons"
+        team_df = team_df.with_columns(pl.lit(seasons[0]).alias("Season"))
+    return team_df.with_columns(pl.col("Season").cast(pl.Int32))
+
+
+def _pair_blocks(
+    team_ids: np.ndarray, seasons: list[int], block_size: int
+) -> Iterator[pl.DataFrame]:
+    """(Season, TeamID, TeamID_2) blocks of at most block_size rows covering every
+    season x pair with TeamID < TeamID_2, season major. Blocks can span seasons."""
+    team_ids = np.sort(team_ids)
+    rows, cols = np.triu_indices(len(team_ids), k=1)
+    seasons = np.sort(np.asarray(seasons, dtype=np.int32))
+    n_pairs = len(rows)
+    n_total = len(seasons) * n_pairs
+    for start in range(0, n_total, block_size):
+        index = np.arange(start, min(start + block_size, n_total))
+        pair = index % n_pairs
+        yield pl.DataFrame(
+            {
+                "Season": seasons[index // n_pairs],
+                "TeamID": team_ids[rows[pair]],
+                "TeamID_2": team_ids[cols[pair]],
+            }
+        )
+
+
+def _score_pairs(
+    model_results, team_df: pl.DataFrame, pairs_df: pl.DataFrame
 ) -> pl.DataFrame:
+    """Adds Pred to a pair block, team_df has Season and TeamID columns."""
     matchups_df = (
-        kaggle_teams.join(
-            kaggle_teams,
-            how="cross",
-            suffix="_2",
-        )
-        .filter(
-            pl.col("TeamID") < pl.col("TeamID_2"),
-        )
-        .join(
+        pairs_df.join(
             team_df,
-            on=["TeamID"],
+            on=["Season", "TeamID"],
             how="left",
+            maintain_order="left",
         )
         .join(
             team_df.select(pl.exclude("Team")),
-            left_on=["TeamID_2"],
-            right_on=["TeamID"],
+            left_on=["Season", "TeamID_2"],
+            right_on=["Season", "TeamID"],
             suffix="_2",
             how="left",
+            maintain_order="left",
         )
         .fill_null(pl.lit(0))
     )
-    return matchups_df.with_columns(
-        pred=model_results.predict(matchups_df.to_pandas()).values
-    ).select(
-        (
-            "2025_"
-            + pl.col("TeamID").cast(pl.Utf8)
-            + "_"
-            + pl.col("TeamID_2").cast(pl.Utf8)
-        ).alias("ID"),
-        pl.col("pred").alias("Pred"),
+    return pairs_df.with_columns(
+        pl.Series("Pred", _predict(model_results, matchups_df), dtype=pl.Float64)
+    )
+
+
+def _create_matchup_preds_df(
+    model_results,
+    team_df: pl.DataFrame,
+    kaggle_teams: pl.DataFrame,
+    seasons: list[int] = [2025],
+) -> pl.DataFrame:
+    """ID, Pred for every pair of kaggle_teams in every season as one block, main
+    scores the same pairs in bounded blocks.
+
+    team_df needs a Season column unless only one season is predicted.
+    """
+    team_df = _with_season(team_df, seasons)
+    team_ids = kaggle_teams["TeamID"].cast(team_df.schema["TeamID"]).to_numpy()
+    n_pairs = len(seasons) * len(team_ids) * (len(team_ids) - 1) // 2
+    pairs_df = next(_pair_blocks(team_ids, seasons, max(1, n_pairs)))
+    return _score_pairs(model_results, team_df, pairs_df).select(
+        ID_EXPR, pl.col("Pred")
     )
 
 
+class SubmissionWriter:
+    """Appends ID,Pred blocks to a CSV through a buffered writer.
+
+    The sample submission is kept as a sorted array of ID hashes plus a written
+    bitmap, so memory stays flat however many pairs are written. Rows of seasons the
+    sample covers are only written if their ID is in the sample, rows of other
+    (backtest) seasons are always written. Coverage is only checked for sample IDs
+    of the requested seasons.
+    """
+
+    HASH_SEED = 20250320
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        sample_ids: pl.Series,
+        seasons: list[int],
+        buffer_size: int = 1 << 20,
+    ):
+        self.path = pathlib.Path(path)
+        self.buffer_size = buffer_size
+        sample_hashes = sample_ids.hash(self.HASH_SEED).to_numpy()
+        order = np.argsort(sample_hashes)
+        self.sample_hashes = sample_hashes[order]
+        assert len(np.unique(self.sample_hashes)) == len(
+            self.sample_hashes
+        ), "Sample submission has duplicate IDs or a hash collision"
+        sample_id_seasons = sample_ids.str.split("_").list.get(0).cast(pl.Int32)
+        self.sample_seasons = sample_id_seasons.unique().to_numpy()
+        # Sample IDs, in sample_hashes order, the requested seasons must cover
+        self.requested = sample_id_seasons.is_in(seasons).to_numpy()[order]
+        self.written = np.zeros(len(self.sample_hashes), dtype=bool)
+        self.n_rows = 0
+        self.n_duplicates = 0
+
+    def __enter__(self) -> "SubmissionWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb", buffering=self.buffer_size)
+        self._file.write(b"ID,Pred\n")
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+    def write(self, block_df: pl.DataFrame):
+        """Writes a Season, TeamID, TeamID_2, Pred block."""
+        block_df = block_df.select(ID_EXPR, pl.col("Pred"), pl.col("Season"))
+        hashes = block_df["ID"].hash(self.HASH_SEED).to_numpy()
+        positions = np.searchsorted(self.sample_hashes, hashes)
+        positions[positions == len(self.sample_hashes)] = 0
+        in_sample = self.sample_hashes[positions] == hashes
+        keep = in_sample | ~np.isin(block_df["Season"].to_numpy(), self.sample_seasons)
+
+        sample_positions = positions[in_sample]
+        self.n_duplicates += int(self.written[sample_positions].sum())
+        self.n_duplicates += len(sample_positions) - len(np.unique(sample_positions))
+        self.written[sample_positions] = True
+
+        block_df = block_df.filter(keep)
+        with instrumentation.span("write", dataset="submission"):
+            block_df.select("ID", "Pred").write_csv(self._file, include_header=False)
+        instrumentation.count("rows_written", len(block_df), dataset="submission")
+        self.n_rows += len(block_df)
+
+    @property
+    def n_missing(self) -> int:
+        return int((~self.written & self.requested).sum())
+
+    def validate_coverage(self):
+        if self.n_missing or self.n_duplicates:
+            raise ValueError(
+                f"{self.path}: {self.n_missing} sample submission IDs missing, "
+                f"{self.n_duplicates} written more than once"
+            )
+
+
 def main(
     mens_model_path: pathlib.Path = module_dir.parent
     / "kaggle_2025/models/mens_barttorvik_kenpom.pkl",
@@ -59,49 +204,122 @@ def main(
     / "data/kaggle_2025/cleaned/womens/barttorvik.csv",
     out_path: pathlib.Path = module_dir.parent
     / "data/kaggle_2025/cleaned/submissions/submission_base_mens_with_kenpom.csv",
+    mens_calibrator_path: pathlib.Path | None = None,
+    womens_calibrator_path: pathlib.Path | None = None,
+    seasons: list[int] = [2025],
+    block_size: int = 500_000,
+    validate: bool = False,
     # overrides: list[tuple[str, float]] = [],
 ):
-    mens_model_results = pickle.load(open(mens_model_path, "rb"))
-    womens_model_results = pickle.load(open(womens_model_path, "rb"))
-    mens_team_df = pl.read_csv(mens_data_path)
-    womens_team_df = pl.read_csv(womens_data_path)
-
-    mens_kaggle_teams = pl.read_csv(
-        module_dir.parent / "data/kaggle_2025/raw/MTeams.csv"
-    ).select(pl.col("TeamID"))
-    womens_kaggle_teams = pl.read_csv(
-        module_dir.parent / "data/kaggle_2025/raw/WTeams.csv"
-    ).select(pl.col("TeamID"))
-
-    mens_matchups_df = _create_matchup_preds_df(
-        mens_model_results,
-        mens_team_df,
-        mens_kaggle_teams,
-    )
-    womens_matchups_df = _create_matchup_preds_df(
-        womens_model_results,
-        womens_team_df,
-        womens_kaggle_teams,
-    )
-    submission_df = (
-        pl.concat([mens_matchups_df, womens_matchups_df])
-        .join(
-            pl.read_csv(
-                module_dir.parent / "data/kaggle_2025/raw/SampleSubmissionStage2.csv"
+    """Writes the submission CSV plus, next to it, one .pwm matrix per season and
+    gender and a {out_path.stem}/gender=*/season=*/ parquet partition per block.
+
+    The stage 2 sample submission only filters the seasons it covers, backtest
+    seasons keep every pair. The data files need a Season column for several seasons.
+    Sample coverage is checked as blocks are written. validate also re-reads the whole
+    CSV with validate_submission, which needs it all in memory.
+    """
+    sample_ids = pl.read_csv(
+        module_dir.parent / "data/kaggle_2025/raw/SampleSubmissionStage2.csv",
+        columns=["ID"],
+    )["ID"]
+    partition_dir = out_path.parent / out_path.stem
+    team_dfs = []
+    feature_cols = set()
+    with SubmissionWriter(out_path, sample_ids, seasons) as writer:
+        for gender, model_path, data_path, teams_path, calibrator_path in [
+            ("M", mens_model_path, mens_data_path, "MTeams.csv", mens_calibrator_path),
+            (
+                "W",
+                womens_model_path,
+                womens_data_path,
+                "WTeams.csv",
+                womens_calibrator_path,
             ),
-            on="ID",
-            how="inner",
-            suffix="_2",
-        )
-        .select(
-            pl.col("ID"),
-            pl.col("Pred"),
+        ]:
+            model_results = pickle.load(open(model_path, "rb"))
+            team_df = _with_season(pl.read_csv(data_path), seasons)
+            team_dfs.append(team_df)
+            gender_features = _feature_cols(model_results, team_df)
+            if feature_cols is not None and gender_features is not None:
+                feature_cols |= set(gender_features)
+            else:
+                feature_cols = None
+            team_ids = (
+                pl.read_csv(module_dir.parent / "data/kaggle_2025/raw" / teams_path)[
+                    "TeamID"
+                ]
+                .cast(team_df.schema["TeamID"])
+                .to_numpy()
+            )
+            calibrator = (
+                calibration.Calibrator.load(calibrator_path)
+                if calibrator_path is not None
+                else None
+            )
+            pairwise_matrices = {}
+            for season in seasons:
+                pairwise_matrices[season] = pairwise.PairwiseMatrix.create(
+                    out_path.with_name(f"{out_path.stem}.{season}_{gender}.pwm"),
+                    season,
+                    gender,
+                    team_ids,
+                )
+                np.fill_diagonal(pairwise_matrices[season].matrix, 0.5)
+                # Part files of a previous run, e.g. with a smaller block_size, would
+                # otherwise be read back as duplicate pairs
+                shutil.rmtree(
+                    partition_dir / f"gender={gender}" / f"season={season}",
+                    ignore_errors=True,
+                )
+
+            for block, pairs_df in enumerate(
+                _pair_blocks(team_ids, seasons, block_size)
+            ):
+                with instrumentation.span("score", gender=gender):
+                    block_df = _score_pairs(model_results, team_df, pairs_df)
+                    if calibrator is not None:
+                        block_df = calibrator.transform_df(block_df)
+                writer.write(block_df)
+
+                for (season,), season_df in block_df.group_by("Season"):
+                    season_matrix = pairwise_matrices[season]
+                    rows = season_matrix.positions(season_df["TeamID"].to_numpy())
+                    cols = season_matrix.positions(season_df["TeamID_2"].to_numpy())
+                    preds = season_df["Pred"].to_numpy()
+                    season_matrix.matrix[rows, cols] = preds
+                    season_matrix.matrix[cols, rows] = 1 - preds
+
+                    season_partition = (
+                        partition_dir / f"gender={gender}" / f"season={season}"
+                    )
+                    season_partition.mkdir(parents=True, exist_ok=True)
+                    with instrumentation.span("write", dataset="submission_parquet"):
+                        season_df.select(ID_EXPR, pl.col("Pred")).write_parquet(
+                            season_partition / f"part-{block:05d}.parquet"
+                        )
+                logging.info(f"Wrote {gender} block {block}: {len(block_df)} pairs")
+
+            for season_matrix in pairwise_matrices.values():
+                season_matrix.matrix.flush()
+    logging.info(f"Wrote {writer.n_rows} rows to {out_path}")
+    if validate:
+        validate_submission.log_report(
+            validate_submission.validate_submission(
+                out_path,
+                module_dir.parent / "data/kaggle_2025/raw/SampleSubmissionStage2.csv",
+                team_dfs,
+                seasons,
+                None if feature_cols is None else sorted(feature_cols),
+            ),
+            out_path,
         )
-    )
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    submission_df.write_csv(out_path)
+    # Backtest only runs have no sample IDs to cover
+    if writer.requested.any():
+        writer.validate_coverage()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     typer.run(main)
     # main()
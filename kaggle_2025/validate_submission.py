@@ -0,0 +1,202 @@
+"""Checks a submission CSV against the sample submission and the team feature data.
+
+IDs are decoded into int64 pair keys (season, team1, team2) so coverage, duplicates
+and missing pairs are sorted array set operations instead of string joins.
+"""
+
+import logging
+import pathlib
+
+import numpy as np
+import polars as pl
+import pydantic
+import typer
+
+module_dir = pathlib.Path(__file__).parent.absolute()
+
+N_EXAMPLES = 5
+
+
+class ValidationReport(pydantic.BaseModel):
+    n_rows: int
+    n_expected: int
+    n_missing: int
+    n_duplicates: int
+    n_unexpected: int
+    n_bad_order: int
+    n_nan: int
+    n_out_of_range: int
+    # Pairs where a team had no (or null) features and was scored on zeros
+    n_null_filled: int
+    missing_examples: list[str]
+    duplicate_examples: list[str]
+    null_filled_examples: list[str]
+
+    @property
+    def ok(self) -> bool:
+        """Null filled pairs are a warning, everything else fails the submission."""
+        return not (
+            self.n_missing
+            or self.n_duplicates
+            or self.n_unexpected
+            or self.n_bad_order
+            or self.n_nan
+            or self.n_out_of_range
+        )
+
+
+def decode_ids(ids: pl.Series) -> np.ndarray:
+    """(n, 3) int64 array of Season, TeamID_1, TeamID_2 from {season}_{id1}_{id2}."""
+    return (
+        ids.str.split_exact("_", 2)
+        .struct.unnest()
+        .select(pl.all().cast(pl.Int64))
+        .to_numpy()
+    )
+
+
+def pair_keys(decoded: np.ndarray) -> np.ndarray:
+    """One sortable int64 per pair, team ids are 4 digits."""
+    return decoded[:, 0] * 100_000_000 + decoded[:, 1] * 10_000 + decoded[:, 2]
+
+
+def _key_to_id(key: int) -> str:
+    return f"{key // 100_000_000}_{key // 10_000 % 10_000}_{key % 10_000}"
+
+
+def _examples(keys: np.ndarray) -> list[str]:
+    return [_key_to_id(key) for key in keys[:N_EXAMPLES]]
+
+
+def _feature_subset(team_df: pl.DataFrame, feature_cols: list[str] | None) -> list[str]:
+    if feature_cols is None:
+        return [
+            column
+            for column, dtype in team_df.schema.items()
+            if dtype.is_numeric() and column not in ("Season", "TeamID")
+        ]
+    return [column for column in feature_cols if column in team_df.columns]
+
+
+def null_filled_keys(
+    keys: np.ndarray,
+    team_dfs: list[pl.DataFrame],
+    feature_cols: list[str] | None = None,
+) -> np.ndarray:
+    """Keys of pairs where either team has no row in any of team_dfs without nulls in
+    feature_cols, by default every numeric column. team_dfs have TeamID and (unless
+    keys are of a single season) Season. Other columns, e.g. names, aren't scored."""
+    seasons = keys // 100_000_000
+    complete = np.unique(
+        np.concatenate(
+            [
+                (
+                    team_df
+                    if "Season" in team_df.columns
+                    else team_df.with_columns(pl.lit(int(seasons[0])).alias("Season"))
+                )
+                .drop_nulls(subset=_feature_subset(team_df, feature_cols))
+                .select(pl.col("Season").cast(pl.Int64) * 10_000 + pl.col("TeamID"))
+                .to_series()
+                .to_numpy()
+                for team_df in team_dfs
+            ]
+        )
+    )
+    team1_keys = seasons * 10_000 + keys // 10_000 % 10_000
+    team2_keys = seasons * 10_000 + keys % 10_000
+    has_features = np.isin(team1_keys, complete) & np.isin(team2_keys, complete)
+    return keys[~has_features]
+
+
+def validate_submission(
+    submission_path: pathlib.Path,
+    sample_submission_path: pathlib.Path = module_dir.parent
+    / "data/kaggle_2025/raw/SampleSubmissionStage2.csv",
+    team_dfs: list[pl.DataFrame] = [],
+    seasons: list[int] | None = None,
+    feature_cols: list[str] | None = None,
+) -> ValidationReport:
+    """Sample submission IDs of seasons (by default those the submission has) are
+    checked for coverage, other (backtest) seasons are still checked for duplicates,
+    ordering and Pred values."""
+    submission_df = pl.read_csv(
+        submission_path, schema={"ID": pl.Utf8, "Pred": pl.Float64}
+    )
+    decoded = decode_ids(submission_df["ID"])
+    keys = pair_keys(decoded)
+    sorted_keys = np.sort(keys)
+    duplicates = np.unique(sorted_keys[1:][sorted_keys[1:] == sorted_keys[:-1]])
+    unique_keys = np.unique(sorted_keys)
+
+    sample_keys = np.unique(
+        pair_keys(decode_ids(pl.read_csv(sample_submission_path)["ID"]))
+    )
+    sample_seasons = np.unique(sample_keys // 100_000_000)
+    if seasons is None:
+        seasons = np.unique(unique_keys // 100_000_000)
+    sample_keys = sample_keys[np.isin(sample_keys // 100_000_000, seasons)]
+    in_sample_seasons = np.isin(unique_keys // 100_000_000, sample_seasons)
+    missing = np.setdiff1d(sample_keys, unique_keys, assume_unique=True)
+    unexpected = np.setdiff1d(
+        unique_keys[in_sample_seasons], sample_keys, assume_unique=True
+    )
+
+    preds = submission_df["Pred"].to_numpy()
+    nan = np.isnan(preds)
+    null_filled = (
+        null_filled_keys(unique_keys, team_dfs, feature_cols)
+        if team_dfs
+        else np.empty(0, np.int64)
+    )
+
+    return ValidationReport(
+        n_rows=len(submission_df),
+        n_expected=len(sample_keys),
+        n_missing=len(missing),
+        n_duplicates=len(duplicates),
+        n_unexpected=len(unexpected),
+        n_bad_order=int((decoded[:, 1] >= decoded[:, 2]).sum()),
+        n_nan=int(nan.sum()),
+        n_out_of_range=int(((preds[~nan] < 0) | (preds[~nan] > 1)).sum()),
+        n_null_filled=len(null_filled),
+        missing_examples=_examples(missing),
+        duplicate_examples=_examples(duplicates),
+        null_filled_examples=_examples(null_filled),
+    )
+
+
+def log_report(report: ValidationReport, submission_path: pathlib.Path):
+    logging.info(f"{submission_path}: {report.model_dump_json()}")
+    if report.n_null_filled:
+        logging.warning(
+            f"{report.n_null_filled} pairs were scored with null filled features, "
+            f"e.g. {report.null_filled_examples}"
+        )
+    if not report.ok:
+        logging.error(f"{submission_path} failed validation")
+
+
+def main(
+    submission_path: pathlib.Path,
+    sample_submission_path: pathlib.Path = module_dir.parent
+    / "data/kaggle_2025/raw/SampleSubmissionStage2.csv",
+    data_paths: list[pathlib.Path] = [],
+    seasons: list[int] | None = None,
+    feature_cols: list[str] | None = None,
+):
+    report = validate_submission(
+        submission_path,
+        sample_submission_path,
+        [pl.read_csv(data_path) for data_path in data_paths],
+        seasons,
+        feature_cols,
+    )
+    log_report(report, submission_path)
+    if not report.ok:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    typer.run(main)
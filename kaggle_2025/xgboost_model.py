@@ -0,0 +1,181 @@
+"""Gradient boosted alternative to the statsmodels GLMs, trained on preprocess_data frames."""
+
+import dataclasses
+import logging
+import pickle
+import time
+
+import numpy as np
+import polars as pl
+import statsmodels.api as sm
+import statsmodels.formula.api as smf
+import xgboost as xgb
+
+import kaggle_2025.cross_validation as cross_validation
+import kaggle_2025.preprocess_data as preprocess_data
+import uro_cbb.model_utils as model_utils
+
+DEFAULT_PARAMS = {
+    "objective": "binary:logistic",
+    "eval_metric": "logloss",
+    "tree_method": "hist",
+    "nthread": -1,
+    "max_depth": 3,
+    "eta": 0.05,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "min_child_weight": 5,
+}
+
+
+@dataclasses.dataclass
+class XGBoostModel:
+    booster: xgb.Booster
+    feature_cols: list[str]
+
+    def predict(self, df: pl.DataFrame) -> np.ndarray:
+        """Win probability of team 1 for every row of a polars frame."""
+        return self.booster.inplace_predict(
+            df.select(self.feature_cols),
+            iteration_range=(0, self.booster.best_iteration + 1),
+        )
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+
+def train_xgboost(
+    training_df: pl.DataFrame,
+    team1_cols: list[str],
+    team2_cols: list[str],
+    valid_seasons: list[int],
+    params: dict | None = None,
+    num_boost_round: int = 2000,
+    early_stopping_rounds: int = 50,
+) -> XGBoostModel:
+    """Trains on every season but valid_seasons and early stops on valid_seasons.
+
+    training_df needs Season and Result columns, e.g. from
+    cross_validation.build_training_frame. Both splits are mirrored so the model sees
+    each game from both sides.
+    """
+    feature_cols = team1_cols + team2_cols
+    mirrored_df = preprocess_data.mirror_matchups(
+        training_df.lazy().select(feature_cols + ["Season", "Result"]),
+        team1_cols,
+        team2_cols,
+    )
+    is_valid = pl.col("Season").is_in(valid_seasons)
+    train_df = mirrored_df.filter(~is_valid).collect()
+    valid_df = mirrored_df.filter(is_valid).collect()
+
+    train_matrix = xgb.QuantileDMatrix(
+        train_df.select(feature_cols), label=train_df["Result"].to_numpy()
+    )
+    valid_matrix = xgb.DMatrix(
+        valid_df.select(feature_cols), label=valid_df["Result"].to_numpy()
+    )
+    booster = xgb.train(
+        DEFAULT_PARAMS | (params or {}),
+        train_matrix,
+        num_boost_round=num_boost_round,
+        evals=[(train_matrix, "train"), (valid_matrix, "valid")],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False,
+    )
+    logging.info(
+        f"Stopped at iteration {booster.best_iteration} "
+        f"with valid logloss {booster.best_score:.4f}"
+    )
+    return XGBoostModel(booster, feature_cols)
+
+
+def benchmark_against_glm(
+    training_df: pl.DataFrame,
+    formula: str,
+    team1_cols: list[str],
+    team2_cols: list[str],
+    test_season: int,
+    cap: float = 0.999,
+) -> pl.DataFrame:
+    """Holds out test_season and compares accuracy and fit/predict wall time.
+
+    The xgboost model early stops on the season before test_season, or the latest
+    training season when test_season is the earliest. Predict time is measured over
+    every pairing of the teams that appear in training_df, which is roughly the size
+    of a submission. Games the GLM can't score (null features) are left out of both
+    models' metrics, as in cross_validation.
+    """
+    train_df = training_df.filter(pl.col("Season") != test_season)
+    test_df = training_df.filter(pl.col("Season") == test_season)
+    valid_season = train_df.filter(pl.col("Season") < test_season)["Season"].max()
+    if valid_season is None:
+        valid_season = train_df["Season"].max()
+    pairs_df = (
+        training_df.select(team1_cols)
+        .unique()
+        .join(
+            training_df.select(team2_cols).unique(),
+            how="cross",
+        )
+    )
+
+    start = time.perf_counter()
+    glm_results = smf.glm(
+        formula,
+        data=preprocess_data.mirror_matchups(
+            train_df, team1_cols, team2_cols
+        ).to_pandas(),
+        family=sm.families.Binomial(link=sm.families.links.Logit()),
+    ).fit()
+    glm_fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    glm_results.predict(pairs_df.to_pandas())
+    glm_predict_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    xgb_model = train_xgboost(train_df, team1_cols, team2_cols, [valid_season])
+    xgb_fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    xgb_model.predict(pairs_df)
+    xgb_predict_seconds = time.perf_counter() - start
+
+    glm_preds = glm_results.predict(test_df.to_pandas()).to_numpy()
+    scored = ~np.isnan(glm_preds)
+    rows = []
+    for name, preds, fit_seconds, predict_seconds in [
+        ("glm", glm_preds, glm_fit_seconds, glm_predict_seconds),
+        ("xgboost", xgb_model.predict(test_df), xgb_fit_seconds, xgb_predict_seconds),
+    ]:
+        eval_df = pl.DataFrame(
+            {"Result": test_df["Result"].to_numpy()[scored], "pred": preds[scored]}
+        )
+        model_results = model_utils.evaluate_model(eval_df, cap=cap)
+        rows.append(
+            {
+                "model": name,
+                "n_games": len(eval_df),
+                **model_results.model_dump(),
+                "fit_seconds": fit_seconds,
+                "predict_seconds": predict_seconds,
+                "n_predict_pairs": len(pairs_df),
+            }
+        )
+    return pl.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    training_df = cross_validation.build_training_frame(cross_validation.SEASONS)
+    team1_cols = ["adjoe", "adjde", "AdjO", "AdjD"]
+    team2_cols = ["adjoe_2", "adjde_2", "AdjO_2", "AdjD_2"]
+    print(
+        benchmark_against_glm(
+            training_df,
+            "Result ~ adjoe + adjoe_2 + adjde + adjde_2 + AdjO + AdjO_2 + AdjD + AdjD_2",
+            team1_cols,
+            team2_cols,
+            test_season=2024,
+        )
+    )
@@ -3,9 +3,13 @@ import datetime
 import bs4
 import polars as pl
 import pydantic
-import requests
 
 import uro_cbb.constants as constants
+import uro_cbb.instrumentation as instrumentation
+import uro_cbb.page_pipeline as page_pipeline
+
+MENS_URL = "https://barttorvik.com/trank.php"
+WOMENS_URL = "https://barttorvik.com/ncaaw/trank.php"
 
 TABLE_SCHEMA = {
     "rk": pl.Int16,
@@ -75,36 +79,53 @@ def _parse_barttorvik_table_row(row: bs4.Tag) -> dict:
     return [_parse_barttorvik_table_cell(td_tag) for td_tag in row.find_all("td")]
 
 
-def _download_barttorvik_data(
+def page_job(
     year: int,
-    barttorvik_url: str = "https://barttorvik.com/trank.php",
-) -> pl.DataFrame:
+    barttorvik_url: str = MENS_URL,
+) -> page_pipeline.PageJob:
     request = GetRequest(
         year=year,
         end=constants.TOURNAMENT_START_DATE_MAP[year] - datetime.timedelta(days=1),
     )
-    response = requests.get(
+    return page_pipeline.PageJob(
         barttorvik_url,
-        params=request.model_dump(),
+        "barttorvik",
+        parse_barttorvik_html,
+        params=request.model_dump(mode="json"),
         headers=constants.HEADERS,
+        key=year,
+    )
+
+
+def _download_barttorvik_data(
+    year: int,
+    barttorvik_url: str = MENS_URL,
+) -> pl.DataFrame:
+    return parse_barttorvik_html(
+        page_pipeline.fetch_page(page_job(year, barttorvik_url))
     )
-    response.raise_for_status()
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
 
-    # Get table header for columns and create schema dict
-    table_header = soup.find("thead").find_all("tr")[-1]
-    col_names = [th_tag.text for th_tag in table_header.find_all("th")]
-    schema = {col.lower(): TABLE_SCHEMA[col.lower()] for col in col_names}
 
-    # Get table body and rows
-    table_body = soup.find("tbody")
-    rows = table_body.select("tr:not(.extraheader)")
+def parse_barttorvik_html(html: str | bytes) -> pl.DataFrame:
+    with instrumentation.span("parse", source="barttorvik"):
+        soup = bs4.BeautifulSoup(html, "html.parser")
 
-    # Parse rows and create dataframe
-    data = []
-    for row in rows:
-        data.append(_parse_barttorvik_table_row(row))
-    return pl.DataFrame(data, schema=schema)
+        # Get table header for columns and create schema dict
+        table_header = soup.find("thead").find_all("tr")[-1]
+        col_names = [th_tag.text for th_tag in table_header.find_all("th")]
+        schema = {col.lower(): TABLE_SCHEMA[col.lower()] for col in col_names}
+
+        # Get table body and rows
+        table_body = soup.find("tbody")
+        rows = table_body.select("tr:not(.extraheader)")
+
+        # Parse rows and create dataframe
+        data = []
+        for row in rows:
+            data.append(_parse_barttorvik_table_row(row))
+    instrumentation.count("rows_parsed", len(data), source="barttorvik")
+    with instrumentation.span("cast", source="barttorvik"):
+        return pl.DataFrame(data, schema=schema)
 
 
 def download_barttorvik_data(year: int) -> pl.DataFrame:
@@ -112,9 +133,7 @@ def download_barttorvik_data(year: int) -> pl.DataFrame:
 
 
 def download_womens_barttorvik_data(year: int) -> pl.DataFrame:
-    return _download_barttorvik_data(
-        year, barttorvik_url="https://barttorvik.com/ncaaw/trank.php"
-    )
+    return _download_barttorvik_data(year, barttorvik_url=WOMENS_URL)
 
 
 if __name__ == "__main__":
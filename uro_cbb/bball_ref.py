@@ -1,6 +1,8 @@
 import dataclasses
+import datetime
 import itertools
 import logging
+import re
 import traceback
 
 import bs4
@@ -10,6 +12,10 @@ import pydantic
 import requests
 
 import uro_cbb.constants as constants
+import uro_cbb.http_client as http_client
+import uro_cbb.instrumentation as instrumentation
+import uro_cbb.page_pipeline as page_pipeline
+import uro_cbb.table_layout as table_layout
 
 ADVANCED_STATS_ARCHIVE_URLS = {
     2025: "https://www.sports-reference.com/cbb/seasons/men/2025-advanced-school-stats.html",
@@ -129,6 +135,56 @@ STATS_SCHEMA = {
     "PF": pl.Int16,
 }
 
+# data-stat attributes of the school stats table columns, pages without them (or
+# with new ones) fall back to matching the header text
+STATS_DATA_STAT_COLUMNS = {
+    "school_name": "School",
+    "g": "G",
+    "wins": "W",
+    "losses": "L",
+    "win_loss_pct": "W-L%",
+    "srs": "SRS",
+    "sos": "SOS",
+    "wins_conf": "ConfW",
+    "losses_conf": "ConfL",
+    "wins_home": "HomeW",
+    "losses_home": "HomeL",
+    "wins_visitor": "AwayW",
+    "losses_visitor": "AwayL",
+    "pts": "Tm.",
+    "opp_pts": "Opp.",
+    "mp": "MP",
+    "fg": "FG",
+    "fga": "FGA",
+    "fg_pct": "FG%",
+    "fg3": "3P",
+    "fg3a": "3PA",
+    "fg3_pct": "3P%",
+    "ft": "FT",
+    "fta": "FTA",
+    "ft_pct": "FT%",
+    "orb": "ORB",
+    "trb": "TRB",
+    "ast": "AST",
+    "stl": "STL",
+    "blk": "BLK",
+    "tov": "TOV",
+    "pf": "PF",
+    "pace": "Pace",
+    "off_rtg": "ORtg",
+    "fta_per_fga_pct": "FTr",
+    "fg3a_per_fga_pct": "3PAr",
+    "ts_pct": "TS%",
+    "trb_pct": "TRB%",
+    "ast_pct": "AST%",
+    "stl_pct": "STL%",
+    "blk_pct": "BLK%",
+    "efg_pct": "eFG%",
+    "tov_pct": "TOV%",
+    "orb_pct": "ORB%",
+    "ft_rate": "FT/FGA",
+}
+
 BOX_SCORE_SCHEMA = {
     "Player": pl.Utf8,
     "MP": pl.Int16,
@@ -176,6 +232,29 @@ ADVANCED_BOX_SCORE_SCHEMA = {
     "BPM": pl.Float32,
 }
 
+# Games are stored once with Team1Index < Team2Index, indices point into the season's
+# team table written alongside the games. Venue is from team 1's point of view.
+GAME_LOG_SCHEMA = {
+    "Date": pl.Date,
+    "Team1Index": pl.Int16,
+    "Team2Index": pl.Int16,
+    "Score1": pl.Int16,
+    "Score2": pl.Int16,
+    "Venue": pl.Int8,
+    "GameType": pl.Categorical,
+}
+
+GAME_LOG_TEAMS_SCHEMA = {
+    "TeamIndex": pl.Int16,
+    "Slug": pl.Utf8,
+    "School": pl.Utf8,
+}
+
+HOME, NEUTRAL, AWAY = 1, 0, -1
+GAME_LOCATION_VENUE = {"": HOME, "N": NEUTRAL, "@": AWAY}
+
+SCHOOL_LINK_PATTERN = re.compile(r"/cbb/schools/([^/]+)/(?:men|women)/\d{4}\.html")
+
 
 ## Dataclasses ##
 @pydantic.dataclasses.dataclass(slots=True)
@@ -196,151 +275,82 @@ class PostSeasonBoxScore:
 
 
 ## Library Functions ##
-def create_session_with_retries(
-    retries=0,
-    backoff_factor=0.1,
-    status_forcelist=(500, 502, 503, 504),
-    allowed_methods=None,
-):
-    """
-    Creates a requests session with retry capability.
-
-    Args:
-        retries: Maximum number of retries
-        backoff_factor: Backoff factor for exponential backoff
-        status_forcelist: HTTP status codes that should trigger a retry
-        allowed_methods: HTTP methods that should be retried
-
-    Returns:
-        requests.Session with retry configuration
-    """
-    if allowed_methods is None:
-        allowed_methods = ["HEAD", "GET", "OPTIONS"]
-
-    retry = requests.adapters.Retry(
-        total=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-        allowed_methods=allowed_methods,
-    )
-
-    adapter = requests.adapters.HTTPAdapter(max_retries=retry)
-    session = requests.Session()
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-
-    return session
-
-
-def try_to_get_contents(data: bs4.element.Tag) -> str | None:
-    if hasattr(data, "contents"):
-        if data.contents:
-            return data.contents[0]
-    return None
-
-
-def _parse_basketball_reference_stats_row(
-    potential_row: bs4.element.Tag,
-) -> list[str]:
-    table_data_elements = potential_row.find_all("td", attrs={"class": "right"})
-    # For year <= 2016 table attributes changed a bit
-    if not table_data_elements:
-        # skip first because rank is now a td element not th
-        table_data_elements = potential_row.find_all("td", attrs={"align": "right"})[1:]
-    if not table_data_elements:
-        return []
-    return [try_to_get_contents(table_data) for table_data in table_data_elements]
-
-
-def _parse_basketball_reference_school(potential_row: bs4.element.Tag) -> str | None:
-    return try_to_get_contents(potential_row.find("a"))
+def _fetch(url: str, source: str, **kwargs) -> requests.Response:
+    return http_client.get_client().get(url, source, **kwargs)
 
 
 def download_archive_basketball_reference_advanced_stats_data(
     year: int,
-) -> pd.DataFrame:
-    with create_session_with_retries() as session:
-        response = session.get(ADVANCED_STATS_ARCHIVE_URLS[year])
-        response.raise_for_status()
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-
-    # Goes to the <tbody> section of the code
-    table = soup.find("tbody")
-    # List of all the <tr> within the <tbody>
-    table_rows = table.find_all("tr")
-
-    data_rows = []
-    for potential_row in table_rows:
-        if parsed_ref_school := _parse_basketball_reference_school(potential_row):
-            data_rows.append(
-                [parsed_ref_school]
-                + _parse_basketball_reference_stats_row(potential_row)
-            )
-    columns = list(ADVANCED_STATS_SCHEMA.keys())
-    if year <= 2019:
-        BLANK_COLUMNS = ("_BLANK1", "_BLANK2", "_BLANK3", "_BLANK4")
-        if year <= 2016:
-            BLANK_COLUMNS += ("_BLANK5",)
-
-        columns = [column for column in columns if column not in BLANK_COLUMNS]
-    untyped_df = pd.DataFrame(data_rows, columns=columns)
-    return pl.from_pandas(
-        untyped_df[[column for column in untyped_df.columns if "_BLANK" not in column]],
-        schema_overrides=ADVANCED_STATS_SCHEMA,
+) -> pl.DataFrame:
+    response = _fetch(ADVANCED_STATS_ARCHIVE_URLS[year], "bball_ref_advanced_stats")
+    return parse_basketball_reference_advanced_stats_html(response.text)
+
+
+def parse_basketball_reference_advanced_stats_html(html: str | bytes) -> pl.DataFrame:
+    return _parse_basketball_reference_stats_table(
+        html, ADVANCED_STATS_SCHEMA, "bball_ref_advanced_stats"
     )
 
 
 def _download_basketball_reference_stats_data(
     stats_url: str,
     year: int,
-) -> pd.DataFrame:
-    with create_session_with_retries() as session:
-        response = session.get(stats_url, headers=constants.HEADERS)
-        response.raise_for_status()
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-
-    # Goes to the <tbody> section of the code
-    table = soup.find("tbody")
-    # List of all the <tr> within the <tbody>
-    table_rows = table.find_all("tr")
-
-    data_rows = []
-    for potential_row in table_rows:
-        if parsed_ref_school := _parse_basketball_reference_school(potential_row):
-            data_rows.append(
-                [parsed_ref_school]
-                + _parse_basketball_reference_stats_row(potential_row)
-            )
-    columns = list(STATS_SCHEMA.keys())
-    untyped_df = pd.DataFrame(data_rows, columns=columns)
-    return pl.DataFrame(
-        untyped_df[[column for column in untyped_df.columns if "_BLANK" not in column]],
-        schema_overrides=STATS_SCHEMA,
+) -> pl.DataFrame:
+    response = _fetch(stats_url, "bball_ref_stats", headers=constants.HEADERS)
+    return parse_basketball_reference_stats_html(response.text)
+
+
+def parse_basketball_reference_stats_html(html: str | bytes) -> pl.DataFrame:
+    return _parse_basketball_reference_stats_table(
+        html, STATS_SCHEMA, "bball_ref_stats"
     )
 
 
-def download_basketball_reference_stats_data(year: int) -> pd.DataFrame:
+def _parse_basketball_reference_stats_table(
+    html: str | bytes, schema: dict[str, pl.DataType], source: str
+) -> pl.DataFrame:
+    """Columns are found from the table header, so the blank spacer columns archived
+    pages lack (before 2020, and the last one before 2017) don't shift the stats."""
+    columns = [column for column in schema if "_BLANK" not in column]
+    with instrumentation.span("parse", source=source):
+        soup = bs4.BeautifulSoup(html, "html.parser")
+        table = soup.find("tbody").find_parent("table")
+        layout = table_layout.table_layout(
+            table.find("thead").find_all("tr"),
+            columns,
+            STATS_DATA_STAT_COLUMNS,
+            source,
+        )
+        data_rows = layout.parse_rows(table.find("tbody").find_all("tr"))
+    instrumentation.count("rows_parsed", len(data_rows), source=source)
+    with instrumentation.span("cast", source=source):
+        return pl.DataFrame(
+            data_rows, schema=dict.fromkeys(columns, pl.Utf8), orient="row"
+        ).cast({column: schema[column] for column in columns})
+
+
+def download_basketball_reference_stats_data(year: int) -> pl.DataFrame:
     stats_url = (
         f"https://www.sports-reference.com/cbb/seasons/men/{year}-school-stats.html"
     )
     return _download_basketball_reference_stats_data(stats_url, year)
 
 
-def download_womens_basketball_reference_stats_data(year: int) -> pd.DataFrame:
+def download_womens_basketball_reference_stats_data(year: int) -> pl.DataFrame:
     stats_url = (
         f"https://www.sports-reference.com/cbb/seasons/women/{year}-school-stats.html"
     )
     return _download_basketball_reference_stats_data(stats_url, year)
 
 
-def download_basketball_reference_opponent_stats_data(year: int) -> pd.DataFrame:
+def download_basketball_reference_opponent_stats_data(year: int) -> pl.DataFrame:
     stats_url = (
         f"https://www.sports-reference.com/cbb/seasons/men/{year}-opponent-stats.html"
     )
     return _download_basketball_reference_stats_data(stats_url, year)
 
 
-def download_womens_basketball_reference_opponent_stats_data(year: int) -> pd.DataFrame:
+def download_womens_basketball_reference_opponent_stats_data(year: int) -> pl.DataFrame:
     stats_url = (
         f"https://www.sports-reference.com/cbb/seasons/women/{year}-opponent-stats.html"
     )
@@ -365,6 +375,7 @@ def _try_to_parse_round(round: bs4.element.Tag) -> list[PostseasonGame]:
             )
             games.append(game)
         except Exception:
+            instrumentation.count("parse_failures", source="bball_ref_postseason")
             logging.warning(f"Failed to parse postseasongame {child}")
             logging.warning(traceback.format_exc())
             continue
@@ -385,41 +396,47 @@ def download_womens_basic_tournament_games(year: int) -> pd.DataFrame:
 
 def _download_basic_tournament_games(year: int, url: str) -> pd.DataFrame:
     """Downloads the postseason bracket results for a given year from postseason/{year}"""
-    with create_session_with_retries() as session:
-        response = session.get(url)
-        response.raise_for_status()
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-    rounds = soup.find_all("div", attrs={"class": "round"})
-
-    rounds_parsed = [
-        _try_to_parse_round(round) for round in rounds
-    ]  # Gives us a list of data [[team1, score1], [team2, score2]]
-    games_data = [
-        (
-            game.team1_name,
-            game.team2_name,
-            game.score1,
-            game.score2,
-            game.box_score_link,
-        )
-        for game in itertools.chain.from_iterable(rounds_parsed)
-    ]  # combines all matchups
+    response = _fetch(url, "bball_ref_postseason")
+    return parse_tournament_games_html(response.content)
+
+
+def parse_tournament_games_html(html: str | bytes) -> pl.DataFrame:
+    with instrumentation.span("parse", source="bball_ref_postseason"):
+        soup = bs4.BeautifulSoup(html, "html.parser")
+        rounds = soup.find_all("div", attrs={"class": "round"})
+
+        rounds_parsed = [
+            _try_to_parse_round(round) for round in rounds
+        ]  # Gives us a list of data [[team1, score1], [team2, score2]]
+        games_data = [
+            (
+                game.team1_name,
+                game.team2_name,
+                game.score1,
+                game.score2,
+                game.box_score_link,
+            )
+            for game in itertools.chain.from_iterable(rounds_parsed)
+        ]  # combines all matchups
+    instrumentation.count("rows_parsed", len(games_data), source="bball_ref_postseason")
 
     if len(games_data) < 63:
         logging.warning(f"Expected 63 games, got {len(games_data)} games")
-    untyped_df = pd.DataFrame(
-        games_data, columns=["Team1", "Team2", "Score1", "Score2", "Box Score Link"]
-    )
-    return pl.DataFrame(
-        untyped_df,
-        schema={
-            "Team1": pl.Utf8,
-            "Team2": pl.Utf8,
-            "Score1": pl.Int16,
-            "Score2": pl.Int16,
-            "Box Score Link": pl.Utf8,
-        },
-    )
+    with instrumentation.span("cast", source="bball_ref_postseason"):
+        untyped_df = pd.DataFrame(
+            games_data,
+            columns=["Team1", "Team2", "Score1", "Score2", "Box Score Link"],
+        )
+        return pl.DataFrame(
+            untyped_df,
+            schema={
+                "Team1": pl.Utf8,
+                "Team2": pl.Utf8,
+                "Score1": pl.Int16,
+                "Score2": pl.Int16,
+                "Box Score Link": pl.Utf8,
+            },
+        )
 
 
 def _try_to_parse_box_score(
@@ -436,56 +453,77 @@ def _try_to_parse_box_score(
         rows = table.find_all("tr")
         data = []
         for row in rows:
-            row_data = [try_to_get_contents(data) for data in row.find_all("td")]
+            row_data = [table_layout.cell_value(data) for data in row.find_all("td")]
             if row_data:
                 player_name = row.find("a").contents[0]
                 data.append([player_name] + row_data)
         data.append(
             [
-                try_to_get_contents(data)
-                for data in box_score_element.find("tfoot").find("tr")
+                table_layout.cell_value(data)
+                for data in table_layout.row_cells(
+                    box_score_element.find("tfoot").find("tr")
+                )
             ]
         )
         return pd.DataFrame(data, columns=table_header)
     except Exception:
+        instrumentation.count("parse_failures", source="bball_ref_box_score")
         logging.warning(f"Failed to parse basic box score {box_score_element}")
         logging.warning(traceback.format_exc())
         return None
 
 
-def download_box_score(box_score_link: str) -> PostSeasonBoxScore:
-    with create_session_with_retries() as session:
-        response = session.get(box_score_link, headers=constants.HEADERS)
-        response.raise_for_status()
-    soup = bs4.BeautifulSoup(response.text, "html.parser")
-    boxscore_elements = soup.select('[id*="all_box"]')
-    assert len(boxscore_elements) == 4, (
-        f"Expected 4 box scores (basic and advanced for each team), got {len(boxscore_elements)}"
+def box_score_page_job(box_score_link: str, key=None) -> page_pipeline.PageJob:
+    return page_pipeline.PageJob(
+        box_score_link,
+        "bball_ref_box_score",
+        parse_box_score_html,
+        headers=constants.HEADERS,
+        key=key,
     )
-    basic_df1, basic_df2 = (
-        _try_to_parse_box_score(boxscore_elements[0]).rename(
-            {"Starters": "Player"}, axis=1
-        ),
-        _try_to_parse_box_score(boxscore_elements[2]).rename(
-            {"Starters": "Player"}, axis=1
-        ),
+
+
+def download_box_score(box_score_link: str) -> PostSeasonBoxScore:
+    return parse_box_score_html(
+        page_pipeline.fetch_page(box_score_page_job(box_score_link))
     )
-    advanced_df1, advanced_df2 = (
-        _try_to_parse_box_score(boxscore_elements[1]).rename(
-            {"Starters": "Player"}, axis=1
-        ),
-        _try_to_parse_box_score(boxscore_elements[3]).rename(
-            {"Starters": "Player"}, axis=1
-        ),
+
+
+def parse_box_score_html(html: str | bytes) -> PostSeasonBoxScore:
+    with instrumentation.span("parse", source="bball_ref_box_score"):
+        soup = bs4.BeautifulSoup(html, "html.parser")
+        boxscore_elements = soup.select('[id*="all_box"]')
+        assert len(boxscore_elements) == 4, (
+            f"Expected 4 box scores (basic and advanced for each team), got {len(boxscore_elements)}"
+        )
+        basic_df1, basic_df2 = (
+            _try_to_parse_box_score(boxscore_elements[0]).rename(
+                {"Starters": "Player"}, axis=1
+            ),
+            _try_to_parse_box_score(boxscore_elements[2]).rename(
+                {"Starters": "Player"}, axis=1
+            ),
+        )
+        advanced_df1, advanced_df2 = (
+            _try_to_parse_box_score(boxscore_elements[1]).rename(
+                {"Starters": "Player"}, axis=1
+            ),
+            _try_to_parse_box_score(boxscore_elements[3]).rename(
+                {"Starters": "Player"}, axis=1
+            ),
+        )
+    instrumentation.count(
+        "rows_parsed", len(basic_df1) + len(basic_df2), source="bball_ref_box_score"
     )
     basic_schema = {column: BOX_SCORE_SCHEMA[column] for column in basic_df1.columns}
     advanced_schema = {
         column: ADVANCED_BOX_SCORE_SCHEMA[column] for column in advanced_df1.columns
     }
-    basic_box_score1 = pl.DataFrame(basic_df1, schema=basic_schema)
-    basic_box_score2 = pl.DataFrame(basic_df2, schema=basic_schema)
-    advanced_box_score1 = pl.DataFrame(advanced_df1, schema=advanced_schema)
-    advanced_box_score2 = pl.DataFrame(advanced_df2, schema=advanced_schema)
+    with instrumentation.span("cast", source="bball_ref_box_score"):
+        basic_box_score1 = pl.DataFrame(basic_df1, schema=basic_schema)
+        basic_box_score2 = pl.DataFrame(basic_df2, schema=basic_schema)
+        advanced_box_score1 = pl.DataFrame(advanced_df1, schema=advanced_schema)
+        advanced_box_score2 = pl.DataFrame(advanced_df2, schema=advanced_schema)
     return PostSeasonBoxScore(
         basic_box_score1,
         basic_box_score2,
@@ -500,80 +538,233 @@ def extract_totals_from_box_score(box_score_df: pl.DataFrame) -> pl.DataFrame:
     return basic1_total.vstack(basic2_total)
 
 
-def remove_post_season_games(
-    tournament_df: pl.DataFrame, stats_df: pl.DataFrame
-) -> pl.DataFrame:
-    # stacking on any converted names and since we inner join later it will still only include up to one matching row
-    tournament_df = tournament_df.with_columns(
-        pl.col("Team")
-        .map_elements(
-            lambda team: GAME_TEAM_NAME_MAPPING.get(team, team), return_dtype=str
-        )
-        .alias("School")
-    ).filter(~pl.col("School").is_null())
+def _parse_school_slug(link_element: bs4.element.Tag | None) -> str | None:
+    if link_element is None or "href" not in link_element.attrs:
+        return None
+    if match := SCHOOL_LINK_PATTERN.search(link_element.attrs["href"]):
+        return match.group(1)
+    return None
+
+
+def download_season_schools(year: int, is_womens: bool = False) -> pl.DataFrame:
+    """All D-I schools of a season as a team table, indexed by position."""
+    gender = "women" if is_womens else "men"
+    stats_url = (
+        f"https://www.sports-reference.com/cbb/seasons/{gender}/{year}-school-stats.html"
+    )
+    response = _fetch(stats_url, "bball_ref_schools", headers=constants.HEADERS)
+    with instrumentation.span("parse", source="bball_ref_schools"):
+        soup = bs4.BeautifulSoup(response.text, "html.parser")
+        schools = {}
+        for potential_row in soup.find("tbody").find_all("tr"):
+            link_element = potential_row.find("a")
+            if slug := _parse_school_slug(link_element):
+                schools.setdefault(slug, table_layout.cell_value(link_element))
+    instrumentation.count("rows_parsed", len(schools), source="bball_ref_schools")
+    return pl.DataFrame(
+        {
+            "TeamIndex": range(len(schools)),
+            "Slug": list(schools.keys()),
+            "School": list(schools.values()),
+        },
+        schema=GAME_LOG_TEAMS_SCHEMA,
+    )
+
+
+def _parse_schedule_row(row: bs4.element.Tag) -> tuple | None:
+    """(date, opponent slug, venue, points, opponent points, game type) or None when
+    the row is a header, an unplayed game or an opponent outside D-I."""
+    cells = {
+        cell.attrs["data-stat"]: cell
+        for cell in row.find_all(["td", "th"])
+        if "data-stat" in cell.attrs
+    }
+    if "opp_name" not in cells or not cells["pts"].text:
+        return None
+    opponent_slug = _parse_school_slug(cells["opp_name"].find("a"))
+    if opponent_slug is None:
+        return None
     return (
-        stats_df.join(tournament_df, on="School", how="inner")
-        .with_columns(
-            (pl.col("G") - pl.col("G_right")).alias("G"),
-            (pl.col("W") - pl.col("G_right") + 1).alias("W"),
-            (pl.col("L") - 1).alias("L"),
-            (pl.col("Tm.") - pl.col("PTS")).alias("PTS"),
-            (pl.col("Opp.") - pl.col("OPP_PTS")).alias("OPP_PTS"),
-            (pl.col("MP") - pl.col("MP_right") / 5).alias("MP"),
-            (pl.col("FG") - pl.col("FG_right")).alias("FG"),
-            (pl.col("FGA") - pl.col("FGA_right")).alias("FGA"),
-            (pl.col("3P") - pl.col("3P_right")).alias("3P"),
-            (pl.col("3PA") - pl.col("3PA_right")).alias("3PA"),
-            (pl.col("FT") - pl.col("FT_right")).alias("FT"),
-            (pl.col("FTA") - pl.col("FTA_right")).alias("FTA"),
-            (pl.col("ORB") - pl.col("ORB_right")).alias("ORB"),
-            (pl.col("TRB") - pl.col("TRB_right")).alias("TRB"),
-            (pl.col("AST") - pl.col("AST_right")).alias("AST"),
-            (pl.col("STL") - pl.col("STL_right")).alias("STL"),
-            (pl.col("BLK") - pl.col("BLK_right")).alias("BLK"),
-            (pl.col("TOV") - pl.col("TOV_right")).alias("TOV"),
-            (pl.col("PF") - pl.col("PF_right")).alias("PF"),
+        datetime.datetime.strptime(cells["date_game"].text, "%a, %b %d, %Y").date(),
+        opponent_slug,
+        GAME_LOCATION_VENUE[cells["game_location"].text.strip()],
+        int(cells["pts"].text),
+        int(cells["opp_pts"].text),
+        cells["game_type"].text if "game_type" in cells else "REG",
+    )
+
+
+def schedule_page_job(
+    slug: str, year: int, is_womens: bool = False
+) -> page_pipeline.PageJob:
+    gender = "women" if is_womens else "men"
+    return page_pipeline.PageJob(
+        f"https://www.sports-reference.com/cbb/schools/{slug}/{gender}/{year}-schedule.html",
+        "bball_ref_schedule",
+        parse_schedule_html,
+        headers=constants.HEADERS,
+        key=slug,
+    )
+
+
+def download_team_schedule(
+    slug: str, year: int, is_womens: bool = False
+) -> list[tuple]:
+    job = schedule_page_job(slug, year, is_womens)
+    return parse_schedule_html(page_pipeline.fetch_page(job))
+
+
+def parse_schedule_html(html: str | bytes) -> list[tuple]:
+    with instrumentation.span("parse", source="bball_ref_schedule"):
+        soup = bs4.BeautifulSoup(html, "html.parser")
+        games = []
+        table_body = soup.find("table", attrs={"id": "schedule"}).find("tbody")
+        for row in table_body.select("tr:not(.thead)"):
+            try:
+                if game := _parse_schedule_row(row):
+                    games.append(game)
+            except Exception:
+                instrumentation.count("parse_failures", source="bball_ref_schedule")
+                logging.warning(f"Failed to parse schedule row {row}")
+                logging.warning(traceback.format_exc())
+    instrumentation.count("rows_parsed", len(games), source="bball_ref_schedule")
+    return games
+
+
+def download_season_game_log(
+    year: int,
+    is_womens: bool = False,
+    cache: page_pipeline.PageCache | None = None,
+    max_workers: int | None = 0,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Every game between two D-I schools in a season, from each school's schedule page.
+
+    Returns the game table (GAME_LOG_SCHEMA) and the team table its indices refer to.
+    Each game shows up on both schedules and is kept once, so a schedule that fails
+    to download only loses games against non D-I opponents. Schedule pages are
+    fetched (paced by the shared http_client) while earlier ones are parsed, on
+    max_workers processes when given (see page_pipeline about the process pool).
+    """
+    teams_df = download_season_schools(year, is_womens)
+    slug_to_index = dict(zip(teams_df["Slug"], teams_df["TeamIndex"]))
+    jobs = [schedule_page_job(slug, year, is_womens) for slug in slug_to_index]
+    schedules = {}
+    for job, schedule in page_pipeline.fetch_and_parse(
+        jobs, cache=cache, max_workers=max_workers
+    ):
+        if isinstance(schedule, Exception):
+            logging.warning(f"Skipping {job.key} {year} schedule: {schedule}")
+            continue
+        schedules[job.key] = schedule
+    logging.info(f"Parsed {len(schedules)} of {len(jobs)} {year} schedules")
+    games = {}
+    for slug, team_index in slug_to_index.items():
+        schedule = schedules.get(slug, [])
+        for date, opponent_slug, venue, pts, opp_pts, game_type in schedule:
+            if opponent_slug not in slug_to_index:
+                continue
+            opponent_index = slug_to_index[opponent_slug]
+            if team_index < opponent_index:
+                game = (date, team_index, opponent_index, pts, opp_pts, venue)
+            else:
+                game = (date, opponent_index, team_index, opp_pts, pts, -venue)
+            games.setdefault(game[:3], game + (game_type,))
+    with instrumentation.span("cast", source="bball_ref_schedule"):
+        games_df = pl.DataFrame(
+            list(games.values()), schema=GAME_LOG_SCHEMA, orient="row"
+        ).sort("Date", "Team1Index")
+    return games_df, teams_df
+
+
+# Tournament total columns that are named differently in the season stats tables
+POSTSEASON_TOTALS_RENAMES = {"PTS": "Tm.", "OPP_PTS": "Opp."}
+# Season stats that can't be adjusted from box score totals and would leak
+POSTSEASON_DROPPED_STATS = ("SRS", "SOS")
+
+
+def _postseason_adjusted_stats_exprs(
+    stats_schema: dict[str, pl.DataType],
+    totals_columns: list[str],
+    stats_dtypes: dict[str, pl.DataType],
+) -> tuple[list[pl.Expr], list[pl.Expr]]:
+    """Expressions subtracting every counting stat found in both tables, then
+    recomputing every rate stat from its adjusted components. Adjusted counting stats
+    keep their stats_dtypes dtype, so seasons still concatenate."""
+    counting_exprs = []
+    for column, dtype in stats_schema.items():
+        if not dtype.is_integer() or column not in totals_columns:
+            continue
+        totals = pl.col(f"{column}_right").fill_null(0)
+        adjusted = pl.col(column) - totals
+        if column == "MP":
+            # box score minutes are summed over all five players on the floor
+            adjusted = (pl.col(column) - totals / 5).round()
+        counting_exprs.append(
+            adjusted.cast(stats_dtypes.get(column, dtype)).alias(column)
         )
-        .with_columns(
-            (pl.col("W") / (pl.col("W") + pl.col("L"))).alias("W-L%"),
-            (pl.col("FG") / pl.col("FGA")).alias("FG%"),
-            (pl.col("3P") / pl.col("3PA")).alias("3P%"),
-            (pl.col("FT") / pl.col("FTA")).alias("FT%"),
+
+    rate_exprs = [(pl.col("W") / (pl.col("W") + pl.col("L"))).alias("W-L%")]
+    for column, dtype in stats_schema.items():
+        made = column.removesuffix("%")
+        if dtype.is_float() and column.endswith("%") and f"{made}A" in stats_schema:
+            rate_exprs.append((pl.col(made) / pl.col(f"{made}A")).alias(column))
+    return counting_exprs, rate_exprs
+
+
+def remove_post_season_games(
+    tournament_df: pl.DataFrame | pl.LazyFrame,
+    stats_df: pl.DataFrame | pl.LazyFrame,
+    stats_schema: dict[str, pl.DataType] = STATS_SCHEMA,
+) -> pl.DataFrame | pl.LazyFrame:
+    """Subtracts tournament box score totals from season stats.
+
+    Works for team stats with team totals and for opponent stats with opponent totals.
+    When both frames have a Season column every season is handled in one query, and
+    LazyFrames stay lazy. Teams without tournament games are left unchanged.
+    """
+    tournament_df = tournament_df.lazy()
+    tournament_columns = tournament_df.collect_schema().names()
+    if "W" not in tournament_columns:
+        # Older totals only have games played, every team but the champion loses once
+        tournament_df = tournament_df.with_columns(
+            (pl.col("G") - 1).alias("W"), pl.lit(1).alias("L")
+        )
+    tournament_df = tournament_df.rename(
+        POSTSEASON_TOTALS_RENAMES, strict=False
+    ).with_columns(
+        pl.col("Team").replace(GAME_TEAM_NAME_MAPPING).alias("School"),
+    )
+    stats_dtypes = stats_df.collect_schema()
+    stats_columns = stats_dtypes.names()
+    join_columns = ["School"]
+    if "Season" in tournament_columns and "Season" in stats_columns:
+        join_columns.append("Season")
+
+    counting_exprs, rate_exprs = _postseason_adjusted_stats_exprs(
+        stats_schema, tournament_df.collect_schema().names(), dict(stats_dtypes)
+    )
+    stats_renames = {v: k for k, v in POSTSEASON_TOTALS_RENAMES.items()}
+    adjusted_df = (
+        stats_df.lazy()
+        .join(
+            tournament_df.select(pl.exclude("Team")).filter(
+                pl.col("School").is_not_null()
+            ),
+            on=join_columns,
+            how="left",
+            suffix="_right",
         )
-        .select(pl.exclude("^.*_right$"))
+        .with_columns(counting_exprs)
+        .with_columns(rate_exprs)
         .select(
-            pl.col("School"),
-            pl.col("G"),
-            pl.col("W"),
-            pl.col("L"),
-            pl.col("W-L%"),
-            pl.col("PTS"),
-            pl.col("OPP_PTS"),
-            pl.col("ConfW"),
-            pl.col("ConfL"),
-            pl.col("HomeW"),
-            pl.col("HomeL"),
-            pl.col("AwayW"),
-            pl.col("AwayL"),
-            pl.col("MP"),
-            pl.col("FG"),
-            pl.col("FGA"),
-            pl.col("FG%"),
-            pl.col("3P"),
-            pl.col("3PA"),
-            pl.col("3P%"),
-            pl.col("FT"),
-            pl.col("FTA"),
-            pl.col("FT%"),
-            pl.col("ORB"),
-            pl.col("TRB"),
-            pl.col("AST"),
-            pl.col("STL"),
-            pl.col("BLK"),
-            pl.col("TOV"),
-            pl.col("PF"),
+            pl.col(column).alias(stats_renames.get(column, column))
+            for column in stats_columns
+            if "_BLANK" not in column and column not in POSTSEASON_DROPPED_STATS
         )
     )
+    if isinstance(stats_df, pl.LazyFrame):
+        return adjusted_df
+    return adjusted_df.collect()
 
 
 if __name__ == "__main__":
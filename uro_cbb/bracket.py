@@ -3,9 +3,14 @@
 import abc
 import dataclasses
 import functools
+import pathlib
+from typing import Callable
 
+import numpy as np
 import pandas as pd
 
+import uro_cbb.pairwise as pairwise
+
 
 @dataclasses.dataclass(slots=True)
 class Team:
@@ -23,16 +28,18 @@ class Team:
         return self._id
 
 
-def get_win_prob(team1: Team, team2: Team, win_probs_df: pd.DataFrame):
-    """win_prob_df: is in kaggle 2025 submission format of two columns: ID and Pred.
-    ID column is formatted as 2025_{team1_id}_{team2_id} and Pred is the win probability of team1.
+def get_win_prob(
+    team1: Team, team2: Team, win_probs_df: pd.DataFrame, season: int = 2025
+):
+    """win_prob_df: is in kaggle submission format of two columns: ID and Pred.
+    ID column is formatted as {season}_{team1_id}_{team2_id} and Pred is the win probability of team1.
     """
     if team1._id < team2._id:
-        prob = win_probs_df[win_probs_df["ID"] == f"2025_{team1._id}_{team2._id}"]
+        prob = win_probs_df[win_probs_df["ID"] == f"{season}_{team1._id}_{team2._id}"]
         assert len(prob) == 1, f"prob: {prob}"
         return prob.Pred.item()
     else:
-        prob = win_probs_df[win_probs_df["ID"] == f"2025_{team2._id}_{team1._id}"]
+        prob = win_probs_df[win_probs_df["ID"] == f"{season}_{team2._id}_{team1._id}"]
         assert len(prob) == 1, f"prob: {prob}"
         return 1 - prob.Pred.item()
 
@@ -54,14 +61,19 @@ class AbstractGame(abc.ABC):
         pass
 
 
+WinProbFn = Callable[[Team, Team], float]
+
+
 @dataclasses.dataclass
 class Game(AbstractGame):
     team1: Team
     team2: Team
+    # Defaults to the module level get_win_prob, looked up when first needed
+    win_prob_fn: WinProbFn | None = None
 
     @functools.cached_property
     def win_prob(self) -> float:
-        return get_win_prob(self.team1, self.team2)
+        return (self.win_prob_fn or get_win_prob)(self.team1, self.team2)
 
     @functools.cached_property
     def winner(self) -> Team:
@@ -80,18 +92,20 @@ class Game(AbstractGame):
 class HyperGame:
     prev_game1: AbstractGame
     prev_game2: AbstractGame
+    # See Game.win_prob_fn
+    win_prob_fn: WinProbFn | None = None
 
     @property
     def deterministic_win_prob(self):
         game1_winner = self.prev_game1.winner
         game2_winner = self.prev_game2.winner
-        return Game(game1_winner, game2_winner).win_prob
+        return Game(game1_winner, game2_winner, self.win_prob_fn).win_prob
 
     @functools.cached_property
     def winner(self):
         game1_winner = self.prev_game1.winner
         game2_winner = self.prev_game2.winner
-        game = Game(game1_winner, game2_winner)
+        game = Game(game1_winner, game2_winner, self.win_prob_fn)
         if game.win_prob > 0.5:
             return game.team1
         return game.team2
@@ -102,6 +116,7 @@ class HyperGame:
 
     @functools.cached_property
     def all_win_probs(self) -> dict[Team, float]:
+        win_prob_fn = self.win_prob_fn or get_win_prob
         win_probs = {}
         for team in self.prev_game1.all_win_probs:
             for team2 in self.prev_game2.all_win_probs:
@@ -111,10 +126,288 @@ class HyperGame:
                 )
                 win_probs[team] = (
                     win_probs.get(team, 0)
-                    + get_win_prob(team, team2) * prob_game_happens
+                    + win_prob_fn(team, team2) * prob_game_happens
                 )
                 win_probs[team2] = (
                     win_probs.get(team2, 0)
-                    + get_win_prob(team2, team) * prob_game_happens
+                    + win_prob_fn(team2, team) * prob_game_happens
                 )
         return win_probs
+
+
+def win_prob_matrix(team_ids: list[int], win_probs_df: pd.DataFrame) -> np.ndarray:
+    """Dense matrix with [i, j] the probability team_ids[i] beats team_ids[j].
+
+    win_probs_df is in kaggle submission format, see get_win_prob.
+    """
+    id_parts = win_probs_df["ID"].str.split("_", expand=True).astype(int)
+    position = pd.Series(np.arange(len(team_ids)), index=team_ids)
+    in_bracket = id_parts[1].isin(position.index) & id_parts[2].isin(position.index)
+    rows = position[id_parts.loc[in_bracket, 1]].to_numpy()
+    cols = position[id_parts.loc[in_bracket, 2]].to_numpy()
+    probs = win_probs_df.loc[in_bracket, "Pred"].to_numpy()
+
+    matrix = np.full((len(team_ids), len(team_ids)), 0.5)
+    matrix[rows, cols] = probs
+    matrix[cols, rows] = 1 - probs
+    return matrix
+
+
+class LiveBracket:
+    """Array backed single elimination bracket that can take results as they happen.
+
+    team_ids are in bracket order: the first round pairs positions (0, 1), (2, 3), ...
+    and every later round pairs adjacent blocks, so with the notebook's regions the
+    order is South, West, East, Midwest for South to meet West in the Final Four.
+
+    reach[r, i] is the probability team i wins its game in round r (0-indexed), i.e.
+    makes it to round r + 1. Recording a result only recomputes the blocks on the path
+    from that team's first game to the championship. A result also forces the winner's
+    earlier games, e.g. a round 2 winner won its round 0 and 1 games.
+    """
+
+    def __init__(self, team_ids: list[int], win_probs: np.ndarray):
+        n_teams = len(team_ids)
+        assert n_teams & (n_teams - 1) == 0, "Bracket size must be a power of two"
+        self.team_ids = list(team_ids)
+        self.n_rounds = n_teams.bit_length() - 1
+        self.win_probs = np.asarray(win_probs, dtype=np.float64)
+        self._position = {team_id: i for i, team_id in enumerate(self.team_ids)}
+        # Recorded results and the (round, block) winners they force, recorded
+        # results included
+        self._results: dict[tuple[int, int], int] = {}
+        self._forced: dict[tuple[int, int], int] = {}
+        self.reach = np.empty((self.n_rounds, n_teams))
+        for round in range(self.n_rounds):
+            for block in range(n_teams >> (round + 1)):
+                self._compute_block(round, block)
+
+    @classmethod
+    def from_submission(cls, team_ids: list[int], win_probs_df: pd.DataFrame):
+        return cls(team_ids, win_prob_matrix(team_ids, win_probs_df))
+
+    @classmethod
+    def from_pairwise(cls, team_ids: list[int], pairwise_path: pathlib.Path):
+        """From a .pwm file written by kaggle_2025.submission, see uro_cbb.pairwise."""
+        return cls(
+            team_ids, pairwise.PairwiseMatrix.load(pairwise_path).sub_matrix(team_ids)
+        )
+
+    def copy(self) -> "LiveBracket":
+        """Independent bracket state sharing the read only win probability matrix."""
+        bracket = object.__new__(LiveBracket)
+        bracket.team_ids = self.team_ids
+        bracket.n_rounds = self.n_rounds
+        bracket.win_probs = self.win_probs
+        bracket._position = self._position
+        bracket._results = dict(self._results)
+        bracket._forced = dict(self._forced)
+        bracket.reach = self.reach.copy()
+        return bracket
+
+    def _previous_reach(self, round: int, start: int, stop: int) -> np.ndarray:
+        if round == 0:
+            return np.ones(stop - start)
+        return self.reach[round - 1, start:stop]
+
+    def _compute_block(self, round: int, block: int):
+        size = 1 << (round + 1)
+        start, stop = block * size, (block + 1) * size
+        middle = start + size // 2
+        if (round, block) in self._forced:
+            self.reach[round, start:stop] = 0
+            self.reach[round, self._forced[round, block]] = 1
+            return
+        left = self._previous_reach(round, start, middle)
+        right = self._previous_reach(round, middle, stop)
+        self.reach[round, start:middle] = left * (
+            self.win_probs[start:middle, middle:stop] @ right
+        )
+        self.reach[round, middle:stop] = right * (
+            self.win_probs[middle:stop, start:middle] @ left
+        )
+
+    def _recompute_path(self, round: int, position: int):
+        for later_round in range(round, self.n_rounds):
+            self._compute_block(later_round, position >> (later_round + 1))
+
+    def _path(self, round: int, position: int) -> dict[tuple[int, int], int]:
+        """The games position wins to win its round game."""
+        return {
+            (earlier_round, position >> (earlier_round + 1)): position
+            for earlier_round in range(round + 1)
+        }
+
+    def _update_forced(self):
+        """Rebuilds _forced from the recorded results."""
+        self._forced = {}
+        for (round, _), position in self._results.items():
+            self._forced |= self._path(round, position)
+
+    def record_result(self, round: int, winner_id: int):
+        """Forces winner_id to win its round game (0 is the round of 64) and the games
+        before it. Raises ValueError if a recorded result has another team win any of
+        them, clear that result first to correct it."""
+        position = self._position[winner_id]
+        for game, winner in self._path(round, position).items():
+            if self._forced.get(game, position) != position:
+                raise ValueError(
+                    f"Team {winner_id} can't win round {round}, team "
+                    f"{self.team_ids[self._forced[game]]} won its round {game[0]} game"
+                )
+        self._results[round, position >> (round + 1)] = position
+        self._forced |= self._path(round, position)
+        self._recompute_path(0, position)
+
+    def clear_result(self, round: int, team_id: int):
+        """Undoes record_result(round, team_id), along with the earlier games it forced
+        that no other recorded result forces."""
+        position = self._position[team_id]
+        game = (round, position >> (round + 1))
+        if self._results.get(game) != position:
+            if self._forced.get(game) == position:
+                raise ValueError(
+                    f"Team {team_id} winning round {round} is forced by a later "
+                    "result, clear that result instead"
+                )
+            return
+        del self._results[game]
+        self._update_forced()
+        self._recompute_path(0, position)
+
+    def team_odds(self, team_id: int) -> np.ndarray:
+        """Probability of winning each round's game, from the first round to the title."""
+        return self.reach[:, self._position[team_id]].copy()
+
+    def odds_df(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.reach.T,
+            index=pd.Index(self.team_ids, name="TeamID"),
+            columns=[f"round_{round + 1}" for round in range(self.n_rounds)],
+        )
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Constraint:
+    """team_id plays its game in round (0 is the round of 64) and wins or loses it."""
+
+    team_id: int
+    round: int
+    wins: bool
+
+
+@dataclasses.dataclass
+class ScenarioResults:
+    team_ids: list[int]
+    # odds[k, i, r]: probability team i wins its round r game given scenario k
+    odds: np.ndarray
+    # probability[k]: probability of scenario k happening at all
+    probability: np.ndarray
+
+    def odds_df(self, scenario: int) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.odds[scenario],
+            index=pd.Index(self.team_ids, name="TeamID"),
+            columns=[f"round_{round + 1}" for round in range(self.odds.shape[2])],
+        )
+
+
+def _scenario_masks(
+    live_bracket: LiveBracket, scenarios: list[list[Constraint]]
+) -> np.ndarray:
+    """masks[k, r, i] is 0 when scenario k rules out team i winning its round r game."""
+    n_teams = len(live_bracket.team_ids)
+    masks = np.ones((len(scenarios), live_bracket.n_rounds, n_teams))
+
+    def must_win(k: int, round: int, position: int):
+        size = 1 << (round + 1)
+        start = position // size * size
+        masks[k, round, start : start + size] = 0
+        masks[k, round, position] = 1
+
+    for (round, _), position in live_bracket._forced.items():
+        for k in range(len(scenarios)):
+            must_win(k, round, position)
+    for k, constraints in enumerate(scenarios):
+        for constraint in constraints:
+            position = live_bracket._position[constraint.team_id]
+            if constraint.wins:
+                must_win(k, constraint.round, position)
+                continue
+            # Losing a round means playing in it, i.e. winning the round before
+            if constraint.round > 0:
+                must_win(k, constraint.round - 1, position)
+            masks[k, constraint.round, position] = 0
+    return masks
+
+
+def scenario_odds(
+    live_bracket: LiveBracket, scenarios: list[list[Constraint]]
+) -> ScenarioResults:
+    """Conditional round reach odds for a batch of what-if scenarios at once.
+
+    Results already recorded on live_bracket apply to every scenario. All K scenarios
+    go through one forward pass (probability of winning each block while satisfying
+    the scenario inside it) and one backward pass (probability of the rest of the
+    scenario given who won the block) as (K, blocks, half block) tensors, so the
+    matrix products are shared across scenarios.
+    """
+    n_teams = len(live_bracket.team_ids)
+    n_rounds = live_bracket.n_rounds
+    win_probs = live_bracket.win_probs
+    masks = _scenario_masks(live_bracket, scenarios)
+    n_scenarios = len(scenarios)
+
+    def split(values: np.ndarray, round: int) -> tuple[np.ndarray, np.ndarray]:
+        half = 1 << round
+        blocks = values.reshape(n_scenarios, -1, 2, half)
+        return blocks[:, :, 0], blocks[:, :, 1]
+
+    def probs_between_halves(round: int) -> tuple[np.ndarray, np.ndarray]:
+        half = 1 << round
+        blocks = win_probs.reshape(n_teams // (2 * half), 2 * half, -1, 2 * half)
+        n_blocks = blocks.shape[0]
+        block_index = np.arange(n_blocks)
+        diagonal = blocks[block_index, :, block_index]
+        return diagonal[:, :half, half:], diagonal[:, half:, :half]
+
+    reach = np.empty((n_scenarios, n_rounds, n_teams))
+    previous = np.ones((n_scenarios, n_teams))
+    for round in range(n_rounds):
+        left, right = split(previous, round)
+        probs_lr, probs_rl = probs_between_halves(round)
+        mask_left, mask_right = split(masks[:, round], round)
+        reach_left = left * np.einsum("bij,kbj->kbi", probs_lr, right) * mask_left
+        reach_right = right * np.einsum("bij,kbj->kbi", probs_rl, left) * mask_right
+        reach[:, round] = np.stack([reach_left, reach_right], axis=2).reshape(
+            n_scenarios, n_teams
+        )
+        previous = reach[:, round]
+
+    # outside[k, r, i]: probability of scenario k outside team i's round r block given
+    # team i won that block
+    outside = np.empty((n_scenarios, n_rounds, n_teams))
+    outside[:, n_rounds - 1] = 1
+    for round in range(n_rounds - 2, -1, -1):
+        advance = masks[:, round + 1] * outside[:, round + 1]
+        left, right = split(reach[:, round], round + 1)
+        advance_left, advance_right = split(advance, round + 1)
+        probs_lr, probs_rl = probs_between_halves(round + 1)
+        outside_left = advance_left * np.einsum(
+            "bij,kbj->kbi", probs_lr, right
+        ) + np.einsum("bji,kbj->kbi", probs_rl, right * advance_right)
+        outside_right = advance_right * np.einsum(
+            "bij,kbj->kbi", probs_rl, left
+        ) + np.einsum("bji,kbj->kbi", probs_lr, left * advance_left)
+        outside[:, round] = np.stack([outside_left, outside_right], axis=2).reshape(
+            n_scenarios, n_teams
+        )
+
+    probability = reach[:, n_rounds - 1].sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        odds = reach * outside / probability[:, None, None]
+    return ScenarioResults(
+        team_ids=live_bracket.team_ids,
+        odds=np.nan_to_num(odds).transpose(0, 2, 1),
+        probability=probability,
+    )
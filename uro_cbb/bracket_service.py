@@ -0,0 +1,214 @@
+"""Long running HTTP/JSON service answering bracket probability queries.
+
+Everything is precomputed into a LiveBracket at startup, so a request is an array
+lookup or, for what-if queries, one bracket.scenario_odds pass conditioned on the
+result. The server is
+a small asyncio HTTP/1.1 implementation with keep-alive, so it needs no web framework.
+
+Endpoints (all JSON):
+    GET  /teams
+    GET  /odds                              round reach odds for every team
+    GET  /odds?team=1120
+    GET  /head_to_head?team1=1120&team2=1181
+    GET  /what_if?team=1120&round=2         odds if team wins its round game
+    POST /results {"round": 0, "winner": 1120}
+    DELETE /results {"round": 0, "team": 1120}
+"""
+
+import asyncio
+import json
+import logging
+import pathlib
+import urllib.parse
+
+import numpy as np
+import pydantic
+import typer
+
+import uro_cbb.bracket as bracket
+
+
+class BracketData(pydantic.BaseModel):
+    """Stand-in data file format: teams in bracket order and their win probability
+    matrix, see bracket.LiveBracket and bracket.win_prob_matrix."""
+
+    team_ids: list[int]
+    team_names: list[str]
+    win_probs: list[list[float]]
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "BracketData":
+        return cls.model_validate_json(pathlib.Path(path).read_text())
+
+    def save(self, path: pathlib.Path):
+        pathlib.Path(path).write_text(self.model_dump_json())
+
+
+class BadRequest(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+class BracketService:
+    def __init__(self, data: BracketData):
+        self.team_names = dict(zip(data.team_ids, data.team_names))
+        self.bracket = bracket.LiveBracket(data.team_ids, np.array(data.win_probs))
+        self._position = {team_id: i for i, team_id in enumerate(data.team_ids)}
+
+    def _team(self, params: dict, key: str) -> int:
+        try:
+            team_id = int(params[key])
+        except (KeyError, ValueError, TypeError):
+            raise BadRequest(f"Expected integer query parameter {key}")
+        if team_id not in self._position:
+            raise BadRequest(f"Team {team_id} is not in the bracket")
+        return team_id
+
+    def _round(self, params: dict) -> int:
+        try:
+            round = int(params["round"])
+        except (KeyError, ValueError, TypeError):
+            raise BadRequest("Expected integer parameter round")
+        if not 0 <= round < self.bracket.n_rounds:
+            raise BadRequest(f"round must be in [0, {self.bracket.n_rounds})")
+        return round
+
+    def _odds(self, team_ids: list[int], all_odds: np.ndarray) -> list:
+        """all_odds[i, r]: probability team_ids[i] wins its round r game."""
+        return [
+            {"team": team_id, "name": self.team_names[team_id], "odds": odds}
+            for team_id, odds in zip(team_ids, all_odds.tolist())
+        ]
+
+    def handle(self, method: str, path: str, params: dict) -> dict | list:
+        match method, path:
+            case "GET", "/teams":
+                return [
+                    {"team": team_id, "name": name}
+                    for team_id, name in self.team_names.items()
+                ]
+            case "GET", "/odds":
+                if "team" in params:
+                    team_id = self._team(params, "team")
+                    return {
+                        "team": team_id,
+                        "name": self.team_names[team_id],
+                        "odds": self.bracket.team_odds(team_id).tolist(),
+                    }
+                return self._odds(self.bracket.team_ids, self.bracket.reach.T)
+            case "GET", "/head_to_head":
+                team1 = self._team(params, "team1")
+                team2 = self._team(params, "team2")
+                prob = self.bracket.win_probs[
+                    self._position[team1], self._position[team2]
+                ]
+                return {"team1": team1, "team2": team2, "team1_win_prob": prob}
+            case "GET", "/what_if":
+                round = self._round(params)
+                team_id = self._team(params, "team")
+                # Conditions every round on the result, where recording it on a copy
+                # would only pin the winner's path
+                scenario = bracket.scenario_odds(
+                    self.bracket, [[bracket.Constraint(team_id, round, True)]]
+                )
+                if scenario.probability[0] == 0:
+                    raise BadRequest(
+                        f"Team {team_id} can't win round {round} given the results"
+                    )
+                return self._odds(scenario.team_ids, scenario.odds[0])
+            case "POST", "/results":
+                try:
+                    self.bracket.record_result(
+                        self._round(params), self._team(params, "winner")
+                    )
+                except ValueError as e:
+                    raise BadRequest(str(e))
+                return {"ok": True}
+            case "DELETE", "/results":
+                try:
+                    self.bracket.clear_result(
+                        self._round(params), self._team(params, "team")
+                    )
+                except ValueError as e:
+                    raise BadRequest(str(e))
+                return {"ok": True}
+        raise NotFound(path)
+
+
+def _response(status: str, body: dict | list, keep_alive: bool) -> bytes:
+    payload = json.dumps(body).encode()
+    headers = (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return headers.encode() + payload
+
+
+async def _serve_connection(
+    service: BracketService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+):
+    try:
+        while request_line := await reader.readline():
+            method, target, version = request_line.decode().split()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                key, _, value = line.decode().partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            keep_alive = headers.get("connection", "").lower() != "close" and (
+                version == "HTTP/1.1"
+            )
+
+            url = urllib.parse.urlsplit(target)
+            params = dict(urllib.parse.parse_qsl(url.query))
+            try:
+                if body:
+                    body_params = json.loads(body)
+                    if not isinstance(body_params, dict):
+                        raise BadRequest("Expected a JSON object body")
+                    params |= body_params
+                response = _response(
+                    "200 OK", service.handle(method, url.path, params), keep_alive
+                )
+            except (BadRequest, json.JSONDecodeError) as e:
+                response = _response("400 Bad Request", {"error": str(e)}, keep_alive)
+            except NotFound:
+                response = _response("404 Not Found", {"error": url.path}, keep_alive)
+            except Exception:
+                logging.exception(f"Error handling {method} {target}")
+                response = _response(
+                    "500 Internal Server Error", {"error": "internal error"}, keep_alive
+                )
+            writer.write(response)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        logging.warning("Dropping malformed or interrupted connection")
+    finally:
+        writer.close()
+
+
+async def serve(service: BracketService, host: str = "127.0.0.1", port: int = 8080):
+    server = await asyncio.start_server(
+        lambda reader, writer: _serve_connection(service, reader, writer), host, port
+    )
+    logging.info(f"Serving bracket odds on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(data_path: pathlib.Path, host: str = "127.0.0.1", port: int = 8080):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(BracketService(BracketData.load(data_path)), host, port))
+
+
+if __name__ == "__main__":
+    typer.run(main)
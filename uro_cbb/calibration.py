@@ -0,0 +1,107 @@
+"""Calibration of head to head win probabilities fitted on held out seasons.
+
+A fitted Calibrator is a plain elementwise transform, so it applies to a single
+prediction, a submission's Pred column or a full pairwise matrix alike. Outputs are
+symmetrized, p(a, b) = 1 - p(b, a), and clipped to [clip_min, clip_max].
+"""
+
+import dataclasses
+import pickle
+from typing import Literal
+
+import numpy as np
+import polars as pl
+import scipy.optimize as optimize
+import scipy.special as special
+import sklearn.isotonic as isotonic
+import sklearn.linear_model as linear_model
+
+CalibrationMethod = Literal["platt", "isotonic", "temperature"]
+
+
+def _logit(preds: np.ndarray, eps: float = 1e-6) -> np.ndarray:
+    return special.logit(np.clip(preds, eps, 1 - eps))
+
+
+@dataclasses.dataclass
+class Calibrator:
+    method: CalibrationMethod
+    # platt: (slope, intercept), temperature: (temperature,),
+    # isotonic: stacked (thresholds, calibrated values)
+    params: np.ndarray
+    clip_min: float = 0.001
+    clip_max: float = 0.999
+
+    @classmethod
+    def fit(
+        cls,
+        preds: np.ndarray,
+        actual: np.ndarray,
+        method: CalibrationMethod = "platt",
+        clip_min: float = 0.001,
+        clip_max: float = 0.999,
+    ) -> "Calibrator":
+        """Fits on held out predictions. Every game is used from both sides so the
+        fitted curve is already close to symmetric."""
+        preds = np.concatenate([preds, 1 - preds]).astype(np.float64)
+        actual = np.concatenate([actual, 1 - actual]).astype(np.float64)
+        match method:
+            case "platt":
+                model = linear_model.LogisticRegression(C=1e6)
+                model.fit(_logit(preds)[:, None], actual)
+                params = np.array([model.coef_[0, 0], model.intercept_[0]])
+            case "temperature":
+
+                def log_loss(temperature: float) -> float:
+                    calibrated = special.expit(_logit(preds) / temperature)
+                    calibrated = np.clip(calibrated, 1e-15, 1 - 1e-15)
+                    return -np.mean(
+                        actual * np.log(calibrated)
+                        + (1 - actual) * np.log(1 - calibrated)
+                    )
+
+                result = optimize.minimize_scalar(
+                    log_loss, bounds=(0.05, 20), method="bounded"
+                )
+                params = np.array([result.x])
+            case "isotonic":
+                model = isotonic.IsotonicRegression(
+                    y_min=0, y_max=1, out_of_bounds="clip"
+                )
+                model.fit(preds, actual)
+                params = np.stack([model.X_thresholds_, model.y_thresholds_])
+            case _:
+                raise ValueError(f"Unknown calibration method {method}")
+        return cls(method, params, clip_min, clip_max)
+
+    def _calibrate(self, preds: np.ndarray) -> np.ndarray:
+        match self.method:
+            case "platt":
+                slope, intercept = self.params
+                return special.expit(slope * _logit(preds) + intercept)
+            case "temperature":
+                return special.expit(_logit(preds) / self.params[0])
+            case "isotonic":
+                return np.interp(preds, self.params[0], self.params[1])
+        raise ValueError(f"Unknown calibration method {self.method}")
+
+    def transform(self, preds: np.ndarray) -> np.ndarray:
+        """Calibrates an array of any shape, e.g. a full pairwise matrix."""
+        preds = np.asarray(preds, dtype=np.float64)
+        symmetric = 0.5 * (self._calibrate(preds) + 1 - self._calibrate(1 - preds))
+        return np.clip(symmetric, self.clip_min, self.clip_max)
+
+    def transform_df(
+        self, df: pl.DataFrame, pred_col: str = "Pred", out_col: str | None = None
+    ) -> pl.DataFrame:
+        calibrated = self.transform(df[pred_col].to_numpy())
+        return df.with_columns(pl.Series(out_col or pred_col, calibrated))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path) -> "Calibrator":
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,141 @@
+"""Blends several pairwise prediction sources into one per season and gender.
+
+Each source (a GLM variant, xgboost, a rating model, ...) is a directory of
+PairwiseMatrix files named {season}_{gender}. Blend weights are learned per gender by
+minimizing the log loss of held out tournament games, and the blend is written row
+block by row block so only a block of every source is in memory at once.
+"""
+
+import dataclasses
+import logging
+import pathlib
+
+import numpy as np
+import polars as pl
+import scipy.optimize as optimize
+import scipy.special as special
+
+import uro_cbb.pairwise as pairwise
+
+
+def source_path(source_dir: pathlib.Path, season: int, gender: str) -> pathlib.Path:
+    return pathlib.Path(source_dir) / f"{season}_{gender}.pwm"
+
+
+def import_submission_csv(csv_path: pathlib.Path, source_dir: pathlib.Path):
+    """Splits an existing kaggle submission CSV into one PairwiseMatrix per season and
+    gender so it can be used as a blend source."""
+    submission_df = pl.read_csv(csv_path).with_columns(
+        pl.col("ID").str.split("_").list.get(0).cast(pl.Int32).alias("Season"),
+        pl.when(
+            pl.col("ID").str.split("_").list.get(1).cast(pl.Int32)
+            >= pairwise.WOMENS_MIN_TEAM_ID
+        )
+        .then(pl.lit("W"))
+        .otherwise(pl.lit("M"))
+        .alias("Gender"),
+    )
+    for (season, gender), df in submission_df.group_by("Season", "Gender"):
+        pairwise.PairwiseMatrix.from_submission_df(df.select("ID", "Pred")).save(
+            source_path(source_dir, season, gender)
+        )
+
+
+@dataclasses.dataclass
+class Blend:
+    source_dirs: list[pathlib.Path]
+    weights: np.ndarray
+
+    def blend(
+        self,
+        season: int,
+        gender: str,
+        out_path: pathlib.Path | None = None,
+        block_rows: int = 64,
+    ) -> pairwise.PairwiseMatrix:
+        """Weighted average of every source's matrix for a season and gender. With
+        out_path the result is written straight into a memory-mapped .pwm file."""
+        sources = [
+            pairwise.PairwiseMatrix.load(source_path(source_dir, season, gender))
+            for source_dir in self.source_dirs
+        ]
+        team_ids = sources[0].team_ids
+        for source in sources[1:]:
+            assert np.array_equal(source.team_ids, team_ids), "Sources disagree on teams"
+        if out_path is None:
+            blended = pairwise.PairwiseMatrix(
+                season, gender, team_ids, np.empty((len(team_ids),) * 2, np.float32)
+            )
+        else:
+            blended = pairwise.PairwiseMatrix.create(out_path, season, gender, team_ids)
+        for start in range(0, len(team_ids), block_rows):
+            stop = min(start + block_rows, len(team_ids))
+            blended.matrix[start:stop] = sum(
+                weight * source.matrix[start:stop]
+                for weight, source in zip(self.weights, sources)
+            )
+        if out_path is not None:
+            blended.matrix.flush()
+        return blended
+
+
+def _held_out_preds(
+    source_dirs: list[pathlib.Path], games_df: pl.DataFrame, gender: str
+) -> np.ndarray:
+    """(n_games, n_sources) predictions for held out games with Season, Team1_id,
+    Team2_id columns, gathered without reading whole matrices."""
+    preds = np.empty((len(games_df), len(source_dirs)))
+    for (season,), season_games_df in games_df.with_row_index().group_by("Season"):
+        rows = season_games_df["index"].to_numpy()
+        for i, source_dir in enumerate(source_dirs):
+            source = pairwise.PairwiseMatrix.load(
+                source_path(source_dir, season, gender)
+            )
+            preds[rows, i] = source.win_probs(
+                season_games_df["Team1_id"].to_numpy(),
+                season_games_df["Team2_id"].to_numpy(),
+            )
+    return preds
+
+
+def fit_blend(
+    source_dirs: list[pathlib.Path],
+    games_df: pl.DataFrame,
+    gender: str,
+    cap: float = 0.999,
+) -> Blend:
+    """Non-negative weights summing to one that minimize held out log loss.
+
+    games_df holds held out tournament games with Season, Team1_id, Team2_id and
+    Result columns, e.g. stacked preprocess_data frames.
+    """
+    preds = _held_out_preds(source_dirs, games_df, gender)
+    actual = games_df["Result"].to_numpy()
+
+    def log_loss(logits: np.ndarray) -> float:
+        blended = np.clip(preds @ special.softmax(logits), 1 - cap, cap)
+        return -np.mean(actual * np.log(blended) + (1 - actual) * np.log(1 - blended))
+
+    result = optimize.minimize(log_loss, np.zeros(len(source_dirs)), method="BFGS")
+    weights = special.softmax(result.x)
+    logging.info(
+        f"{gender} blend log loss {result.fun:.4f} with weights "
+        + ", ".join(f"{d}: {w:.3f}" for d, w in zip(source_dirs, weights))
+    )
+    return Blend(list(source_dirs), weights)
+
+
+def blend_submission(
+    blends: dict[str, Blend],
+    season: int,
+    out_dir: pathlib.Path,
+) -> pl.DataFrame:
+    """Blends every gender for a season, keeps the blended matrices in out_dir and
+    returns the combined kaggle submission frame."""
+    submission_dfs = []
+    for gender, blend in blends.items():
+        blended = blend.blend(
+            season, gender, out_path=source_path(out_dir, season, gender)
+        )
+        submission_dfs.append(blended.to_submission_df())
+    return pl.concat(submission_dfs)
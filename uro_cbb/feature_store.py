@@ -0,0 +1,134 @@
+"""Point-in-time team features from a season game log.
+
+Per team running totals are stored for every calendar day of the season, so the totals
+as of any date are a single lookup and totals over any window are the difference of
+two lookups. Using the tournament start date as the cutoff gives leakage free season
+features without subtracting tournament box scores after the fact.
+"""
+
+import dataclasses
+import datetime
+
+import numpy as np
+import polars as pl
+
+STATS = ["G", "W", "L", "PTS", "OPP_PTS", "HomeG", "AwayG", "NeutralG"]
+
+
+@dataclasses.dataclass
+class PointInTimeFeatureStore:
+    """totals[d, t, s] is team t's total of STATS[s] over the games played strictly
+    before start_date + d days."""
+
+    start_date: datetime.date
+    totals: np.ndarray
+
+    @classmethod
+    def from_game_log(
+        cls, games_df: pl.DataFrame, n_teams: int | None = None
+    ) -> "PointInTimeFeatureStore":
+        """games_df follows bball_ref.GAME_LOG_SCHEMA."""
+        if n_teams is None:
+            n_teams = (
+                max(games_df["Team1Index"].max(), games_df["Team2Index"].max()) + 1
+            )
+        start_date = games_df["Date"].min()
+        team_games_df = pl.concat(
+            [
+                games_df.select(
+                    pl.col("Date"),
+                    pl.col("Team1Index").alias("TeamIndex"),
+                    pl.col("Score1").alias("PTS"),
+                    pl.col("Score2").alias("OPP_PTS"),
+                    pl.col("Venue"),
+                ),
+                games_df.select(
+                    pl.col("Date"),
+                    pl.col("Team2Index").alias("TeamIndex"),
+                    pl.col("Score2").alias("PTS"),
+                    pl.col("Score1").alias("OPP_PTS"),
+                    -pl.col("Venue"),
+                ),
+            ]
+        ).select(
+            ((pl.col("Date") - start_date).dt.total_days() + 1).alias("Day"),
+            pl.col("TeamIndex"),
+            pl.lit(1).alias("G"),
+            (pl.col("PTS") > pl.col("OPP_PTS")).alias("W"),
+            (pl.col("PTS") < pl.col("OPP_PTS")).alias("L"),
+            pl.col("PTS"),
+            pl.col("OPP_PTS"),
+            (pl.col("Venue") == 1).alias("HomeG"),
+            (pl.col("Venue") == -1).alias("AwayG"),
+            (pl.col("Venue") == 0).alias("NeutralG"),
+        )
+        n_days = team_games_df["Day"].max() + 1
+        totals = np.zeros((n_days, n_teams, len(STATS)), dtype=np.float32)
+        # A game on day d first counts in totals[d + 1], hence Day is offset by one
+        np.add.at(
+            totals,
+            (team_games_df["Day"].to_numpy(), team_games_df["TeamIndex"].to_numpy()),
+            team_games_df.select(STATS).to_numpy().astype(np.float32),
+        )
+        np.cumsum(totals, axis=0, out=totals)
+        return cls(start_date, totals)
+
+    def _day_index(self, dates) -> np.ndarray:
+        days = (
+            np.asarray(dates, dtype="datetime64[D]") - np.datetime64(self.start_date)
+        ).astype(np.int64)
+        return np.clip(days, 0, len(self.totals) - 1)
+
+    def _to_frame(self, team_indices: np.ndarray, totals: np.ndarray) -> pl.DataFrame:
+        return pl.DataFrame(
+            {"TeamIndex": team_indices.astype(np.int16)}
+            | {stat: totals[:, i] for i, stat in enumerate(STATS)}
+        ).with_columns(
+            (pl.col("W") / pl.col("G")).alias("W-L%"),
+            (pl.col("PTS") / pl.col("G")).alias("PTS/G"),
+            (pl.col("OPP_PTS") / pl.col("G")).alias("OPP_PTS/G"),
+        )
+
+    def as_of(
+        self, date: datetime.date, team_indices: np.ndarray | None = None
+    ) -> pl.DataFrame:
+        """Season totals and per game averages from games played before date."""
+        if team_indices is None:
+            team_indices = np.arange(self.totals.shape[1])
+        team_indices = np.asarray(team_indices)
+        return self._to_frame(
+            team_indices, self.totals[self._day_index(date), team_indices]
+        )
+
+    def window(
+        self,
+        start: datetime.date,
+        end: datetime.date,
+        team_indices: np.ndarray | None = None,
+    ) -> pl.DataFrame:
+        """Totals from games played on or after start and before end."""
+        if team_indices is None:
+            team_indices = np.arange(self.totals.shape[1])
+        team_indices = np.asarray(team_indices)
+        return self._to_frame(
+            team_indices,
+            self.totals[self._day_index(end), team_indices]
+            - self.totals[self._day_index(start), team_indices],
+        )
+
+    def for_games(self, games_df: pl.DataFrame) -> pl.DataFrame:
+        """Both teams' features as of each game's date, for backtesting daily
+        predictions. Team 2 columns get a _2 suffix like preprocess_data."""
+        day_indices = self._day_index(games_df["Date"].to_numpy())
+        team1_totals = self.totals[day_indices, games_df["Team1Index"].to_numpy()]
+        team2_totals = self.totals[day_indices, games_df["Team2Index"].to_numpy()]
+        team1_df = self._to_frame(games_df["Team1Index"].to_numpy(), team1_totals)
+        team2_df = self._to_frame(games_df["Team2Index"].to_numpy(), team2_totals)
+        return pl.concat(
+            [
+                games_df,
+                team1_df.drop("TeamIndex"),
+                team2_df.drop("TeamIndex").select(pl.all().name.suffix("_2")),
+            ],
+            how="horizontal",
+        )
@@ -0,0 +1,222 @@
+"""Shared HTTP client for the barttorvik, kenpom and sports-reference scrapers.
+
+A single pooled session with connect and read timeouts. Requests to each host are
+paced to a minimum interval, which doubles whenever the host answers 429 and decays
+back on success. Connection errors and 429/5xx responses are retried with jittered
+exponential backoff, waiting for Retry-After instead when the host sends one. A
+per-host circuit breaker fails fast once a request fails repeatedly (or gets a
+Retry-After longer than the backoff cap) so a backfill moves on instead of stalling
+on one host. Throttling answered with Retry-After doesn't count as a failure.
+"""
+
+import dataclasses
+import datetime
+import email.utils
+import logging
+import random
+import threading
+import time
+import urllib.parse
+
+import pydantic
+import requests
+
+import uro_cbb.instrumentation as instrumentation
+
+
+class HttpClientConfig(pydantic.BaseModel):
+    connect_timeout_seconds: float = 5.0
+    read_timeout_seconds: float = 30.0
+    max_retries: int = 5
+    backoff_base_seconds: float = 1.0
+    backoff_max_seconds: float = 120.0
+    retry_statuses: list[int] = [429, 500, 502, 503, 504]
+    # sports-reference allows 20 requests a minute before throttling for an hour
+    min_interval_seconds: dict[str, float] = {
+        "www.sports-reference.com": 3.1,
+        "barttorvik.com": 1.0,
+        "web.archive.org": 1.0,
+    }
+    default_min_interval_seconds: float = 0.0
+    pool_connections: int = 4
+    pool_maxsize: int = 8
+    # Failed attempts of a single request that open its host's circuit
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 300.0
+
+
+class CircuitOpenError(requests.RequestException):
+    """The host failed too often recently and is not being requested."""
+
+
+@dataclasses.dataclass
+class _HostState:
+    min_interval: float
+    interval: float
+    next_request: float = 0.0
+    open_until: float = 0.0
+    lock: threading.Lock = dataclasses.field(default_factory=threading.Lock)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date."""
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(
+        0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    )
+
+
+class HttpClient:
+    def __init__(self, config: HttpClientConfig = HttpClientConfig()):
+        self.config = config
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            max_retries=0,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._hosts: dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def _host_state(self, host: str) -> _HostState:
+        with self._lock:
+            if host not in self._hosts:
+                min_interval = self.config.min_interval_seconds.get(
+                    host, self.config.default_min_interval_seconds
+                )
+                self._hosts[host] = _HostState(min_interval, min_interval)
+            return self._hosts[host]
+
+    def _wait_for_turn(self, host: str, state: _HostState):
+        with state.lock:
+            now = time.monotonic()
+            if now < state.open_until:
+                raise CircuitOpenError(
+                    f"Circuit open for {host} for {state.open_until - now:.0f}s"
+                )
+            start = max(now, state.next_request)
+            state.next_request = start + state.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def _record_success(self, state: _HostState):
+        with state.lock:
+            state.interval = max(state.min_interval, state.interval * 0.9)
+
+    def _record_failure(
+        self, host: str, state: _HostState, throttled: bool, open_circuit: bool
+    ):
+        with state.lock:
+            if throttled:
+                state.interval = min(
+                    max(2 * state.interval, self.config.backoff_base_seconds),
+                    self.config.backoff_max_seconds,
+                )
+            if open_circuit:
+                self._open_circuit(host, state, self.config.breaker_reset_seconds)
+
+    def _open_circuit(self, host: str, state: _HostState, seconds: float):
+        """Callers hold state.lock."""
+        state.open_until = time.monotonic() + seconds
+        instrumentation.count("circuit_opened", host=host)
+        logging.warning(f"Circuit open for {host} for {seconds:.0f}s")
+
+    def _backoff_seconds(self, attempt: int, retry_after: float | None) -> float:
+        jitter = self._random.uniform(0, self.config.backoff_base_seconds)
+        if retry_after is not None:
+            return retry_after + jitter
+        cap = min(
+            self.config.backoff_max_seconds,
+            self.config.backoff_base_seconds * 2**attempt,
+        )
+        return self._random.uniform(0, cap)
+
+    def get(self, url: str, source: str, **kwargs) -> requests.Response:
+        """GETs url, retrying connection errors and retry_statuses. Other error
+        statuses raise HTTPError and an open circuit raises CircuitOpenError."""
+        kwargs.setdefault(
+            "timeout",
+            (self.config.connect_timeout_seconds, self.config.read_timeout_seconds),
+        )
+        host = urllib.parse.urlsplit(url).netloc
+        state = self._host_state(host)
+        n_failures = 0
+        for attempt in range(self.config.max_retries + 1):
+            self._wait_for_turn(host, state)
+            retry_after = None
+            try:
+                with instrumentation.span("fetch", source=source):
+                    response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                failure = error
+                throttled = False
+            else:
+                instrumentation.count(
+                    "requests", source=source, status=response.status_code
+                )
+                instrumentation.count(
+                    "bytes_downloaded", len(response.content), source=source
+                )
+                if response.status_code not in self.config.retry_statuses:
+                    self._record_success(state)
+                    response.raise_for_status()
+                    return response
+                failure = requests.HTTPError(
+                    f"{response.status_code} for {url}", response=response
+                )
+                throttled = response.status_code == 429
+                if response.status_code in (429, 503):
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            # A 429 with Retry-After is the host pacing us, which the backoff already
+            # honours, not the host failing. Failures are counted per request, so
+            # interleaved requests from other threads don't add up to the threshold.
+            counted = not (throttled and retry_after is not None)
+            n_failures += counted
+            self._record_failure(
+                host,
+                state,
+                throttled,
+                counted and n_failures >= self.config.breaker_failure_threshold,
+            )
+            if attempt == self.config.max_retries:
+                raise failure
+            delay = self._backoff_seconds(attempt, retry_after)
+            with state.lock:
+                if delay > self.config.backoff_max_seconds:
+                    self._open_circuit(host, state, delay)
+                    raise CircuitOpenError(
+                        f"{host} asked to retry after {delay:.0f}s"
+                    ) from failure
+                # Delays every request to the host, not just this one
+                state.next_request = max(state.next_request, time.monotonic() + delay)
+            instrumentation.count("retries", source=source)
+            logging.info(f"Retrying {url} in {delay:.1f}s after {failure}")
+
+
+_client: HttpClient | None = None
+
+
+def get_client() -> HttpClient:
+    """The process wide client, created with the default config on first use."""
+    global _client
+    if _client is None:
+        _client = HttpClient()
+    return _client
+
+
+def configure(config: HttpClientConfig) -> HttpClient:
+    """Replaces the process wide client, e.g. to drop pacing against a local server."""
+    global _client
+    _client = HttpClient(config)
+    return _client
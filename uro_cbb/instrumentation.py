@@ -0,0 +1,169 @@
+"""Span timings and counters for the download and preprocessing pipeline.
+
+Recording is off unless the URO_CBB_TRACE environment variable (or enable()) names an
+output file. While off, span() returns a shared no-op context manager and count()
+returns after a single None check, so instrumented code pays next to nothing.
+
+A path ending in .prom gets a Prometheus text file of span and counter totals when
+recording stops. Any other path streams a JSON lines trace with one event per span
+and counter increment, tagged with the spans open at the time. Child processes
+(e.g. page_pipeline parse workers) record to their own {stem}.{pid}{suffix} file:
+
+    URO_CBB_TRACE=trace.jsonl python -m kaggle_2025.download_barttorvik
+    URO_CBB_TRACE=metrics.prom python -m kaggle_2025.preprocess_data
+"""
+
+import atexit
+import collections
+import contextlib
+import json
+import os
+import pathlib
+import threading
+import time
+
+TRACE_ENV_VAR = "URO_CBB_TRACE"
+# Set by the process that owns the trace file and inherited by its children
+TRACE_OWNER_ENV_VAR = "URO_CBB_TRACE_OWNER_PID"
+METRIC_PREFIX = "uro_cbb"
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Recorder:
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        self.prometheus = self.path.suffix == ".prom"
+        self.span_counts = collections.Counter()
+        self.span_seconds = collections.defaultdict(float)
+        self.counters = collections.Counter()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None if self.prometheus else open(self.path, "w")
+
+    def _open_spans(self) -> list[str]:
+        if not hasattr(self._local, "spans"):
+            self._local.spans = []
+        return self._local.spans
+
+    def _emit(self, event: dict):
+        if self._file is not None:
+            self._file.write(json.dumps(event) + "\n")
+
+    @contextlib.contextmanager
+    def span(self, name: str, labels: dict):
+        open_spans = self._open_spans()
+        open_spans.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            open_spans.pop()
+            key = (name, _label_key(labels))
+            with self._lock:
+                self.span_counts[key] += 1
+                self.span_seconds[key] += seconds
+                self._emit(
+                    {
+                        "type": "span",
+                        "name": name,
+                        "labels": labels,
+                        "parents": open_spans,
+                        "start": start - self._started,
+                        "seconds": seconds,
+                        "thread": threading.get_ident(),
+                    }
+                )
+
+    def count(self, name: str, value: int | float, labels: dict):
+        with self._lock:
+            self.counters[(name, _label_key(labels))] += value
+            self._emit(
+                {
+                    "type": "counter",
+                    "name": name,
+                    "labels": labels,
+                    "parents": self._open_spans(),
+                    "value": value,
+                    "time": time.perf_counter() - self._started,
+                }
+            )
+
+    def prometheus_text(self) -> str:
+        metrics = collections.defaultdict(list)
+        for (name, labels), seconds in self.span_seconds.items():
+            labels = (("span", name),) + labels
+            metrics["span_seconds_total"].append((labels, seconds))
+            metrics["span_count_total"].append(
+                (labels, self.span_counts[name, labels[1:]])
+            )
+        for (name, labels), value in self.counters.items():
+            metrics[f"{name}_total"].append((labels, value))
+
+        lines = []
+        for metric, samples in sorted(metrics.items()):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} counter")
+            for labels, value in sorted(samples):
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                lines.append(f"{METRIC_PREFIX}_{metric}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self.prometheus:
+                self.path.write_text(self.prometheus_text())
+            elif not self._file.closed:
+                self._file.close()
+
+
+_recorder: Recorder | None = None
+
+
+def enable(path: pathlib.Path | str) -> Recorder:
+    """Starts recording to path, replacing (and closing) any active recorder."""
+    global _recorder
+    disable()
+    _recorder = Recorder(path)
+    return _recorder
+
+
+def disable():
+    global _recorder
+    if _recorder is not None:
+        recorder, _recorder = _recorder, None
+        recorder.close()
+
+
+def enabled() -> bool:
+    return _recorder is not None
+
+
+def span(name: str, **labels):
+    """Times the enclosed block, e.g. span("fetch", source="kenpom")."""
+    if _recorder is None:
+        return _NULL_SPAN
+    return _recorder.span(name, labels)
+
+
+def count(name: str, value: int | float = 1, **labels):
+    """Adds value to a counter, e.g. count("rows_parsed", len(df), source="kenpom")."""
+    if _recorder is None:
+        return
+    _recorder.count(name, value, labels)
+
+
+if _trace_path := os.environ.get(TRACE_ENV_VAR):
+    _trace_path = pathlib.Path(_trace_path)
+    _pid = str(os.getpid())
+    if os.environ.setdefault(TRACE_OWNER_ENV_VAR, _pid) != _pid:
+        _trace_path = _trace_path.with_name(
+            f"{_trace_path.stem}.{_pid}{_trace_path.suffix}"
+        )
+    enable(_trace_path)
+    atexit.register(disable)
@@ -1,6 +1,9 @@
 import bs4
 import polars as pl
-import requests
+
+import uro_cbb.instrumentation as instrumentation
+import uro_cbb.page_pipeline as page_pipeline
+import uro_cbb.table_layout as table_layout
 
 KENPOM_ARCHIVE_URLS = {
     2025: "https://web.archive.org/web/20250318045354/kenpom.com",
@@ -16,23 +19,6 @@ KENPOM_ARCHIVE_URLS = {
 }
 
 
-def _parse_kenpom_school(potential_row: bs4.element.Tag) -> str | None:
-    table_data = potential_row.find_all("td")
-    if len(table_data) == 0:
-        return None
-    if school_table_data := table_data[1].find("a"):
-        return school_table_data.contents[0]
-    return None
-
-
-def _parse_kenpom_row(potential_row: bs4.element.Tag) -> list[str]:
-    return [
-        table_data.contents[0]
-        for table_data in potential_row.find_all("td")[4:]
-        if table_data.find("span") is None
-    ]
-
-
 kenpom_row_schema = {
     "Team": pl.Utf8,
     "AdjEM": pl.Float64,
@@ -46,21 +32,48 @@ kenpom_row_schema = {
     "NCSOS_Net": pl.Float64,
 }
 
+# Header text, prefixed by its over-header, of columns not named as in the schema.
+# Ratings are followed by a rank cell the header spans with colspan="2".
+KENPOM_HEADER_ALIASES = {
+    "Strength of Schedule AdjEM": "SOS_AdjEM",
+    "Strength of Schedule OppO": "SOS_AdjO",
+    "Strength of Schedule OppD": "SOS_AdjD",
+    "NCSOS AdjEM": "NCSOS_Net",
+    # Names used since 2025
+    "NetRtg": "AdjEM",
+    "ORtg": "AdjO",
+    "DRtg": "AdjD",
+    "Strength of Schedule NetRtg": "SOS_AdjEM",
+    "Strength of Schedule ORtg": "SOS_AdjO",
+    "Strength of Schedule DRtg": "SOS_AdjD",
+    "NCSOS NetRtg": "NCSOS_Net",
+}
+
 
-def download_kenpom_data(year: int) -> pl.DataFrame:
-    ken_pom_url = KENPOM_ARCHIVE_URLS[year]
-    response = requests.get(ken_pom_url)
-    response.raise_for_status()
-    soup = bs4.BeautifulSoup(response.text, features="html.parser")
-    kenpom_table_row_elements = (
-        soup.find("table", attrs={"id": "ratings-table"}).find("tbody").find_all("tr")
+def page_job(year: int) -> page_pipeline.PageJob:
+    return page_pipeline.PageJob(
+        KENPOM_ARCHIVE_URLS[year], "kenpom", parse_kenpom_html, key=year
     )
 
-    data_rows = []
-    for potential_row in kenpom_table_row_elements:
-        if kenpom_school := _parse_kenpom_school(potential_row):
-            kenpom_row = [kenpom_school] + _parse_kenpom_row(potential_row)
-            assert len(kenpom_row) == len(kenpom_row_schema)
-            data_rows.append(kenpom_row)
 
-    return pl.DataFrame(data_rows, schema=kenpom_row_schema)
+def download_kenpom_data(year: int) -> pl.DataFrame:
+    return parse_kenpom_html(page_pipeline.fetch_page(page_job(year)))
+
+
+def parse_kenpom_html(html: str | bytes) -> pl.DataFrame:
+    with instrumentation.span("parse", source="kenpom"):
+        soup = bs4.BeautifulSoup(html, features="html.parser")
+        table = soup.find("table", attrs={"id": "ratings-table"})
+        layout = table_layout.table_layout(
+            table.find("thead").find_all("tr"),
+            list(kenpom_row_schema),
+            KENPOM_HEADER_ALIASES,
+            "kenpom",
+        )
+        data_rows = layout.parse_rows(table.find("tbody").find_all("tr"))
+    instrumentation.count("rows_parsed", len(data_rows), source="kenpom")
+
+    with instrumentation.span("cast", source="kenpom"):
+        return pl.DataFrame(
+            data_rows, schema=dict.fromkeys(kenpom_row_schema, pl.Utf8), orient="row"
+        ).cast(kenpom_row_schema)
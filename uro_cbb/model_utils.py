@@ -10,37 +10,52 @@ class ModelResults(pydantic.BaseModel):
     log_loss_mean_with_perfect: float
 
 
+class CalibrationGain(pydantic.BaseModel):
+    """Positive gains mean the calibrated predictions score better."""
+
+    uncalibrated: ModelResults
+    calibrated: ModelResults
+    brier_score_gain: float
+    log_loss_gain: float
+
+
+class BootstrapResults(pydantic.BaseModel):
+    brier_score_mean: float
+    brier_score_ci: tuple[float, float]
+    log_loss_mean: float
+    log_loss_ci: tuple[float, float]
+
+
+class PairedBootstrapResults(pydantic.BaseModel):
+    """Differences are model a minus model b, so negative means a is better."""
+
+    brier_score_diff_mean: float
+    brier_score_diff_ci: tuple[float, float]
+    brier_score_win_rate: float
+    log_loss_diff_mean: float
+    log_loss_diff_ci: tuple[float, float]
+    log_loss_win_rate: float
+
+
+def _brier_score_expr(actual_col: str, pred_col: str) -> pl.Expr:
+    return (pl.col(actual_col) - pl.col(pred_col)) ** 2
+
+
+def _log_loss_expr(actual_col: str, pred_col: str, cap: float) -> pl.Expr:
+    pred_capped = pl.col(pred_col).clip(1 - cap, cap)
+    return -pl.col(actual_col) * pred_capped.log() - (1 - pl.col(actual_col)) * (
+        1 - pred_capped
+    ).log()
+
+
 def compute_log_loss(
     data_df: pl.DataFrame,
     actual_col: str = "Result",
     pred_col: str = "pred",
     cap: float = 0.999,
 ):
-    return (
-        data_df.with_columns(
-            min_prob=pl.lit(1 - cap),
-            max_prob=pl.lit(cap),
-        )
-        .with_columns(
-            pred_capped=pl.min_horizontal(
-                pl.max_horizontal(pred_col, "min_prob"), "max_prob"
-            )
-        )
-        .with_columns(
-            log_loss=(
-                -pl.col(actual_col) * (pl.col("pred_capped").log())
-                - (1 - pl.col(actual_col)) * (1 - pl.col("pred_capped")).log()
-            )
-        )
-        .select(
-            pl.exclude(
-                [
-                    "min_prob",
-                    "max_prob",
-                    "pred_capped",
-                ]
-            )
-        )
+    return data_df.with_columns(
+        log_loss=_log_loss_expr(actual_col, pred_col, cap),
     )
 
 
@@ -49,9 +64,7 @@ def compute_brier_score(
     actual_col: str = "Result",
     pred_col: str = "pred",
 ):
-    return data_df.with_columns(
-        brier_score=(pl.col(actual_col) - pl.col(pred_col)) ** 2
-    )
+    return data_df.with_columns(brier_score=_brier_score_expr(actual_col, pred_col))
 
 
 def evaluate_model(
@@ -60,11 +73,11 @@ def evaluate_model(
     pred_col: str = "pred",
     cap: float = 0.999,
 ):
-    brier_score = compute_brier_score(test_df, actual_col, pred_col)
-    log_loss = compute_log_loss(test_df, actual_col, pred_col, cap)
-    brier_score_mean = brier_score.select(pl.col("brier_score").mean()).item()
+    brier_score_mean, log_loss_mean = test_df.select(
+        brier_score=_brier_score_expr(actual_col, pred_col).mean(),
+        log_loss=_log_loss_expr(actual_col, pred_col, cap).mean(),
+    ).row(0)
     brier_score_mean_with_perfect = brier_score_mean - (1 - 0.5) ** 2 / len(test_df)
-    log_loss_mean = log_loss.select(pl.col("log_loss").mean()).item()
     log_loss_mean_with_perfect = log_loss_mean + (np.log(0.5) / len(test_df))
     return ModelResults(
         brier_score_mean=brier_score_mean,
@@ -74,5 +87,152 @@ def evaluate_model(
     )
 
 
+def calibration_gain(
+    test_df: pl.DataFrame,
+    pred_col: str,
+    calibrated_col: str,
+    actual_col: str = "Result",
+    cap: float = 0.999,
+) -> CalibrationGain:
+    uncalibrated = evaluate_model(test_df, actual_col, pred_col, cap)
+    calibrated = evaluate_model(test_df, actual_col, calibrated_col, cap)
+    return CalibrationGain(
+        uncalibrated=uncalibrated,
+        calibrated=calibrated,
+        brier_score_gain=uncalibrated.brier_score_mean - calibrated.brier_score_mean,
+        log_loss_gain=uncalibrated.log_loss_mean - calibrated.log_loss_mean,
+    )
+
+
+def evaluate_models(
+    test_df: pl.DataFrame | pl.LazyFrame,
+    pred_cols: list[str],
+    group_by: list[str] | None = None,
+    actual_col: str = "Result",
+    cap: float = 0.999,
+    n_bins: int = 10,
+) -> pl.DataFrame:
+    """Scores many prediction columns at once, optionally per group (season, fold, ...).
+
+    Returns one row per (group, model) with the same metrics as ModelResults plus
+    calibration bins as list columns: mean prediction, observed win rate and game
+    count for each of the n_bins equal-width probability bins.
+    """
+    group_by = group_by or []
+    long_df = (
+        test_df.lazy()
+        .unpivot(
+            on=pred_cols,
+            index=group_by + [actual_col],
+            variable_name="model",
+            value_name="pred",
+        )
+        .with_columns(
+            calibration_bin=(pl.col("pred") * n_bins).floor().clip(0, n_bins - 1),
+        )
+    )
+    in_bin = [pl.col("calibration_bin") == i for i in range(n_bins)]
+    return (
+        long_df.group_by(group_by + ["model"], maintain_order=True)
+        .agg(
+            n_games=pl.len(),
+            brier_score_mean=_brier_score_expr(actual_col, "pred").mean(),
+            log_loss_mean=_log_loss_expr(actual_col, "pred", cap).mean(),
+            calibration_pred=pl.concat_list(
+                [pl.col("pred").filter(mask).mean() for mask in in_bin]
+            ),
+            calibration_actual=pl.concat_list(
+                [pl.col(actual_col).filter(mask).mean() for mask in in_bin]
+            ),
+            calibration_count=pl.concat_list([mask.sum() for mask in in_bin]),
+        )
+        .with_columns(
+            brier_score_mean_with_perfect=pl.col("brier_score_mean")
+            - (1 - 0.5) ** 2 / pl.col("n_games"),
+            log_loss_mean_with_perfect=pl.col("log_loss_mean")
+            + np.log(0.5) / pl.col("n_games"),
+        )
+        .collect()
+    )
+
+
+def _bootstrap_indices(
+    n_games: int, n_resamples: int, seed: int | None
+) -> np.ndarray:
+    """One (n_resamples, n_games) matrix of game indices drawn with replacement."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, n_games, size=(n_resamples, n_games), dtype=np.int32)
+
+
+def _per_game_metrics(
+    test_df: pl.DataFrame, actual_col: str, pred_col: str, cap: float
+) -> tuple[np.ndarray, np.ndarray]:
+    metrics_df = test_df.select(
+        brier_score=_brier_score_expr(actual_col, pred_col),
+        log_loss=_log_loss_expr(actual_col, pred_col, cap),
+    )
+    return metrics_df["brier_score"].to_numpy(), metrics_df["log_loss"].to_numpy()
+
+
+def _confidence_interval(
+    distribution: np.ndarray, confidence: float
+) -> tuple[float, float]:
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(distribution, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def bootstrap_model(
+    test_df: pl.DataFrame,
+    actual_col: str = "Result",
+    pred_col: str = "pred",
+    cap: float = 0.999,
+    n_resamples: int = 10_000,
+    confidence: float = 0.95,
+    seed: int | None = None,
+) -> BootstrapResults:
+    brier_score, log_loss = _per_game_metrics(test_df, actual_col, pred_col, cap)
+    indices = _bootstrap_indices(len(test_df), n_resamples, seed)
+    return BootstrapResults(
+        brier_score_mean=brier_score.mean(),
+        brier_score_ci=_confidence_interval(
+            brier_score[indices].mean(axis=1), confidence
+        ),
+        log_loss_mean=log_loss.mean(),
+        log_loss_ci=_confidence_interval(log_loss[indices].mean(axis=1), confidence),
+    )
+
+
+def paired_bootstrap(
+    test_df: pl.DataFrame,
+    pred_col_a: str,
+    pred_col_b: str,
+    actual_col: str = "Result",
+    cap: float = 0.999,
+    n_resamples: int = 10_000,
+    confidence: float = 0.95,
+    seed: int | None = None,
+) -> PairedBootstrapResults:
+    """Compares two models on the same resampled games.
+
+    Win rate is the fraction of resamples in which model a has the lower metric.
+    """
+    brier_score_a, log_loss_a = _per_game_metrics(test_df, actual_col, pred_col_a, cap)
+    brier_score_b, log_loss_b = _per_game_metrics(test_df, actual_col, pred_col_b, cap)
+    brier_score_diff = brier_score_a - brier_score_b
+    log_loss_diff = log_loss_a - log_loss_b
+    indices = _bootstrap_indices(len(test_df), n_resamples, seed)
+    brier_score_diffs = brier_score_diff[indices].mean(axis=1)
+    log_loss_diffs = log_loss_diff[indices].mean(axis=1)
+    return PairedBootstrapResults(
+        brier_score_diff_mean=brier_score_diff.mean(),
+        brier_score_diff_ci=_confidence_interval(brier_score_diffs, confidence),
+        brier_score_win_rate=(brier_score_diffs < 0).mean(),
+        log_loss_diff_mean=log_loss_diff.mean(),
+        log_loss_diff_ci=_confidence_interval(log_loss_diffs, confidence),
+        log_loss_win_rate=(log_loss_diffs < 0).mean(),
+    )
+
+
 if __name__ == "__main__":
     pass
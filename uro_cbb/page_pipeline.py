@@ -0,0 +1,257 @@
+"""Two stage page download: fetcher threads feeding a process pool of parsers.
+
+Fetchers take PageJobs, fetch them through the shared http_client (or read them from
+a PageCache) and put the raw bytes on a bounded queue. The consumer runs each job's
+parse function, e.g. barttorvik.parse_barttorvik_html or
+bball_ref.parse_box_score_html, and yields the parsed frames as they complete. A
+failed fetch or parse is yielded in place of the frame, so one bad page doesn't
+throw away the rest of a backfill.
+
+Pages are parsed inline unless max_workers asks for a ProcessPoolExecutor. The pool
+uses spawn, which re-imports the calling script in every worker, so only pass
+max_workers from code under an `if __name__ == "__main__":` guard. Both the queue
+and the number of parses in flight are bounded, so when parsing falls behind the
+fetchers block instead of buffering pages. Parse functions must be module level so
+they pickle by reference.
+
+    jobs = [PageJob(link, "bball_ref_box_score", bball_ref.parse_box_score_html)]
+    for job, box_score in fetch_and_parse(jobs, PageCache(cache_dir), os.cpu_count()):
+        if isinstance(box_score, Exception):
+            ...
+"""
+
+import collections
+import concurrent.futures
+import dataclasses
+import hashlib
+import multiprocessing
+import os
+import pathlib
+import queue
+import threading
+import urllib.parse
+from typing import Any, Callable, Iterable, Iterator
+
+import uro_cbb.http_client as http_client
+import uro_cbb.instrumentation as instrumentation
+
+POLL_SECONDS = 0.05
+
+# Marks a fetcher running out of jobs
+_FETCHER_DONE = object()
+
+
+@dataclasses.dataclass(frozen=True)
+class PageJob:
+    url: str
+    # Names the page type for instrumentation and the cache directory
+    source: str
+    parse: Callable[[bytes], Any]
+    params: dict | None = None
+    headers: dict | None = None
+    # Anything the caller needs to match the parsed page back up, e.g. a row index
+    key: Any = None
+
+    @property
+    def full_url(self) -> str:
+        if not self.params:
+            return self.url
+        return f"{self.url}?{urllib.parse.urlencode(self.params)}"
+
+
+class PageCache:
+    """Raw page bytes on disk under {root}/{source}/{sha1 of url}.html."""
+
+    def __init__(self, root: pathlib.Path):
+        self.root = pathlib.Path(root)
+
+    def path(self, job: PageJob) -> pathlib.Path:
+        digest = hashlib.sha1(job.full_url.encode()).hexdigest()
+        return self.root / job.source / f"{digest}.html"
+
+    def get(self, job: PageJob) -> bytes | None:
+        path = self.path(job)
+        if not path.exists():
+            instrumentation.count("cache_misses", cache="pages", source=job.source)
+            return None
+        instrumentation.count("cache_hits", cache="pages", source=job.source)
+        return path.read_bytes()
+
+    def put(self, job: PageJob, page: bytes):
+        path = self.path(job)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed so a killed backfill never leaves half a page
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(page)
+        tmp_path.replace(path)
+
+    def pages(self, source: str) -> list[pathlib.Path]:
+        return sorted((self.root / source).glob("*.html"))
+
+
+def fetch_page(job: PageJob, cache: PageCache | None = None) -> bytes:
+    if cache is not None and (page := cache.get(job)) is not None:
+        return page
+    response = http_client.get_client().get(
+        job.url, job.source, params=job.params, headers=job.headers
+    )
+    if cache is not None:
+        cache.put(job, response.content)
+    return response.content
+
+
+def _parse_page(parse: Callable[[bytes], Any], page: bytes) -> Any:
+    return parse(page)
+
+
+def _parse_file(parse: Callable[[bytes], Any], path: pathlib.Path) -> Any:
+    return parse(path.read_bytes())
+
+
+def _fetch_pages(
+    next_job: Callable[[], PageJob | None],
+    pages: queue.Queue,
+    stop: threading.Event,
+    cache: PageCache | None,
+):
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    while (job := next_job()) is not None:
+        try:
+            page = fetch_page(job, cache)
+        except Exception as error:
+            page = error
+        if not put((job, page)):
+            return
+    put(_FETCHER_DONE)
+
+
+def _process_pool(max_workers: int | None) -> concurrent.futures.ProcessPoolExecutor:
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _parse_inline(job: PageJob, page: bytes) -> Any:
+    try:
+        return job.parse(page)
+    except Exception as error:
+        return error
+
+
+def _future_result(future: concurrent.futures.Future, source: str) -> Any:
+    """The parsed page, or the exception the parse raised."""
+    if (error := future.exception()) is not None:
+        instrumentation.count("page_failures", source=source)
+        return error
+    return future.result()
+
+
+def fetch_and_parse(
+    jobs: Iterable[PageJob],
+    cache: PageCache | None = None,
+    max_workers: int | None = 0,
+    n_fetchers: int = 4,
+    max_queued_pages: int = 16,
+    max_parsing: int | None = None,
+) -> Iterator[tuple[PageJob, Any]]:
+    """Yields (job, parsed page) in completion order, with the exception in place of
+    the parsed page when the job's fetch or parse failed. max_workers=0 parses in
+    this process, None uses a process per core, see the module docstring."""
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    max_parsing = max_parsing or 2 * max(max_workers, 1)
+    jobs = iter(jobs)
+    jobs_lock = threading.Lock()
+
+    def next_job() -> PageJob | None:
+        with jobs_lock:
+            return next(jobs, None)
+
+    pages = queue.Queue(maxsize=max_queued_pages)
+    stop = threading.Event()
+    fetchers = [
+        threading.Thread(
+            target=_fetch_pages, args=(next_job, pages, stop, cache), daemon=True
+        )
+        for _ in range(n_fetchers)
+    ]
+    parsing = {}
+    pool = _process_pool(max_workers) if max_workers else None
+    try:
+        for fetcher in fetchers:
+            fetcher.start()
+        n_fetching = n_fetchers
+        while n_fetching or parsing:
+            while n_fetching and len(parsing) < max_parsing:
+                try:
+                    item = pages.get(timeout=POLL_SECONDS if parsing else None)
+                except queue.Empty:
+                    break
+                if item is _FETCHER_DONE:
+                    n_fetching -= 1
+                    continue
+                job, page = item
+                if isinstance(page, Exception):
+                    instrumentation.count("page_failures", source=job.source)
+                    yield job, page
+                    continue
+                instrumentation.count("pages_fetched", source=job.source)
+                if pool is None:
+                    parsed = _parse_inline(job, page)
+                    if isinstance(parsed, Exception):
+                        instrumentation.count("page_failures", source=job.source)
+                    yield job, parsed
+                    continue
+                parsing[pool.submit(_parse_page, job.parse, page)] = job
+            if not parsing:
+                continue
+            done, _ = concurrent.futures.wait(
+                parsing,
+                timeout=POLL_SECONDS if n_fetching else None,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                job = parsing.pop(future)
+                yield job, _future_result(future, job.source)
+    finally:
+        stop.set()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        for fetcher in fetchers:
+            fetcher.join()
+
+
+def reparse_cached(
+    cache: PageCache,
+    source: str,
+    parse: Callable[[bytes], Any],
+    max_workers: int | None = None,
+) -> Iterator[tuple[pathlib.Path, Any]]:
+    """Parses every cached page of a source on all cores, yielding (path, parsed
+    page) in path order with the exception in place of the parsed page when a parse
+    failed, as fetch_and_parse does. Workers read the pages themselves, so only paths
+    and parsed frames cross processes. Starts a process pool, see the module
+    docstring."""
+    paths = cache.pages(source)
+    if not paths:
+        return
+    max_workers = max_workers or os.cpu_count()
+    with _process_pool(max_workers) as pool:
+        parsing = collections.deque()
+        for path in paths:
+            parsing.append((path, pool.submit(_parse_file, parse, path)))
+            # Bounded like fetch_and_parse, so parsed frames don't pile up
+            if len(parsing) > 2 * max_workers:
+                done_path, future = parsing.popleft()
+                yield done_path, _future_result(future, source)
+        while parsing:
+            done_path, future = parsing.popleft()
+            yield done_path, _future_result(future, source)
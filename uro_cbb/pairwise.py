@@ -0,0 +1,161 @@
+"""Dense pairwise win probability matrices for one season and gender.
+
+matrix[i, j] is the probability team_ids[i] beats team_ids[j]. On disk a matrix is a
+single .pwm file opened with np.memmap, so opening is instant, lookups need no ID
+parsing and every process reading the file shares the same page cache copy:
+
+    header      32 bytes: magic, season (int32), gender (1 byte), n_teams (int32)
+    team_ids    n_teams int32, sorted
+    matrix      n_teams x n_teams float32, row major, starting 64 byte aligned
+"""
+
+import dataclasses
+import pathlib
+
+import numpy as np
+import polars as pl
+
+MAGIC = b"UROPWM01"
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("season", "<i4"),
+        ("gender", "S1"),
+        ("_pad", "S3"),
+        ("n_teams", "<i4"),
+        ("_pad2", "S12"),
+    ]
+)
+MATRIX_ALIGNMENT = 64
+# Kaggle team ids are 1xxx for men and 3xxx for women
+WOMENS_MIN_TEAM_ID = 3000
+
+
+def _matrix_offset(n_teams: int) -> int:
+    team_ids_end = HEADER_DTYPE.itemsize + 4 * n_teams
+    return -(-team_ids_end // MATRIX_ALIGNMENT) * MATRIX_ALIGNMENT
+
+
+def gender_of(team_id: int) -> str:
+    return "W" if team_id >= WOMENS_MIN_TEAM_ID else "M"
+
+
+@dataclasses.dataclass
+class PairwiseMatrix:
+    season: int
+    gender: str
+    team_ids: np.ndarray
+    matrix: np.ndarray
+
+    def __post_init__(self):
+        # Lookups binary search team_ids and save/create write them sorted, so rows
+        # of a matrix built on unsorted ids would be saved under the wrong teams
+        assert np.all(np.diff(self.team_ids) > 0), "team_ids must be sorted and unique"
+
+    def positions(self, team_ids) -> np.ndarray:
+        """Row/column index of each team id, team_ids must be in the matrix."""
+        # Clipped so ids past the largest one fail the assert instead of indexing
+        # past the end
+        positions = np.minimum(
+            np.searchsorted(self.team_ids, team_ids), len(self.team_ids) - 1
+        )
+        assert np.all(self.team_ids[positions] == team_ids), "Unknown team id"
+        return positions
+
+    def win_probs(self, team1_ids, team2_ids) -> np.ndarray:
+        return self.matrix[self.positions(team1_ids), self.positions(team2_ids)]
+
+    def sub_matrix(self, team_ids) -> np.ndarray:
+        """Win probabilities among team_ids in the given order, e.g. a bracket for
+        bracket.LiveBracket."""
+        positions = self.positions(team_ids)
+        return np.asarray(self.matrix[np.ix_(positions, positions)])
+
+    @classmethod
+    def from_submission_df(cls, submission_df: pl.DataFrame) -> "PairwiseMatrix":
+        """From kaggle format ID ({season}_{team1}_{team2}) and Pred columns of one
+        season and gender. Pairs that are missing default to 0.5."""
+        pairs_df = submission_df.select(
+            pl.col("ID")
+            .str.split_exact("_", 2)
+            .struct.rename_fields(["Season", "TeamID_1", "TeamID_2"])
+            .struct.unnest(),
+            pl.col("Pred"),
+        ).with_columns(pl.col("Season", "TeamID_1", "TeamID_2").cast(pl.Int32))
+        team_ids = np.union1d(pairs_df["TeamID_1"], pairs_df["TeamID_2"])
+        pairwise = cls(
+            pairs_df["Season"][0],
+            gender_of(team_ids[0]),
+            team_ids,
+            np.full((len(team_ids),) * 2, 0.5, np.float32),
+        )
+        rows = pairwise.positions(pairs_df["TeamID_1"].to_numpy())
+        cols = pairwise.positions(pairs_df["TeamID_2"].to_numpy())
+        preds = pairs_df["Pred"].to_numpy().astype(np.float32)
+        pairwise.matrix[rows, cols] = preds
+        pairwise.matrix[cols, rows] = 1 - preds
+        return pairwise
+
+    def to_submission_df(self) -> pl.DataFrame:
+        rows, cols = np.triu_indices(len(self.team_ids), k=1)
+        return pl.DataFrame(
+            {
+                "TeamID_1": self.team_ids[rows],
+                "TeamID_2": self.team_ids[cols],
+                "Pred": self.matrix[rows, cols],
+            }
+        ).select(
+            pl.format("{}_{}_{}", pl.lit(self.season), "TeamID_1", "TeamID_2").alias(
+                "ID"
+            ),
+            pl.col("Pred"),
+        )
+
+    @classmethod
+    def create(
+        cls, path: pathlib.Path, season: int, gender: str, team_ids
+    ) -> "PairwiseMatrix":
+        """Allocates a .pwm file and returns it with a writable memory-mapped matrix,
+        so large outputs (e.g. an ensemble blend) can be filled in block by block."""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        team_ids = np.sort(np.asarray(team_ids, dtype=np.int32))
+        n_teams = len(team_ids)
+        offset = _matrix_offset(n_teams)
+        with open(path, "wb") as f:
+            f.truncate(offset + 4 * n_teams * n_teams)
+
+        header = np.memmap(path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        header[0] = (MAGIC, season, gender.encode(), b"", n_teams, b"")
+        header.flush()
+        ids = np.memmap(
+            path, dtype="<i4", mode="r+", offset=HEADER_DTYPE.itemsize, shape=n_teams
+        )
+        ids[:] = team_ids
+        ids.flush()
+        matrix = np.memmap(
+            path, dtype="<f4", mode="r+", offset=offset, shape=(n_teams, n_teams)
+        )
+        return cls(season, gender, team_ids, matrix)
+
+    def save(self, path: pathlib.Path):
+        saved = self.create(path, self.season, self.gender, self.team_ids)
+        saved.matrix[:] = self.matrix
+        saved.matrix.flush()
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "PairwiseMatrix":
+        header = np.memmap(path, dtype=HEADER_DTYPE, mode="r", shape=(1,))[0]
+        assert header["magic"] == MAGIC, f"{path} is not a pairwise matrix file"
+        n_teams = int(header["n_teams"])
+        team_ids = np.memmap(
+            path, dtype="<i4", mode="r", offset=HEADER_DTYPE.itemsize, shape=n_teams
+        )
+        matrix = np.memmap(
+            path,
+            dtype="<f4",
+            mode="r",
+            offset=_matrix_offset(n_teams),
+            shape=(n_teams, n_teams),
+        )
+        return cls(int(header["season"]), header["gender"].decode(), team_ids, matrix)
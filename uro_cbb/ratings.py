@@ -0,0 +1,151 @@
+"""Opponent and venue adjusted offensive/defensive ratings computed from a season game log.
+
+Every game gives two observations, one per team:
+
+    points = mean + off[team] + def[opponent] + home_court * venue
+
+off is points scored above average and def is points allowed above average (lower is
+better), the same orientation as KenPom's AdjO/AdjD. When the game log has a
+Possessions column, points are per 100 possessions, i.e. adjusted efficiencies.
+"""
+
+import dataclasses
+import datetime
+import pathlib
+
+import numpy as np
+import polars as pl
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparse_linalg
+
+
+@dataclasses.dataclass
+class RatingEngine:
+    """Re-rates a season as of any cutoff date, warm starting from the previous solve.
+
+    games_df follows bball_ref.GAME_LOG_SCHEMA. n_teams defaults to the largest team
+    index plus one. damp is the ridge penalty pulling ratings towards average, which
+    keeps early season ratings sane when teams have played a handful of games.
+    """
+
+    games_df: pl.DataFrame
+    n_teams: int | None = None
+    damp: float = 1.0
+    tolerance: float = 1e-8
+
+    def __post_init__(self):
+        games_df = self.games_df.sort("Date")
+        if self.n_teams is None:
+            self.n_teams = (
+                max(games_df["Team1Index"].max(), games_df["Team2Index"].max()) + 1
+            )
+        self._dates = games_df["Date"].to_numpy()
+        team1 = games_df["Team1Index"].to_numpy().astype(np.int32)
+        team2 = games_df["Team2Index"].to_numpy().astype(np.int32)
+        venue = games_df["Venue"].to_numpy().astype(np.float64)
+        score1 = games_df["Score1"].to_numpy().astype(np.float64)
+        score2 = games_df["Score2"].to_numpy().astype(np.float64)
+        if "Possessions" in games_df.columns:
+            possessions = games_df["Possessions"].to_numpy().astype(np.float64)
+            score1 = 100 * score1 / possessions
+            score2 = 100 * score2 / possessions
+
+        # Rows 2i and 2i + 1 are game i from team 1's and team 2's side so that any
+        # date prefix of the games is a row prefix of the design matrix.
+        n_games = len(games_df)
+        offense = np.empty(2 * n_games, dtype=np.int32)
+        offense[0::2], offense[1::2] = team1, team2
+        defense = np.empty(2 * n_games, dtype=np.int32)
+        defense[0::2], defense[1::2] = team2, team1
+        home_court = np.empty(2 * n_games)
+        home_court[0::2], home_court[1::2] = venue, -venue
+        self._points = np.empty(2 * n_games)
+        self._points[0::2], self._points[1::2] = score1, score2
+
+        # Columns: offense ratings, defense ratings, home court advantage
+        rows = np.repeat(np.arange(2 * n_games), 3)
+        cols = np.column_stack(
+            [
+                offense,
+                self.n_teams + defense,
+                np.full(2 * n_games, 2 * self.n_teams),
+            ]
+        ).ravel()
+        values = np.column_stack(
+            [np.ones(2 * n_games), np.ones(2 * n_games), home_court]
+        ).ravel()
+        self._design = sparse.csr_matrix(
+            (values, (rows, cols)), shape=(2 * n_games, 2 * self.n_teams + 1)
+        )
+        # The ridge penalty as extra rows [damp * I] with target 0. lsqr's own damp
+        # penalises distance from x0, which would make warm started ratings depend
+        # on the previous solve, with the rows x0 only changes the iteration count.
+        self._ridge = self.damp * sparse.identity(2 * self.n_teams + 1, format="csr")
+        self._solution = None
+
+    def rate(self, cutoff_date: datetime.date | None = None) -> pl.DataFrame:
+        """Ratings using only the games played strictly before cutoff_date."""
+        if cutoff_date is None:
+            n_games = len(self._dates)
+        else:
+            n_games = int(
+                np.searchsorted(self._dates, np.datetime64(cutoff_date), side="left")
+            )
+        design = self._design[: 2 * n_games]
+        points = self._points[: 2 * n_games]
+        mean = points.mean() if n_games else 0.0
+        self._solution = sparse_linalg.lsqr(
+            sparse.vstack([design, self._ridge], format="csr"),
+            np.concatenate([points - mean, np.zeros(self._ridge.shape[0])]),
+            atol=self.tolerance,
+            btol=self.tolerance,
+            x0=self._solution,
+        )[0]
+        games_played = np.bincount(
+            design.indices[design.indices < self.n_teams], minlength=self.n_teams
+        )
+        offense = self._solution[: self.n_teams]
+        defense = self._solution[self.n_teams : 2 * self.n_teams]
+        return pl.DataFrame(
+            {
+                "TeamIndex": np.arange(self.n_teams, dtype=np.int16),
+                "G": games_played.astype(np.int16),
+                "AdjO": (mean + offense).astype(np.float32),
+                "AdjD": (mean + defense).astype(np.float32),
+                "AdjEM": (offense - defense).astype(np.float32),
+            }
+        )
+
+    @property
+    def home_court_advantage(self) -> float:
+        """Home court advantage in points from the last call to rate."""
+        return float(self._solution[-1])
+
+    def rate_daily(self, dates: list[datetime.date]) -> pl.DataFrame:
+        """Ratings as of each date, stacked with a Date column. Dates are solved in
+        order so each solve warm starts from the day before."""
+        return pl.concat(
+            [
+                self.rate(date).with_columns(Date=pl.lit(date, dtype=pl.Date))
+                for date in sorted(dates)
+            ]
+        )
+
+
+if __name__ == "__main__":
+    module_dir = pathlib.Path(__file__).parent.absolute()
+    games_df = pl.read_parquet(
+        module_dir.parent / "data/bball_ref/raw/game_logs/season=2025/games.parquet"
+    )
+    teams_df = pl.read_parquet(
+        module_dir.parent / "data/bball_ref/raw/game_logs/season=2025/teams.parquet"
+    )
+    engine = RatingEngine(games_df, n_teams=len(teams_df))
+    print(engine.rate().join(teams_df, on="TeamIndex").sort("AdjEM", descending=True))
+
+    # Warm starting must only change how fast rate converges, not the ratings
+    cutoff_date = games_df["Date"].median()
+    warm_df = engine.rate(cutoff_date)
+    cold_df = RatingEngine(games_df, n_teams=len(teams_df)).rate(cutoff_date)
+    for column in ["AdjO", "AdjD", "AdjEM"]:
+        assert np.allclose(warm_df[column], cold_df[column], atol=1e-3), column
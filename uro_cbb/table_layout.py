@@ -0,0 +1,159 @@
+"""Header driven column mapping for scraped HTML tables.
+
+A table's header rows are reduced to a fingerprint: the data-stat, over-header group
+and text of the header cell above every body cell position (colspans expanded). The
+first time a fingerprint is seen it is mapped to schema columns and cached, so rows
+are parsed with a positional lookup and pages sharing a layout share the mapping.
+
+Each header cell is matched to the first unused schema column among, in order, its
+data-stat alias, its "{group} {text}" alias, the group prefixed text ("Conf." "W" is
+ConfW) and the bare text. Reordered columns still land in the right place, columns
+the schema doesn't know are ignored and schema columns missing from the page come
+back null with a warning, rather than every later column shifting by one.
+"""
+
+import dataclasses
+import functools
+import logging
+
+import bs4
+
+import uro_cbb.instrumentation as instrumentation
+
+
+@dataclasses.dataclass(frozen=True)
+class HeaderCell:
+    data_stat: str | None
+    group: str
+    text: str
+
+
+@dataclasses.dataclass(frozen=True)
+class TableLayout:
+    # Schema columns in schema order and the body cell index each is read from,
+    # None when the page doesn't have the column
+    columns: tuple[str, ...]
+    positions: tuple[int | None, ...]
+
+    @property
+    def missing(self) -> tuple[str, ...]:
+        return tuple(
+            column
+            for column, position in zip(self.columns, self.positions)
+            if position is None
+        )
+
+    def parse_row(self, row: bs4.element.Tag) -> list[str | None]:
+        cells = row_cells(row)
+        n_cells = len(cells)
+        return [
+            (
+                cell_value(cells[position])
+                if position is not None and position < n_cells
+                else None
+            )
+            for position in self.positions
+        ]
+
+    def parse_rows(self, rows: list[bs4.element.Tag]) -> list[list[str | None]]:
+        """Parses the data rows, skipping header rows repeated within the table body
+        and rows without a value for the first (key) column."""
+        data_rows = []
+        for row in rows:
+            if row.find("td", recursive=False) is None:
+                continue
+            if (data_row := self.parse_row(row))[0] is not None:
+                data_rows.append(data_row)
+        return data_rows
+
+
+def row_cells(row: bs4.element.Tag) -> list[bs4.element.Tag]:
+    return row.find_all(["th", "td"], recursive=False)
+
+
+def cell_value(cell: bs4.element.Tag) -> str | None:
+    """A link's text when the cell has one (school names), else the cell's text."""
+    contents = cell.contents
+    if len(contents) == 1 and isinstance(contents[0], bs4.element.NavigableString):
+        # Most cells are a bare number, skip searching them for links
+        return contents[0].strip() or None
+    if link := cell.find("a"):
+        cell = link
+    return cell.get_text().strip() or None
+
+
+def _expand_colspans(header_row: bs4.element.Tag) -> list[bs4.element.Tag | None]:
+    """The header cell above each body cell position, None past the first position
+    of a colspan (e.g. the rank cell next to a kenpom rating)."""
+    positions = []
+    for cell in row_cells(header_row):
+        positions.append(cell)
+        positions.extend([None] * (int(cell.attrs.get("colspan", 1)) - 1))
+    return positions
+
+
+def header_fingerprint(
+    header_rows: list[bs4.element.Tag],
+) -> tuple[HeaderCell | None, ...]:
+    """header_rows top to bottom, the last row names the columns."""
+    *group_rows, column_row = [_expand_colspans(row) for row in header_rows]
+    groups = [""] * len(column_row)
+    for group_row in group_rows:
+        group_cell = None
+        for position in range(len(column_row)):
+            if position < len(group_row) and group_row[position] is not None:
+                group_cell = group_row[position]
+            if group_cell is not None:
+                groups[position] = group_cell.get_text().strip()
+    return tuple(
+        (
+            HeaderCell(cell.attrs.get("data-stat"), group, cell.get_text().strip())
+            if cell is not None
+            else None
+        )
+        for cell, group in zip(column_row, groups)
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _layout(
+    fingerprint: tuple[HeaderCell | None, ...],
+    columns: tuple[str, ...],
+    aliases: tuple[tuple[str, str], ...],
+    source: str,
+) -> TableLayout:
+    instrumentation.count("layouts_mapped", source=source)
+    aliases = dict(aliases)
+    positions = {}
+    for position, header_cell in enumerate(fingerprint):
+        if header_cell is None:
+            continue
+        candidates = [
+            aliases.get(header_cell.data_stat),
+            aliases.get(f"{header_cell.group} {header_cell.text}".strip()),
+            f"{header_cell.group.rstrip('.')}{header_cell.text}",
+            header_cell.text,
+        ]
+        for candidate in candidates:
+            if candidate in columns and candidate not in positions:
+                positions[candidate] = position
+                break
+    layout = TableLayout(columns, tuple(positions.get(column) for column in columns))
+    if layout.missing:
+        logging.warning(f"{source} table is missing columns {layout.missing}")
+    return layout
+
+
+def table_layout(
+    header_rows: list[bs4.element.Tag],
+    columns: list[str],
+    aliases: dict[str, str] = {},
+    source: str = "table",
+) -> TableLayout:
+    """Maps the table under header_rows to columns, see the module docstring."""
+    return _layout(
+        header_fingerprint(header_rows),
+        tuple(columns),
+        tuple(sorted(aliases.items())),
+        source,
+    )